@@ -0,0 +1,259 @@
+import os
+import re
+import json
+import asyncio
+import tempfile
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+UNCATEGORIZED = "Uncategorized"
+
+# (prompt, model_name) -> completion text
+CompletionFunc = Callable[[str, str], Awaitable[str]]
+
+_REFERENCE_RE = re.compile(r"[a-z]*\d[\w*]*")
+_NON_WORD_RE = re.compile(r"[^a-z&' ]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_description(description: str) -> str:
+    """Reduce a transaction description to a stable merchant key.
+
+    Reference numbers, masked phone numbers and punctuation are removed so
+    'Coffee Shop #88 0412' and 'COFFEE SHOP' map to the same merchant.
+    """
+    text = description.lower()
+    text = _REFERENCE_RE.sub(" ", text)
+    text = _NON_WORD_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def parse_json_object(content: str) -> Dict:
+    """Extract the first JSON object from a model response"""
+    start = content.find("{")
+    end = content.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in response")
+    return json.loads(content[start:end + 1])
+
+
+class MerchantCategoryCache:
+    """Persistent merchant -> category map shared across uploads.
+
+    Backed by a Redis hash when ``REDIS_URL`` is set, otherwise by a JSON
+    file on disk. An in-process dict sits in front of either backend.
+    """
+
+    REDIS_KEY = "merchant_categories"
+
+    def __init__(self, path: Optional[str] = None, redis_url: Optional[str] = None):
+        self.path = path or os.getenv("MERCHANT_CACHE_PATH", os.path.join("temp", "merchant_categories.json"))
+        self.redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self._local: Dict[str, str] = {}
+        self._redis = None
+        self._loaded = False
+        self._file_lock = threading.Lock()
+
+    def _get_redis(self):
+        if self._redis is None and self.redis_url:
+            try:
+                from redis.asyncio import Redis
+            except ImportError:
+                self.redis_url = None
+                return None
+            self._redis = Redis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _load_file(self) -> Dict[str, str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    async def get_many(self, merchants: Iterable[str]) -> Dict[str, str]:
+        """Look up categories for merchants, returning only the known ones"""
+        merchants = list(merchants)
+        found = {m: self._local[m] for m in merchants if m in self._local}
+        missing = [m for m in merchants if m not in found]
+        if not missing:
+            return found
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                values = await redis.hmget(self.REDIS_KEY, missing)
+            except Exception as e:
+                print(f"Merchant cache error: {e}")
+                values = [None] * len(missing)
+            for merchant, category in zip(missing, values):
+                if category:
+                    found[merchant] = self._local[merchant] = category
+            return found
+
+        if not self._loaded:
+            self._local.update(await asyncio.to_thread(self._load_file))
+            self._loaded = True
+        for merchant in missing:
+            if merchant in self._local:
+                found[merchant] = self._local[merchant]
+        return found
+
+    async def set_many(self, categories: Dict[str, str]):
+        """Remember categories for merchants"""
+        if not categories:
+            return
+        self._local.update(categories)
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.hset(self.REDIS_KEY, mapping=categories)
+            except Exception as e:
+                print(f"Merchant cache error: {e}")
+            return
+
+        await asyncio.to_thread(self._write_file, dict(categories))
+
+    def _write_file(self, categories: Dict[str, str]):
+        # Merge with what other workers have written before replacing the file
+        with self._file_lock:
+            merged = self._load_file()
+            merged.update(categories)
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+class TransactionCategorizer:
+    """Categorizes transactions by unique merchant instead of by line.
+
+    Descriptions are normalized and deduplicated, known merchants are
+    resolved from the merchant cache, and only the unknown ones are sent to
+    the LLM in token-budgeted batches that run concurrently. A batch that
+    fails leaves just its merchants uncategorized; the call only fails if
+    every batch does.
+    """
+
+    def __init__(
+        self,
+        merchant_cache: MerchantCategoryCache,
+        batch_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.merchant_cache = merchant_cache
+        self.batch_tokens = batch_tokens or int(os.getenv("CATEGORIZE_BATCH_TOKENS", "1500"))
+        self.max_concurrency = max_concurrency or int(os.getenv("CATEGORIZE_CONCURRENCY", "4"))
+
+    def _batches(self, merchants: List[str]) -> List[List[str]]:
+        batches = []
+        current = []
+        used = 0
+        for merchant in merchants:
+            cost = estimate_tokens(merchant) + 2
+            if current and used + cost > self.batch_tokens:
+                batches.append(current)
+                current = []
+                used = 0
+            current.append(merchant)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _build_prompt(self, merchants: List[str]) -> str:
+        lines = "\n".join(merchants)
+        return f"""
+        Assign a spending category (e.g. Groceries, Dining, Utilities, Transport, Salary, Transfers)
+        to each of the following merchant descriptions.
+        Return only a JSON object mapping each description, exactly as given, to its category.
+
+        Descriptions:
+        {lines}
+        """
+
+    async def _categorize_batch(
+        self,
+        merchants: List[str],
+        model_name: str,
+        complete: CompletionFunc,
+        slots: asyncio.Semaphore
+    ) -> Dict[str, str]:
+        async with slots:
+            content = await complete(self._build_prompt(merchants), model_name)
+        # Normalizing is idempotent, so keys the model echoed back loosely still match
+        return {normalize_description(str(k)): str(v) for k, v in parse_json_object(content).items() if v}
+
+    async def categorize_merchants(
+        self,
+        descriptions: Iterable[str],
+        model_name: str,
+        complete: CompletionFunc
+    ) -> Dict[str, str]:
+        """Return a category for every normalized merchant in the descriptions"""
+        merchants = list(dict.fromkeys(normalize_description(d) for d in descriptions))
+        # Descriptions that are only reference numbers normalize to "" and stay uncategorized
+        named = [m for m in merchants if m]
+        categories = await self.merchant_cache.get_many(named)
+        unknown = [m for m in named if m not in categories]
+
+        if unknown:
+            slots = asyncio.Semaphore(self.max_concurrency)
+            results = await asyncio.gather(*[
+                self._categorize_batch(batch, model_name, complete, slots)
+                for batch in self._batches(unknown)
+            ], return_exceptions=True)
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if len(errors) == len(results):
+                raise errors[0]
+            for error in errors:
+                print(f"Categorization batch failed: {error}")
+
+            wanted = set(unknown)
+            learned = {}
+            for result in results:
+                if not isinstance(result, BaseException):
+                    learned.update({m: c for m, c in result.items() if m in wanted})
+            await self.merchant_cache.set_many(learned)
+            categories.update(learned)
+
+        return {m: categories.get(m, UNCATEGORIZED) for m in merchants}
+
+    async def categorize(
+        self,
+        transactions: List[Dict],
+        model_name: str,
+        complete: CompletionFunc
+    ) -> Dict[str, float]:
+        """Categorize transactions, set each one's category and return totals per category"""
+        merchants = await self.categorize_merchants(
+            (t["description"] for t in transactions), model_name, complete
+        )
+
+        totals: Dict[str, float] = {}
+        for t in transactions:
+            category = merchants[normalize_description(t["description"])]
+            t["category"] = category
+            totals[category] = totals.get(category, 0.0) + float(t["amount"])
+        return {category: round(total, 2) for category, total in totals.items()}
+
+
+# Initialize shared merchant cache and categorizer
+merchant_cache = MerchantCategoryCache()
+transaction_categorizer = TransactionCategorizer(merchant_cache)
@@ -1,6 +1,6 @@
 import os
-import requests
 from dotenv import load_dotenv
+from ai.http_client import http_pool
 
 load_dotenv()
 
@@ -13,15 +13,15 @@ class CerebrasClient:
             "Content-Type": "application/json"
         }
     
-    def chat_completion(self, messages, model="llama-4-scout-17b-16e-instruct"):
+    async def chat_completion(self, messages, model="llama-4-scout-17b-16e-instruct"):
         """Get chat completion from Cerebras AI"""
         payload = {
             "messages": messages,
             "model": model
         }
         
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
+        response = await http_pool.client(self.base_url).post(
+            "/chat/completions",
             headers=self.headers,
             json=payload
         )
@@ -32,4 +32,4 @@ class CerebrasClient:
             raise Exception(f"Cerebras API error: {response.status_code} - {response.text}")
 
 # Initialize client
-cerebras_client = CerebrasClient()
\ No newline at end of file
+cerebras_client = CerebrasClient()
@@ -0,0 +1,70 @@
+import os
+from typing import Dict, Optional
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AsyncHTTPPool:
+    """Shared keep-alive HTTP clients, one per LLM provider base URL.
+
+    Each provider gets a single ``httpx.AsyncClient`` whose connection pool
+    is reused across requests, so calls skip the TCP/TLS handshake and never
+    block the event loop. HTTP/2 is used when the ``h2`` package is installed.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=max_keepalive_connections or int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=keepalive_expiry or float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+        )
+        self.timeout = httpx.Timeout(
+            timeout or float(os.getenv("LLM_TIMEOUT", "30")),
+            connect=connect_timeout or float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+        )
+        if http2 is None:
+            http2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+        self.http2 = http2 and _http2_available()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Get the shared client for a provider, creating it on first use"""
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+            self._clients[base_url] = client
+        return client
+
+    async def aclose(self):
+        """Close every provider's connection pool"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+# Initialize pool shared by all LLM clients
+http_pool = AsyncHTTPPool()
@@ -1,11 +1,11 @@
 import os
-import json
-import time
-import requests
-from typing import List, Dict, Optional, Union
-from datetime import datetime, timedelta
-from functools import lru_cache
+import httpx
+from typing import AsyncIterator, List, Dict, Optional
 from dotenv import load_dotenv
+from ai.http_client import http_pool
+from ai.response_cache import CompletionCache, completion_cache_key
+from ai.rate_limiter import RateLimiter
+from ai.streaming import iter_completion_deltas
 
 load_dotenv()
 
@@ -41,22 +41,21 @@ class OpenRouterClient:
             "X-App-Name": "BankStatementAnalyzer"
         }
         self.cache_ttl = cache_ttl
-        self.last_request_time = {}
+        self.cache = CompletionCache(ttl=cache_ttl)
         self.rate_limit = 10  # requests per minute
+        self.rate_limiter = RateLimiter(model_rate=self.rate_limit)
 
-    @lru_cache(maxsize=1000)
-    def _get_cached_response(self, cache_key: str) -> Optional[Dict]:
+    async def _get_cached_response(self, cache_key: str) -> Optional[Dict]:
         """Get cached response if available"""
-        return None  # Implement proper caching with Redis/Memcached in production
+        return await self.cache.get(cache_key)
 
-    def _update_rate_limit(self, model: str):
-        """Implement rate limiting per model"""
-        current_time = time.time()
-        if model in self.last_request_time:
-            time_diff = current_time - self.last_request_time[model]
-            if time_diff < 60 / self.rate_limit:
-                time.sleep((60 / self.rate_limit) - time_diff)
-        self.last_request_time[model] = current_time
+    async def _cache_response(self, cache_key: str, response: Dict):
+        """Cache a successful response for cache_ttl seconds"""
+        await self.cache.set(cache_key, response)
+
+    async def _update_rate_limit(self, model: str, provider: str = "openrouter"):
+        """Implement rate limiting per model and provider without blocking the event loop"""
+        await self.rate_limiter.acquire(provider, model)
 
     def get_best_model(self, task_type: str, input_length: int) -> str:
         """Select the best model based on task type and input size"""
@@ -76,14 +75,6 @@ class OpenRouterClient:
         cache: bool = True
     ) -> Dict:
         """Get chat completion with enhanced features and fallback"""
-        cache_key = f"{model}:{json.dumps(messages)}"
-        if cache:
-            cached = self._get_cached_response(cache_key)
-            if cached:
-                return cached
-
-        self._update_rate_limit(model)
-        
         # Use model-specific configurations
         model_config = AIModelConfig.MODELS.get(model, {})
         payload = {
@@ -93,19 +84,25 @@ class OpenRouterClient:
             "max_tokens": max_tokens or model_config.get("max_tokens", 2048)
         }
 
+        cache_key = completion_cache_key(model, messages, payload["temperature"], payload["max_tokens"])
+        if cache:
+            cached = await self._get_cached_response(cache_key)
+            if cached:
+                return cached
+
+        await self._update_rate_limit(model)
+
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
+            response = await http_pool.client(self.base_url).post(
+                "/chat/completions",
                 headers=self.headers,
-                json=payload,
-                timeout=30
+                json=payload
             )
             
             if response.status_code == 200:
                 result = response.json()
                 if cache:
-                    # Cache the result in production with proper caching system
-                    pass
+                    await self._cache_response(cache_key, result)
                 return result
                 
             # Try Cerebras fallback for supported models
@@ -114,31 +111,100 @@ class OpenRouterClient:
                 
             raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             # Try another model as fallback
             fallback_model = "llama3.1-8b" if model != "llama3.1-8b" else "cerebras-1.3b"
             return await self.chat_completion(messages, model=fallback_model, cache=False)
 
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "llama-4-scout-17b-16e-instruct",
+        temperature: float = None,
+        max_tokens: int = None
+    ) -> AsyncIterator[str]:
+        """Yield completion text as the provider streams it, falling back to Cerebras.
+
+        The fallback is only tried if OpenRouter fails before sending any text.
+        Closing the iterator (e.g. when the client disconnects) closes the
+        upstream response, so the provider stops generating. A completed
+        stream is cached like a regular completion, and a cached completion
+        is yielded in one piece.
+        """
+        model_config = AIModelConfig.MODELS.get(model, {})
+        payload = {
+            "messages": messages,
+            "model": model,
+            "temperature": temperature or model_config.get("temperature", 0.7),
+            "max_tokens": max_tokens or model_config.get("max_tokens", 2048),
+            "stream": True
+        }
+
+        cache_key = completion_cache_key(model, messages, payload["temperature"], payload["max_tokens"])
+        cached = await self._get_cached_response(cache_key)
+        if cached:
+            yield cached["choices"][0]["message"]["content"]
+            return
+
+        providers = [
+            ("openrouter", self.base_url, self.headers),
+            ("cerebras", self.cerebras_url, {
+                "Authorization": f"Bearer {self.cerebras_api_key}",
+                "Content-Type": "application/json"
+            }),
+        ]
+        errors = []
+        for provider, base_url, headers in providers:
+            parts = []
+            try:
+                await self._update_rate_limit(model, provider=provider)
+                async with http_pool.client(base_url).stream(
+                    "POST",
+                    "/chat/completions",
+                    headers=headers,
+                    json=payload
+                ) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", "replace")
+                        raise Exception(f"{provider} API error: {response.status_code} - {body}")
+                    async for delta in iter_completion_deltas(response):
+                        parts.append(delta)
+                        yield delta
+            except Exception as e:
+                if parts:
+                    # Text has already been sent; a fallback would start the answer over
+                    raise
+                errors.append(str(e))
+                continue
+
+            await self._cache_response(cache_key, {
+                "model": model,
+                "choices": [{"message": {"role": "assistant", "content": "".join(parts)}}]
+            })
+            return
+
+        raise Exception(f"Both OpenRouter and Cerebras APIs failed: {' and '.join(errors)}")
+
     async def _cerebras_fallback(self, messages: List[Dict[str, str]], model: str) -> Dict:
         """Fallback to Cerebras API for supported models"""
+        await self._update_rate_limit(model, provider="cerebras")
         headers = {
             "Authorization": f"Bearer {self.cerebras_api_key}",
             "Content-Type": "application/json"
         }
         
         try:
-            response = requests.post(
-                f"{self.cerebras_url}/chat/completions",
+            response = await http_pool.client(self.cerebras_url).post(
+                "/chat/completions",
                 headers=headers,
-                json={"messages": messages, "model": model},
-                timeout=30
+                json={"messages": messages, "model": model}
             )
             
             if response.status_code == 200:
                 return response.json()
             raise Exception(f"Cerebras API error: {response.status_code} - {response.text}")
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"Both OpenRouter and Cerebras APIs failed: {str(e)}")
 
 # Initialize client with 1-hour cache TTL
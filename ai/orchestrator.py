@@ -0,0 +1,138 @@
+import os
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_NO_DEFAULT = object()
+
+
+class AnalysisTask:
+    """One LLM-backed step of an analysis.
+
+    ``func`` is called with the results of the tasks named in
+    ``depends_on`` as keyword arguments. If the task fails or times out its
+    ``default`` (when given) is used as its result, so dependents still run.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        depends_on: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        default: Any = _NO_DEFAULT
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.default = default
+
+    @property
+    def has_default(self) -> bool:
+        return self.default is not _NO_DEFAULT
+
+
+class AnalysisResult:
+    """Results of an orchestrated run, including which tasks failed and why"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.results.get(name, default)
+
+
+class DependencyFailed(Exception):
+    pass
+
+
+class AnalysisOrchestrator:
+    """Runs a small dependency graph of LLM tasks with maximum concurrency.
+
+    Every task starts as soon as its dependencies have finished, so the
+    total latency is the longest dependency chain rather than the sum of
+    all calls. Each task has its own timeout, and a failed task falls back
+    to its default instead of failing the whole analysis.
+    """
+
+    def __init__(self, default_timeout: Optional[float] = None):
+        self.default_timeout = default_timeout or float(os.getenv("ANALYSIS_TASK_TIMEOUT", "60"))
+
+    async def run(self, tasks: List[AnalysisTask]) -> AnalysisResult:
+        by_name = {task.name: task for task in tasks}
+        for task in tasks:
+            for dependency in task.depends_on:
+                if dependency not in by_name:
+                    raise ValueError(f"Task '{task.name}' depends on unknown task '{dependency}'")
+
+        result = AnalysisResult()
+        runners: Dict[str, asyncio.Task] = {}
+
+        async def run_task(task: AnalysisTask) -> Any:
+            timeout = task.timeout or self.default_timeout
+            started = time.perf_counter()
+            try:
+                inputs = {}
+                for dependency in task.depends_on:
+                    # Dependencies are always scheduled before their dependents
+                    try:
+                        inputs[dependency] = await asyncio.shield(runners[dependency])
+                    except Exception as e:
+                        raise DependencyFailed(f"dependency '{dependency}' failed: {e}")
+
+                started = time.perf_counter()
+                value = await asyncio.wait_for(task.func(**inputs), timeout)
+            except asyncio.TimeoutError:
+                result.errors[task.name] = f"timed out after {timeout}s"
+                if not task.has_default:
+                    raise
+                value = task.default
+            except Exception as e:
+                result.errors[task.name] = str(e)
+                if not task.has_default:
+                    raise
+                value = task.default
+            finally:
+                result.timings[task.name] = round(time.perf_counter() - started, 3)
+
+            result.results[task.name] = value
+            return value
+
+        for task in self._ordered(by_name):
+            runners[task.name] = asyncio.create_task(run_task(task))
+
+        outcomes = await asyncio.gather(*runners.values(), return_exceptions=True)
+        for name, outcome in zip(runners, outcomes):
+            if isinstance(outcome, BaseException) and name not in result.errors:
+                result.errors[name] = str(outcome)
+        return result
+
+    def _ordered(self, by_name: Dict[str, AnalysisTask]) -> List[AnalysisTask]:
+        """Topologically sort tasks, rejecting cycles"""
+        ordered = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle at task '{name}'")
+            state[name] = "visiting"
+            for dependency in by_name[name].depends_on:
+                visit(dependency)
+            state[name] = "done"
+            ordered.append(by_name[name])
+
+        for name in by_name:
+            visit(name)
+        return ordered
+
+
+# Initialize orchestrator shared by analysis endpoints
+analysis_orchestrator = AnalysisOrchestrator()
@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Atomically refill a bucket, reserve tokens and return how long the caller
+# must wait for them. Uses the Redis server clock so replicas agree on time.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate) - requested
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if tokens < 0 then
+    return tostring(-tokens / rate)
+end
+return '0'
+"""
+
+
+class TokenBucket:
+    """In-process token bucket that reserves tokens and reports the wait.
+
+    Reservations may drive the balance negative; each caller then waits
+    until its own tokens have accrued, so concurrent callers queue fairly
+    without holding a lock while they sleep.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Reserve tokens and return the seconds to wait before using them"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate) - tokens
+        self.updated_at = now
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class RateLimiter:
+    """Per-provider and per-model token buckets that await instead of sleeping.
+
+    A request reserves a token from both its provider's and its model's
+    bucket and waits for whichever is further out. Each bucket holds at
+    least ``burst`` tokens (or ten seconds' worth, if more), so that many
+    concurrent requests go out at once before the rate applies. In shared mode the
+    buckets live in Redis so the limits hold across every API replica;
+    if Redis is unreachable the local buckets are used instead.
+    """
+
+    def __init__(
+        self,
+        model_rate: Optional[float] = None,
+        provider_rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        shared: Optional[bool] = None
+    ):
+        # Rates are in requests per minute
+        self.model_rate = model_rate or float(os.getenv("LLM_MODEL_RATE_LIMIT", "10"))
+        self.provider_rate = provider_rate or float(os.getenv("LLM_PROVIDER_RATE_LIMIT", "60"))
+        # Requests a bucket lets through at once; keep it at least CATEGORIZE_CONCURRENCY
+        # or concurrent categorization batches are serialized by the limiter
+        self.burst = burst or int(os.getenv("LLM_RATE_LIMIT_BURST", "4"))
+        if shared is None:
+            shared = os.getenv("LLM_RATE_LIMIT_SHARED", "false").lower() == "true"
+        self.redis_url = (redis_url if redis_url is not None else os.getenv("REDIS_URL")) if shared else None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._redis = None
+        self._script = None
+        self._metrics = {
+            "acquired": 0,
+            "delayed": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "redis_errors": 0,
+        }
+
+    def _limits(self, per_minute: float):
+        rate = per_minute / 60
+        capacity = max(float(self.burst), per_minute / 6, 1.0)
+        return rate, capacity
+
+    def _get_script(self):
+        if self._script is None and self.redis_url:
+            try:
+                from redis.asyncio import Redis
+            except ImportError:
+                self.redis_url = None
+                return None
+            self._redis = Redis.from_url(self.redis_url)
+            self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    async def _reserve(self, key: str, per_minute: float) -> float:
+        rate, capacity = self._limits(per_minute)
+        script = self._get_script()
+        if script is not None:
+            try:
+                wait = await script(keys=[f"rate_limit:llm:{key}"], args=[rate, capacity, 1])
+                return float(wait)
+            except Exception:
+                self._metrics["redis_errors"] += 1
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, capacity)
+        return bucket.reserve()
+
+    async def acquire(self, provider: str, model: str) -> float:
+        """Wait until a request to this provider and model is allowed; return seconds waited"""
+        wait = max(
+            await self._reserve(f"provider:{provider}", self.provider_rate),
+            await self._reserve(f"model:{provider}:{model}", self.model_rate),
+        )
+
+        self._metrics["acquired"] += 1
+        if wait > 0:
+            self._metrics["delayed"] += 1
+            self._metrics["wait_seconds_total"] += wait
+            self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Get time-spent-waiting metrics"""
+        return {
+            **self._metrics,
+            "wait_seconds_total": round(self._metrics["wait_seconds_total"], 3),
+            "wait_seconds_max": round(self._metrics["wait_seconds_max"], 3),
+            "model_rate_per_minute": self.model_rate,
+            "provider_rate_per_minute": self.provider_rate,
+            "shared": bool(self.redis_url),
+        }
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._script = None
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def completion_cache_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float],
+    max_tokens: Optional[int]
+) -> str:
+    """Build a cache key from a canonical hash of the request parameters"""
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return "completion:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier cache for chat completions.
+
+    The first tier is an in-process LRU with per-entry TTL. The optional
+    second tier is Redis (enabled when ``REDIS_URL`` is set and the redis
+    package is installed), shared by every API replica. Redis failures are
+    counted and treated as misses so the cache never breaks a request.
+    """
+
+    def __init__(self, ttl: int = 3600, max_entries: Optional[int] = None, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries or int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "1000"))
+        self.redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis = None
+        self._counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "redis_errors": 0,
+        }
+
+    def _get_redis(self):
+        if self._redis is None and self.redis_url:
+            try:
+                from redis.asyncio import Redis
+            except ImportError:
+                self.redis_url = None
+                return None
+            self._redis = Redis.from_url(self.redis_url)
+        return self._redis
+
+    def _get_local(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Dict, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Get a cached completion, checking the local tier before Redis"""
+        value = self._get_local(key)
+        if value is not None:
+            self._counters["local_hits"] += 1
+            return value
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(key)
+                remaining = await redis.ttl(key) if raw is not None else 0
+            except Exception:
+                self._counters["redis_errors"] += 1
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                # Promote into the local tier for the rest of its lifetime
+                self._set_local(key, value, remaining if remaining > 0 else self.ttl)
+                self._counters["redis_hits"] += 1
+                return value
+
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict):
+        """Cache a completion in both tiers"""
+        self._set_local(key, value, self.ttl)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.set(key, json.dumps(value), ex=self.ttl)
+            except Exception:
+                self._counters["redis_errors"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        lookups = self._counters["local_hits"] + self._counters["redis_hits"] + self._counters["misses"]
+        hits = lookups - self._counters["misses"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "redis_enabled": bool(self.redis_url),
+        }
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
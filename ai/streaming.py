@@ -0,0 +1,127 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
+
+# Same decoding rules as the SDK's SSEDecoder (archive/src/cerebras/cloud/sdk/_streaming.py)
+
+
+class ServerSentEvent:
+    def __init__(
+        self,
+        event: Optional[str] = None,
+        data: str = "",
+        id: Optional[str] = None,
+        retry: Optional[int] = None
+    ):
+        self.event = event or None
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    def json(self) -> Any:
+        return json.loads(self.data)
+
+    def __repr__(self) -> str:
+        return f"ServerSentEvent(event={self.event}, data={self.data}, id={self.id}, retry={self.retry})"
+
+
+class SSEDecoder:
+    """Incremental server-sent events decoder.
+
+    Bytes are fed in as they arrive from the network and every complete
+    event is yielded straight away, so the first token reaches the caller
+    without waiting for the rest of the stream.
+    """
+
+    def __init__(self):
+        self._event: Optional[str] = None
+        self._data: List[str] = []
+        self._last_event_id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    async def aiter_bytes(self, iterator: AsyncIterator[bytes]) -> AsyncIterator[ServerSentEvent]:
+        """Given an iterator that yields raw binary data, iterate over it & yield every event encountered"""
+        async for chunk in self._aiter_chunks(iterator):
+            # Split before decoding so splitlines() only uses \r and \n
+            for raw_line in chunk.splitlines():
+                sse = self.decode(raw_line.decode("utf-8"))
+                if sse:
+                    yield sse
+
+    async def _aiter_chunks(self, iterator: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Given an iterator that yields raw binary data, iterate over it and yield individual SSE chunks"""
+        data = b""
+        async for chunk in iterator:
+            for line in chunk.splitlines(keepends=True):
+                data += line
+                if data.endswith((b"\r\r", b"\n\n", b"\r\n\r\n")):
+                    yield data
+                    data = b""
+        if data:
+            yield data
+
+    def decode(self, line: str) -> Optional[ServerSentEvent]:
+        # See: https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation
+        if not line:
+            if not self._event and not self._data and not self._last_event_id and self._retry is None:
+                return None
+
+            sse = ServerSentEvent(
+                event=self._event,
+                data="\n".join(self._data),
+                id=self._last_event_id,
+                retry=self._retry,
+            )
+
+            # As per the SSE spec, last_event_id is not reset
+            self._event = None
+            self._data = []
+            self._retry = None
+            return sse
+
+        if line.startswith(":"):
+            return None
+
+        fieldname, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if fieldname == "event":
+            self._event = value
+        elif fieldname == "data":
+            self._data.append(value)
+        elif fieldname == "id":
+            if "\0" not in value:
+                self._last_event_id = value
+        elif fieldname == "retry":
+            try:
+                self._retry = int(value)
+            except (TypeError, ValueError):
+                pass
+        return None
+
+
+async def iter_completion_deltas(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield the text deltas of an OpenAI-style streamed chat completion"""
+    async for sse in SSEDecoder().aiter_bytes(response.aiter_bytes()):
+        if sse.data.startswith("[DONE]"):
+            break
+        if not sse.data:
+            continue
+        chunk: Dict[str, Any] = sse.json()
+        if chunk.get("error"):
+            error = chunk["error"]
+            raise Exception(f"Stream error: {error.get('message', error) if isinstance(error, dict) else error}")
+        for choice in chunk.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Encode one server-sent event for relaying to a client"""
+    if not isinstance(data, str):
+        data = json.dumps(data)
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,133 @@
+import os
+import re
+import json
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+from analytics.table import TransactionTable, DEBIT
+
+load_dotenv()
+
+STRATEGIES = ("conservative", "moderate", "aggressive")
+
+# Share of monthly spend each strategy cuts, per category class
+DEFAULT_REDUCTION_RATES = {
+    "essential": (0.02, 0.05, 0.10),
+    "discretionary": (0.10, 0.20, 0.35),
+    "other": (0.05, 0.10, 0.20),
+}
+
+# Expected annual return (percent) on the money each strategy saves
+DEFAULT_ANNUAL_RETURNS = (2.5, 4.2, 6.8)
+
+# Category name words for each class; anything unmatched is "other". Words
+# match whole (plus a plural "s"), so "tax" doesn't match "Taxi"
+CATEGORY_CLASSES = {
+    "essential": (
+        "rent", "mortgage", "housing", "utility", "utilities", "electric", "electricity",
+        "water", "gas", "grocery", "groceries", "health", "healthcare", "medical",
+        "pharmacy", "pharmacies", "insurance", "transport", "transportation", "fuel",
+        "loan", "school", "education", "childcare", "tax", "taxes",
+    ),
+    "discretionary": (
+        "dining", "restaurant", "food", "coffee", "entertainment", "shopping", "travel",
+        "subscription", "streaming", "leisure", "alcohol", "gambling", "betting",
+        "clothing", "personal", "gift", "airtime", "data",
+    ),
+}
+
+# Money moving in or between accounts is not spending that can be cut
+EXCLUDED_KEYWORDS = ("salary", "income", "transfer", "saving", "investment", "refund", "deposit")
+
+
+def keyword_pattern(words: Sequence[str]) -> re.Pattern:
+    """Case-insensitive regex matching any of ``words`` as a whole word"""
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")s?\b", re.IGNORECASE)
+
+
+EXCLUDED_PATTERN = keyword_pattern(EXCLUDED_KEYWORDS)
+CLASS_PATTERNS = {class_name: keyword_pattern(words) for class_name, words in CATEGORY_CLASSES.items()}
+
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def classify_category(category: str) -> Optional[str]:
+    """Class of a spending category, or None for categories that aren't spending"""
+    if EXCLUDED_PATTERN.search(category):
+        return None
+    for class_name, pattern in CLASS_PATTERNS.items():
+        if pattern.search(category):
+            return class_name
+    return "other"
+
+
+class SavingsCalculator:
+    """Deterministic savings matrix computed from per-category spend.
+
+    Each category's average monthly spend is multiplied by its class's
+    reduction rate for every strategy in one matrix product, so no LLM call
+    is needed. Rates can be overridden with ``SAVINGS_REDUCTION_RATES``, a
+    JSON object of class -> [conservative, moderate, aggressive].
+    """
+
+    def __init__(
+        self,
+        reduction_rates: Optional[Dict[str, Sequence[float]]] = None,
+        annual_returns: Optional[Sequence[float]] = None,
+        horizon_years: Optional[int] = None
+    ):
+        rates = dict(DEFAULT_REDUCTION_RATES)
+        rates.update(json.loads(os.getenv("SAVINGS_REDUCTION_RATES", "{}")))
+        rates.update(reduction_rates or {})
+        self.classes: List[str] = list(rates)
+        self.rates = np.array([rates[c] for c in self.classes], dtype=np.float64)
+        self.annual_returns = np.array(annual_returns or DEFAULT_ANNUAL_RETURNS, dtype=np.float64)
+        self.horizon_years = horizon_years or int(os.getenv("SAVINGS_HORIZON_YEARS", "5"))
+
+    def monthly_spend(self, table: TransactionTable) -> Dict[str, float]:
+        """Average monthly debit spend per category over the statement period"""
+        start, end = table.period()
+        months = max((end - start).days / DAYS_PER_MONTH, 1.0) if start else 1.0
+        return {category: total / months for category, total in table.by_category(DEBIT).items()}
+
+    def calculate(self, spend: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+        """Savings matrix for monthly spend per category"""
+        class_index = {c: i for i, c in enumerate(self.classes)}
+        rows = []
+        amounts = []
+        for category, amount in spend.items():
+            class_name = classify_category(category)
+            if class_name is None or amount <= 0:
+                continue
+            rows.append(class_index.get(class_name, class_index.get("other", 0)))
+            amounts.append(amount)
+
+        # (categories,) @ (categories, strategies) -> monthly savings per strategy
+        weights = self.rates[np.array(rows, dtype=np.intp)]
+        monthly = np.array(amounts, dtype=np.float64) @ weights
+        annual = monthly * 12
+
+        # Future value of saving that amount every month over the horizon
+        monthly_rate = self.annual_returns / 100 / 12
+        periods = self.horizon_years * 12
+        safe_rate = np.where(monthly_rate > 0, monthly_rate, 1.0)
+        growth = np.where(monthly_rate > 0, ((1 + safe_rate) ** periods - 1) / safe_rate, periods)
+        projected = monthly * growth
+
+        return {
+            strategy: {
+                "monthly_savings": round(float(monthly[i]), 2),
+                "annual_savings": round(float(annual[i]), 2),
+                "roi_projection": round(float(self.annual_returns[i]), 2),
+                "projected_value": round(float(projected[i]), 2),
+            }
+            for i, strategy in enumerate(STRATEGIES)
+        }
+
+    def from_transactions(self, transactions: List[Dict]) -> Dict[str, Dict[str, float]]:
+        """Savings matrix for categorized transactions"""
+        return self.calculate(self.monthly_spend(TransactionTable.from_records(transactions)))
+
+
+# Initialize calculator shared by analysis endpoints
+savings_calculator = SavingsCalculator()
@@ -0,0 +1,198 @@
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+DEBIT = "debit"
+CREDIT = "credit"
+UNCATEGORIZED = "Uncategorized"
+CENT = Decimal("0.01")
+
+
+def to_cents(amounts: Iterable[Any]) -> np.ndarray:
+    """Convert amounts to int64 cents, rounding half away from zero like a bank would.
+
+    Amounts are rounded from their decimal text, so 1.005 becomes 101 cents
+    even though the nearest binary float is just below it.
+    """
+    cents = [
+        int(Decimal(str(a or 0)).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+        for a in amounts
+    ]
+    return np.asarray(cents, dtype=np.int64)
+
+
+def to_dates(values: Iterable[Any]) -> np.ndarray:
+    """Convert ISO date strings to datetime64[D]; unparseable dates become NaT"""
+    values = [str(v)[:10] if v else "NaT" for v in values]
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        dates = np.empty(len(values), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                dates[i] = np.datetime64(value, "D")
+            except ValueError:
+                dates[i] = np.datetime64("NaT")
+        return dates
+
+
+def encode(values: Iterable[Any], default: str) -> Tuple[np.ndarray, List[str]]:
+    """Dictionary-encode strings into int32 codes and their labels"""
+    labels: Dict[str, int] = {}
+    codes = np.fromiter(
+        (labels.setdefault(v or default, len(labels)) for v in values),
+        dtype=np.int32
+    )
+    return codes, list(labels)
+
+
+def from_cents(cents) -> float:
+    return round(int(cents) / 100, 2)
+
+
+def group_sum(codes: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """Exact int64 sum of ``values`` grouped by ``codes``"""
+    totals = np.zeros(size, dtype=np.int64)
+    np.add.at(totals, codes, values)
+    return totals
+
+
+class TransactionTable:
+    """Columnar, array-backed transaction table.
+
+    Dates are datetime64[D], amounts are int64 cents (always positive, as
+    extracted) and type and category are dictionary-encoded, so summaries
+    are NumPy group-bys instead of Python loops over dicts and stay exact
+    to the cent.
+    """
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        amounts: np.ndarray,
+        type_codes: np.ndarray,
+        type_labels: List[str],
+        category_codes: np.ndarray,
+        category_labels: List[str]
+    ):
+        self.dates = dates
+        self.amounts = amounts
+        self.type_codes = type_codes
+        self.type_labels = type_labels
+        self.category_codes = category_codes
+        self.category_labels = category_labels
+
+    @classmethod
+    def from_records(cls, transactions: List[Dict]) -> "TransactionTable":
+        """Build a table from extracted transaction dicts"""
+        type_codes, type_labels = encode((t.get("type") for t in transactions), DEBIT)
+        category_codes, category_labels = encode((t.get("category") for t in transactions), UNCATEGORIZED)
+        return cls(
+            dates=to_dates(t.get("date") for t in transactions),
+            amounts=to_cents(t.get("amount") for t in transactions),
+            type_codes=type_codes,
+            type_labels=type_labels,
+            category_codes=category_codes,
+            category_labels=category_labels,
+        )
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def _type_mask(self, kind: str) -> np.ndarray:
+        if kind not in self.type_labels:
+            return np.zeros(len(self), dtype=bool)
+        return self.type_codes == self.type_labels.index(kind)
+
+    @property
+    def signed_amounts(self) -> np.ndarray:
+        """Amounts in cents with credits positive and debits negative"""
+        return np.where(self._type_mask(CREDIT), self.amounts, -self.amounts)
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        """Count and total amount per transaction type"""
+        counts = np.bincount(self.type_codes, minlength=len(self.type_labels))
+        sums = group_sum(self.type_codes, self.amounts, len(self.type_labels))
+        return {
+            label: {"count": int(counts[i]), "total_amount": from_cents(sums[i])}
+            for i, label in enumerate(self.type_labels)
+        }
+
+    def by_category(self, kind: Optional[str] = DEBIT) -> Dict[str, float]:
+        """Total amount per category, for one transaction type (or all with None)"""
+        codes = self.category_codes
+        amounts = self.amounts
+        if kind is not None:
+            mask = self._type_mask(kind)
+            codes = codes[mask]
+            amounts = amounts[mask]
+        sums = group_sum(codes, amounts, len(self.category_labels))
+        return {
+            label: from_cents(sums[i])
+            for i, label in enumerate(self.category_labels)
+            if sums[i]
+        }
+
+    def monthly(self, opening_balance: float = 0.0) -> List[Dict[str, Any]]:
+        """Debits, credits, net flow and closing balance per calendar month"""
+        dated = ~np.isnat(self.dates)
+        months = self.dates[dated].astype("datetime64[M]")
+        if not len(months):
+            return []
+        labels, month_codes = np.unique(months, return_inverse=True)
+        credit = self._type_mask(CREDIT)[dated]
+        amounts = self.amounts[dated]
+
+        credits = group_sum(month_codes[credit], amounts[credit], len(labels))
+        debits = group_sum(month_codes[~credit], amounts[~credit], len(labels))
+        counts = np.bincount(month_codes, minlength=len(labels))
+        balances = to_cents([opening_balance])[0] + np.cumsum(credits - debits)
+
+        return [
+            {
+                "month": str(labels[i]),
+                "count": int(counts[i]),
+                "debits": from_cents(debits[i]),
+                "credits": from_cents(credits[i]),
+                "net": from_cents(credits[i] - debits[i]),
+                "closing_balance": from_cents(balances[i]),
+            }
+            for i in range(len(labels))
+        ]
+
+    def running_balance(self, opening_balance: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Dates in chronological order and the balance in cents after each transaction"""
+        order = np.argsort(self.dates, kind="stable")
+        balances = to_cents([opening_balance])[0] + np.cumsum(self.signed_amounts[order])
+        return self.dates[order], balances
+
+    def period(self) -> Tuple[Optional[date], Optional[date]]:
+        """First and last transaction dates"""
+        dated = self.dates[~np.isnat(self.dates)]
+        if not len(dated):
+            return None, None
+        return dated.min().item(), dated.max().item()
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals per type, debits per category and the monthly rollup"""
+        totals = self.totals()
+        empty = {"count": 0, "total_amount": 0.0}
+        start, end = self.period()
+        return {
+            "total_transactions": len(self),
+            "debits": totals.get(DEBIT, empty),
+            "credits": totals.get(CREDIT, empty),
+            "net": from_cents(self.signed_amounts.sum()),
+            "period": {
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+            },
+            "by_category": self.by_category(DEBIT),
+            "monthly": self.monthly(),
+        }
+
+
+def summarize_transactions(transactions: List[Dict]) -> Dict[str, Any]:
+    """Summarize transactions through a TransactionTable"""
+    return TransactionTable.from_records(transactions).summary()
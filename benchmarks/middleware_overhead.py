@@ -0,0 +1,171 @@
+"""Per-request overhead of the security middleware stack.
+
+Compares a bare FastAPI app, the previous BaseHTTPMiddleware-based
+SecurityMiddleware/GDPRMiddleware and the pure ASGI ones, on a small JSON
+response and on a streamed response. Requests are driven straight through
+the ASGI interface, so the numbers are middleware cost, not network cost.
+
+    python benchmarks/middleware_overhead.py [--requests 5000]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings need these, and the limiter must never trip during the run
+for name in ("CEREBRAS_API_KEY", "OPENROUTER_API_KEY", "STRIPE_SECRET_KEY", "SUPABASE_KEY"):
+    os.environ.setdefault(name, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ["REDIS_URL"] = ""
+os.environ["RATE_LIMIT_REQUESTS"] = str(10 ** 9)
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from src.core.config import settings
+from src.middleware.security import GDPRMiddleware, SecurityMiddleware
+from src.services.rate_limit import rate_limiter
+
+STREAM_CHUNKS = 256
+CHUNK = b"x" * 1024
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, minus the access log (identical in both)"""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        limit = await rate_limiter.check(
+            request.url.path,
+            request.headers.get("authorization"),
+            request.client.host if request.client else None
+        )
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Content-Security-Policy"] = (
+            "default-src 'self'; "
+            "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+            "style-src 'self' 'unsafe-inline'; "
+            "img-src 'self' data:; "
+            "font-src 'self' data:; "
+            "connect-src 'self' https://*.supabase.co https://*.openrouter.ai https://*.cerebras.ai;"
+        )
+        response.headers["X-RateLimit-Limit"] = str(limit.limit)
+        response.headers["X-RateLimit-Remaining"] = str(limit.remaining)
+        return response
+
+
+class LegacyGDPRMiddleware(BaseHTTPMiddleware):
+    """The previous implementation; its JSON body rewrite never worked and is left out"""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        if request.cookies.get("gdpr_consent") != "accepted":
+            return JSONResponse(status_code=403, content={"detail": "GDPR consent required"})
+        response = await call_next(request)
+        response.headers["X-Data-Processing-Basis"] = "consent"
+        response.headers["X-Data-Retention-Period"] = f"{settings.DATA_RETENTION_DAYS} days"
+        response.headers["X-Privacy-Contact"] = settings.PRIVACY_CONTACT_EMAIL
+        return response
+
+
+def build_app(security=None, gdpr=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_endpoint():
+        return {"credits": 5}
+
+    @app.get("/stream")
+    async def stream_endpoint():
+        async def chunks():
+            for _ in range(STREAM_CHUNKS):
+                yield CHUNK
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    if security:
+        app.add_middleware(security)
+    if gdpr:
+        app.add_middleware(gdpr)
+    return app
+
+
+def make_scope(path: str):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"cookie", b"session=abc123; gdpr_consent=accepted; theme=dark"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def request(app, path: str) -> int:
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Only reached once the response is done, like a client disconnecting
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    body = 0
+
+    async def send(message):
+        nonlocal body
+        if message["type"] == "http.response.body":
+            body += len(message.get("body", b""))
+
+    await app(make_scope(path), receive, send)
+    return body
+
+
+async def measure(app, path: str, requests: int) -> float:
+    """Median microseconds per request over a few rounds"""
+    for _ in range(200):
+        await request(app, path)
+    rounds = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(requests):
+            await request(app, path)
+        rounds.append((time.perf_counter() - started) / requests * 1e6)
+    return statistics.median(rounds)
+
+
+async def main(requests: int):
+    apps = {
+        "no middleware": build_app(),
+        "BaseHTTPMiddleware": build_app(LegacySecurityMiddleware, LegacyGDPRMiddleware),
+        "pure ASGI": build_app(SecurityMiddleware, GDPRMiddleware),
+    }
+    for path in ("/json", "/stream"):
+        print(f"\n{path} ({requests} requests x 5 rounds)")
+        baseline = None
+        for name, app in apps.items():
+            us = await measure(app, path, requests)
+            baseline = us if baseline is None else baseline
+            print(f"  {name:<20} {us:8.1f} us/request  (+{us - baseline:6.1f} us middleware)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    asyncio.run(main(parser.parse_args().requests))
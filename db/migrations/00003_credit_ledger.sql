@@ -0,0 +1,78 @@
+-- Credit ledger: every balance change is a credit_transactions row, applied
+-- atomically together with the users.credits update by apply_credit_change()
+
+-- Ledger entry kind and idempotency reference (Stripe payment id, upload id, ...)
+ALTER TABLE credit_transactions
+ADD COLUMN kind TEXT NOT NULL DEFAULT 'purchase',
+ADD COLUMN reference TEXT,
+ADD CONSTRAINT valid_kind CHECK (kind IN ('purchase', 'grant', 'usage', 'refund'));
+
+-- Existing purchases are keyed by their payment id
+UPDATE credit_transactions SET reference = stripe_payment_id WHERE stripe_payment_id IS NOT NULL;
+
+CREATE UNIQUE INDEX idx_credit_transactions_reference
+    ON credit_transactions(kind, reference)
+    WHERE reference IS NOT NULL;
+
+-- Balances can never go negative, whatever the caller does
+ALTER TABLE users
+ADD CONSTRAINT non_negative_credits CHECK (credits >= 0);
+
+-- Apply a credit change in one round trip.
+-- Returns 'applied', 'duplicate' (the reference was already applied) or
+-- 'insufficient' (the balance would go negative), plus the resulting balance.
+CREATE OR REPLACE FUNCTION apply_credit_change(
+    p_user_id UUID,
+    p_credits INTEGER,
+    p_kind TEXT,
+    p_reference TEXT DEFAULT NULL,
+    p_amount INTEGER DEFAULT 0
+)
+RETURNS TABLE (status TEXT, balance INTEGER) AS $$
+#variable_conflict use_column
+DECLARE
+    v_entry_id UUID;
+    v_balance INTEGER;
+BEGIN
+    -- Claim the reference first; concurrent calls with the same reference
+    -- wait on the unique index and then find it taken
+    INSERT INTO credit_transactions (user_id, amount, credits, stripe_payment_id, status, kind, reference)
+    VALUES (
+        p_user_id,
+        p_amount,
+        p_credits,
+        CASE WHEN p_kind = 'purchase' THEN p_reference END,
+        'completed',
+        p_kind,
+        p_reference
+    )
+    ON CONFLICT (kind, reference) WHERE reference IS NOT NULL DO NOTHING
+    RETURNING id INTO v_entry_id;
+
+    IF v_entry_id IS NULL THEN
+        SELECT credits INTO v_balance FROM users WHERE id = p_user_id;
+        RETURN QUERY SELECT 'duplicate'::TEXT, v_balance;
+        RETURN;
+    END IF;
+
+    -- Conditional increment/decrement; the row lock serializes concurrent changes
+    UPDATE users
+    SET credits = credits + p_credits
+    WHERE id = p_user_id AND credits + p_credits >= 0
+    RETURNING credits INTO v_balance;
+
+    IF NOT FOUND THEN
+        DELETE FROM credit_transactions WHERE id = v_entry_id;
+        SELECT credits INTO v_balance FROM users WHERE id = p_user_id;
+        RETURN QUERY SELECT 'insufficient'::TEXT, COALESCE(v_balance, 0);
+        RETURN;
+    END IF;
+
+    RETURN QUERY SELECT 'applied'::TEXT, v_balance;
+END;
+$$ LANGUAGE plpgsql;
+
+-- PostgREST exposes every function as an RPC; only the backend (service
+-- role) may move credits, never a client holding the anon or user key
+REVOKE EXECUTE ON FUNCTION apply_credit_change(UUID, INTEGER, TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_credit_change(UUID, INTEGER, TEXT, TEXT, INTEGER) TO service_role;
@@ -0,0 +1,77 @@
+-- Retention cleanup moves off the access_logs insert path: the per-insert
+-- trigger scanned access_logs and bank_statements on every audit write.
+-- purge_expired_data() is called on a schedule by one API worker instead.
+
+DROP TRIGGER IF EXISTS trigger_delete_old_data ON access_logs;
+DROP FUNCTION IF EXISTS delete_old_data();
+
+-- Audit records are written in bulk by the API; the client IP isn't always known
+ALTER TABLE access_logs ALTER COLUMN ip_address DROP NOT NULL;
+
+-- Lets the purge find expired completed statements without a full scan
+CREATE INDEX IF NOT EXISTS idx_bank_statements_completed_processed_date
+    ON bank_statements(processed_date)
+    WHERE status = 'completed';
+
+-- Delete at most p_batch_size expired rows from each table and return how
+-- many went. Callers repeat until both counts are 0; small batches keep
+-- each transaction short so inserts are never held up behind a big delete.
+CREATE OR REPLACE FUNCTION purge_expired_data(
+    p_retention_days INTEGER DEFAULT 30,
+    p_batch_size INTEGER DEFAULT 5000
+)
+RETURNS TABLE (access_logs_deleted INTEGER, statements_deleted INTEGER) AS $$
+DECLARE
+    v_cutoff TIMESTAMP WITH TIME ZONE := NOW() - make_interval(days => p_retention_days);
+    v_logs INTEGER;
+    v_statements INTEGER;
+BEGIN
+    DELETE FROM access_logs
+    WHERE id IN (
+        SELECT id FROM access_logs
+        WHERE timestamp < v_cutoff
+        LIMIT p_batch_size
+    );
+    GET DIAGNOSTICS v_logs = ROW_COUNT;
+
+    DELETE FROM bank_statements
+    WHERE id IN (
+        SELECT id FROM bank_statements
+        WHERE status = 'completed' AND processed_date < v_cutoff
+        LIMIT p_batch_size
+    );
+    GET DIAGNOSTICS v_statements = ROW_COUNT;
+
+    RETURN QUERY SELECT v_logs, v_statements;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Last run of each scheduled maintenance task, so that only one API worker
+-- runs it per interval however many workers and replicas are up
+CREATE TABLE IF NOT EXISTS maintenance_runs (
+    task TEXT PRIMARY KEY,
+    last_run_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Claim the next run of p_task; true for exactly one caller per interval
+CREATE OR REPLACE FUNCTION claim_maintenance_run(
+    p_task TEXT,
+    p_interval_seconds INTEGER
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    INSERT INTO maintenance_runs (task, last_run_at)
+    VALUES (p_task, NOW())
+    ON CONFLICT (task) DO UPDATE SET last_run_at = EXCLUDED.last_run_at
+    WHERE maintenance_runs.last_run_at <= NOW() - make_interval(secs => p_interval_seconds);
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- PostgREST exposes every function as an RPC; only the backend (service
+-- role) may purge data or claim maintenance runs
+REVOKE EXECUTE ON FUNCTION purge_expired_data(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION purge_expired_data(INTEGER, INTEGER) TO service_role;
+REVOKE EXECUTE ON FUNCTION claim_maintenance_run(TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION claim_maintenance_run(TEXT, INTEGER) TO service_role;
+REVOKE ALL ON TABLE maintenance_runs FROM anon, authenticated;
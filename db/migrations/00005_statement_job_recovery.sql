@@ -0,0 +1,11 @@
+-- Statement jobs are rebuilt from bank_statements after a restart, so the
+-- row carries everything a worker needs to run the job again
+
+ALTER TABLE bank_statements
+ADD COLUMN file_id TEXT,
+ADD COLUMN content_hash TEXT;
+
+-- Lets startup recovery find unfinished statements without a full scan
+CREATE INDEX IF NOT EXISTS idx_bank_statements_unfinished
+    ON bank_statements(upload_date)
+    WHERE status IN ('pending', 'processing');
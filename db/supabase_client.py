@@ -35,42 +35,45 @@ class SupabaseClient:
     def get_user_credits(self, user_id):
         """Get user's credit balance"""
         try:
-            response = self.client.table("credits").select("*").eq("user_id", user_id).execute()
-            return response.data[0] if response.data else {"balance": 0}
+            response = self.client.table("users").select("credits").eq("id", user_id).execute()
+            return {"balance": response.data[0]["credits"] if response.data else 0}
         except Exception as e:
             raise Exception(f"Error fetching credits: {str(e)}")
     
-    def add_user_credits(self, user_id, amount):
-        """Add credits to user's account"""
+    def change_credits(self, user_id, credits, kind, reference=None, amount=0):
+        """Apply a credit change atomically through the credit ledger (one RPC).
+
+        Returns the status ('applied', 'duplicate' or 'insufficient') and the
+        new balance; a repeated reference is not applied twice.
+        """
+        response = self.client.rpc("apply_credit_change", {
+            "p_user_id": user_id,
+            "p_credits": credits,
+            "p_kind": kind,
+            "p_reference": reference,
+            "p_amount": amount
+        }).execute()
+        row = response.data[0]
+        return row["status"], row["balance"] or 0
+    
+    def add_user_credits(self, user_id, amount, payment_id=None):
+        """Add credits to user's account (once per payment id)"""
         try:
-            response = self.client.table("credits").upsert({
-                "user_id": user_id,
-                "balance": amount
-            }).execute()
-            return response
+            kind = "purchase" if payment_id else "grant"
+            status, balance = self.change_credits(user_id, amount, kind, payment_id)
+            return {"status": status, "balance": balance}
         except Exception as e:
             raise Exception(f"Error adding credits: {str(e)}")
     
-    def deduct_user_credit(self, user_id):
+    def deduct_user_credit(self, user_id, reference=None):
         """Deduct one credit from user's account"""
         try:
-            # Get current balance
-            credits_data = self.get_user_credits(user_id)
-            current_balance = credits_data["balance"]
-            
-            if current_balance <= 0:
-                raise Exception("Insufficient credits")
-            
-            # Update balance
-            new_balance = current_balance - 1
-            response = self.client.table("credits").upsert({
-                "user_id": user_id,
-                "balance": new_balance
-            }).execute()
-            
-            return response
+            status, balance = self.change_credits(user_id, -1, "usage", reference)
         except Exception as e:
             raise Exception(f"Error deducting credit: {str(e)}")
+        if status == "insufficient":
+            raise Exception("Insufficient credits")
+        return {"status": status, "balance": balance}
 
 # Initialize client
 supabase_client = SupabaseClient()
\ No newline at end of file
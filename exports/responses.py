@@ -0,0 +1,115 @@
+import os
+import re
+from typing import Optional, Tuple
+import anyio
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangedFileResponse(FileResponse):
+    """FileResponse that sends a single byte range with 206 Partial Content"""
+
+    def __init__(self, path: str, byte_range: Tuple[int, int], stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        start, end = byte_range
+        self.byte_range = byte_range
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        start, end = self.byte_range
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range ``Range`` header into inclusive offsets.
+
+    Returns None when the header is absent or has several ranges (the whole
+    file is sent instead) and raises ValueError when it can't be satisfied.
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def cached_file_response(
+    request: Request,
+    path: str,
+    etag: Optional[str] = None,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None
+) -> Response:
+    """Serve a generated file with a strong ETag, 304 revalidation and byte ranges"""
+    stat_result = os.stat(path)
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private, no-cache"}
+    if etag:
+        headers["ETag"] = etag
+
+    conditional = request.method in ("GET", "HEAD")
+    if conditional and etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range") if conditional else None
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, stat_result.st_size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{stat_result.st_size}"}
+            )
+
+    kwargs = dict(
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        method=request.method,
+    )
+    if byte_range is not None:
+        return RangedFileResponse(path, byte_range, stat_result, **kwargs)
+    return FileResponse(path, stat_result=stat_result, **kwargs)
@@ -0,0 +1,161 @@
+import os
+import csv
+import tempfile
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (field, header) for every exported column, in order
+COLUMNS = [
+    ("date", "Date"),
+    ("description", "Description"),
+    ("amount", "Amount"),
+    ("type", "Type"),
+    ("category", "Category"),
+]
+
+# Bump when the exported layout changes so cached exports and ETags are invalidated
+EXPORT_VERSION = 1
+
+DATE_FORMAT = "yyyy-mm-dd"
+AMOUNT_FORMAT = "#,##0.00"
+PARQUET_BATCH_ROWS = 10000
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _to_date(value) -> Optional[date]:
+    if isinstance(value, date) or value is None:
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _to_amount(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def typed_rows(transactions: Iterable[Dict]) -> Iterator[Tuple]:
+    """Yield transactions as tuples in column order with real date and amount types"""
+    for t in transactions:
+        yield (
+            _to_date(t.get("date")),
+            t.get("description", ""),
+            _to_amount(t.get("amount")),
+            t.get("type", ""),
+            t.get("category", ""),
+        )
+
+
+def write_xlsx(transactions: Iterable[Dict], path: str):
+    """Write an Excel workbook row by row in openpyxl's write-only mode.
+
+    Rows are flushed to the sheet's temporary file as they are appended,
+    so memory stays flat however many transactions there are.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Transactions")
+    for letter, width in zip("ABCDE", (12, 60, 14, 10, 20)):
+        ws.column_dimensions[letter].width = width
+    ws.freeze_panes = "A2"
+    ws.append([header for _, header in COLUMNS])
+
+    date_cell = WriteOnlyCell(ws)
+    date_cell.number_format = DATE_FORMAT
+    amount_cell = WriteOnlyCell(ws)
+    amount_cell.number_format = AMOUNT_FORMAT
+    for row_date, description, amount, kind, category in typed_rows(transactions):
+        # Reusing two styled cells avoids building a cell object per value
+        date_cell.value = row_date
+        amount_cell.value = amount
+        ws.append([date_cell, description, amount_cell, kind, category])
+
+    wb.save(path)
+
+
+def write_csv(transactions: Iterable[Dict], path: str):
+    """Write a CSV file with ISO dates"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([header for _, header in COLUMNS])
+        for row_date, description, amount, kind, category in typed_rows(transactions):
+            writer.writerow([
+                row_date.isoformat() if row_date else "",
+                description,
+                "" if amount is None else f"{amount:.2f}",
+                kind,
+                category,
+            ])
+
+
+def write_parquet(transactions: Iterable[Dict], path: str, batch_rows: int = PARQUET_BATCH_ROWS):
+    """Write a Parquet file in row groups of ``batch_rows`` transactions"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Parquet export requires pyarrow")
+
+    schema = pa.schema([
+        ("date", pa.date32()),
+        ("description", pa.string()),
+        ("amount", pa.float64()),
+        ("type", pa.dictionary(pa.int8(), pa.string())),
+        ("category", pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+    def write_batch(writer, batch: List[Tuple]):
+        arrays = []
+        for values, field in zip(zip(*batch), schema):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in typed_rows(transactions):
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                write_batch(writer, batch)
+                batch = []
+        if batch:
+            write_batch(writer, batch)
+
+
+WRITERS: Dict[str, Callable[[Iterable[Dict], str], None]] = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+def export_transactions(transactions: Iterable[Dict], path: str, fmt: str = "xlsx") -> str:
+    """Export transactions to ``path`` in the given format, replacing it atomically"""
+    writer = WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=f".{fmt}.tmp")
+    os.close(fd)
+    try:
+        writer(transactions, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
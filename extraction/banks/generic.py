@@ -0,0 +1,47 @@
+import re
+from typing import Dict, List, Optional
+from extraction.templates import (
+    BankTemplate, GENERIC_TEMPLATE, register_template, parse_amount, parse_date, line_text
+)
+
+
+@register_template
+class GenericTemplate(BankTemplate):
+    """Fallback for unrecognised banks: one transaction per 'date description amount' line"""
+
+    name = GENERIC_TEMPLATE
+    date_formats = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d %b %Y", "%d %b %y")
+    line_re = re.compile(
+        r"^(?P<date>\d{4}-\d{2}-\d{2}|\d{1,2}[/-]\d{1,2}[/-]\d{4}|\d{1,2} [A-Za-z]{3} \d{2,4})\s+"
+        r"(?P<description>.+?)\s+"
+        r"(?P<amount>\(?-?[\d,]+\.\d{2}\)?)"
+        r"(?:\s*(?P<marker>CR|DR))?"
+        r"(?:\s+-?[\d,]+\.\d{2}(?:\s*(?:CR|DR))?)?$",  # trailing running balance
+        re.IGNORECASE
+    )
+
+    def parse_lines(self, lines: List[List[Dict]], page_width: float) -> List[Dict]:
+        transactions = []
+        for line in lines:
+            match = self.line_re.match(line_text(line))
+            if match is None:
+                continue
+            transaction = self.build_transaction(match.groupdict())
+            if transaction is not None:
+                transactions.append(transaction)
+        return transactions
+
+    def build_transaction(self, cells: Dict[str, str]) -> Optional[Dict]:
+        date = parse_date(cells["date"], self.date_formats)
+        amount = parse_amount(cells["amount"])
+        if date is None or not amount:
+            return None
+
+        # Without a CR marker a line is treated as money going out
+        is_credit = (cells.get("marker") or "").upper() == "CR"
+        return {
+            "date": date,
+            "description": cells["description"].strip(),
+            "amount": abs(amount),
+            "type": "credit" if is_credit else "debit",
+        }
@@ -0,0 +1,46 @@
+from typing import Dict, Optional
+from extraction.templates import BankTemplate, register_template, parse_amount, parse_date
+
+
+@register_template
+class MpesaTemplate(BankTemplate):
+    """Safaricom M-PESA full statement (detailed statement table)"""
+
+    name = "mpesa"
+    header_markers = ("M-PESA STATEMENT", "MPESA FULL STATEMENT", "Safaricom")
+    # The real header reads "Receipt No ... Paid in Withdraw" with the "n" of
+    # Withdrawn wrapped onto the next line
+    columns = (
+        ("reference", "Receipt No.", 0.0),
+        ("completed_at", "Completion Time", 0.19),
+        ("details", "Details", 0.33),
+        ("status", "Transaction Status", 0.6),
+        ("paid_in", "Paid In", 0.73),
+        ("withdrawn", "Withdrawn", 0.8),
+        ("balance", "Balance", 0.87),
+    )
+    left_aligned = True
+    # Receipt numbers are 10 uppercase alphanumerics, e.g. TH12ABC3DE
+    row_start = r"^[A-Z0-9]{10}$"
+    # Long details wrap; stray words in other columns must not corrupt the status
+    wrapped_fields = ("details",)
+    date_formats = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y")
+    skip_lines = (r"^Page \d+ of \d+",)
+    table_end = (r"^Disclaimer",)
+
+    def build_transaction(self, cells: Dict[str, str]) -> Optional[Dict]:
+        # Failed and reversed-out rows do not move money
+        if cells.get("status", "").strip().upper() not in ("", "COMPLETED"):
+            return None
+
+        date = parse_date(cells.get("completed_at", ""), self.date_formats)
+        paid_in = parse_amount(cells.get("paid_in", "")) or 0.0
+        withdrawn = parse_amount(cells.get("withdrawn", "")) or 0.0
+        if date is None or (paid_in == 0 and withdrawn == 0):
+            return None
+
+        # Rows without extra details fall back to the receipt number
+        description = cells.get("details", "").strip() or cells["reference"]
+        if paid_in > 0:
+            return {"date": date, "description": description, "amount": paid_in, "type": "credit"}
+        return {"date": date, "description": description, "amount": abs(withdrawn), "type": "debit"}
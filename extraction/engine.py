@@ -0,0 +1,235 @@
+import os
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+import pdfplumber
+from dotenv import load_dotenv
+from extraction.parser import detect_template, parse_page
+
+load_dotenv()
+
+# (page_number, transactions, seconds spent parsing the page)
+PageResult = Tuple[int, List[Dict], float]
+
+
+def _count_pages(file_path: str) -> int:
+    """Return the number of pages in a PDF (runs in a worker process)"""
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def _inspect_statement(file_path: str) -> Tuple[int, str]:
+    """Return the page count and detected bank template (runs in a worker process)"""
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages), detect_template(pdf)
+
+
+def _parse_page_range(
+    file_path: str,
+    start: int,
+    stop: int,
+    page_parser: Callable[[Any], List[Dict]]
+) -> List[PageResult]:
+    """Parse pages [start, stop) of a PDF (runs in a worker process)"""
+    results = []
+    with pdfplumber.open(file_path) as pdf:
+        for number in range(start, stop):
+            started = time.perf_counter()
+            page = pdf.pages[number]
+            transactions = page_parser(page)
+            # Drop pdfplumber's cached layout objects so long statements stay flat
+            page.close()
+            results.append((number, transactions, time.perf_counter() - started))
+    return results
+
+
+def iter_transactions(
+    file_path: str,
+    page_parser: Optional[Callable[[Any], List[Dict]]] = None
+) -> Iterator[Dict]:
+    """Yield transactions page by page in the current process.
+
+    Only one page's layout objects are alive at a time. Intended for
+    scripts and background workers that are not running an event loop.
+    """
+    with pdfplumber.open(file_path) as pdf:
+        if page_parser is None:
+            page_parser = partial(parse_page, detect_template(pdf))
+        for page in pdf.pages:
+            transactions = page_parser(page)
+            page.close()
+            yield from transactions
+
+
+class ExtractionEngine:
+    """Runs pdfplumber page parsing in a bounded process pool.
+
+    Pages are split into fixed-size ranges that are parsed concurrently on
+    separate cores, then merged back in page order. The event loop only
+    awaits the results, so other requests keep being served during a parse.
+    By default the bank is detected from page 1 and pages are parsed with
+    its template; a custom ``page_parser`` must be picklable.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, pages_per_task: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+        self.pages_per_task = pages_per_task or int(os.getenv("EXTRACTION_PAGES_PER_TASK", "8"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._running = 0
+        self._pages_parsed = 0
+        self._page_seconds = 0.0
+        self._recent_page_timings = deque(maxlen=256)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so each uvicorn worker owns its own pool
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._executor
+
+    async def _submit(self, fn: Callable, *args) -> Any:
+        """Run fn in the pool, holding a slot so at most max_workers tasks are in flight"""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    async def _plan(
+        self,
+        file_path: str,
+        page_parser: Optional[Callable[[Any], List[Dict]]]
+    ) -> Tuple[int, Callable[[Any], List[Dict]]]:
+        """Return the page count and the page parser to use for a PDF"""
+        if page_parser is None:
+            page_count, template_name = await self._submit(_inspect_statement, file_path)
+            return page_count, partial(parse_page, template_name)
+        return await self._submit(_count_pages, file_path), page_parser
+
+    def _page_ranges(self, page_count: int, size: Optional[int] = None) -> List[Tuple[int, int]]:
+        if size is None:
+            # Never use bigger ranges than needed to keep every worker busy
+            size = max(1, min(self.pages_per_task, -(-page_count // self.max_workers)))
+        return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+    async def extract_pages(
+        self,
+        file_path: str,
+        page_parser: Optional[Callable[[Any], List[Dict]]] = None
+    ) -> List[PageResult]:
+        """Parse every page of a PDF in the pool and return results in page order"""
+        page_count, page_parser = await self._plan(file_path, page_parser)
+        ranges = self._page_ranges(page_count)
+
+        chunks = await asyncio.gather(*[
+            self._submit(_parse_page_range, file_path, start, stop, page_parser)
+            for start, stop in ranges
+        ])
+
+        results = [result for chunk in chunks for result in chunk]
+        for _, _, seconds in results:
+            self._record_page(seconds)
+        return results
+
+    async def extract(
+        self,
+        file_path: str,
+        page_parser: Optional[Callable[[Any], List[Dict]]] = None
+    ) -> List[Dict]:
+        """Extract transactions from every page of a PDF, in page order"""
+        results = await self.extract_pages(file_path, page_parser)
+        return [t for _, transactions, _ in results for t in transactions]
+
+    async def iter_pages(
+        self,
+        file_path: str,
+        page_parser: Optional[Callable[[Any], List[Dict]]] = None
+    ) -> AsyncIterator[PageResult]:
+        """Yield page results in page order as soon as each page range is parsed.
+
+        At most ``max_workers`` ranges are parsed ahead of the consumer, so
+        memory stays bounded however long the statement is.
+        """
+        page_count, page_parser = await self._plan(file_path, page_parser)
+        ranges = iter(self._page_ranges(page_count, self.pages_per_task))
+
+        def schedule() -> bool:
+            next_range = next(ranges, None)
+            if next_range is None:
+                return False
+            start, stop = next_range
+            pending.append(asyncio.ensure_future(
+                self._submit(_parse_page_range, file_path, start, stop, page_parser)
+            ))
+            return True
+
+        pending = deque()
+        for _ in range(self.max_workers):
+            if not schedule():
+                break
+
+        try:
+            while pending:
+                chunk = await pending.popleft()
+                schedule()
+                for result in chunk:
+                    self._record_page(result[2])
+                    yield result
+        finally:
+            # Consumer went away (e.g. client disconnected): drop queued work
+            for future in pending:
+                future.cancel()
+
+    async def stream(
+        self,
+        file_path: str,
+        page_parser: Optional[Callable[[Any], List[Dict]]] = None
+    ) -> AsyncIterator[Dict]:
+        """Yield transactions in page order as each page is parsed"""
+        async for _, transactions, _ in self.iter_pages(file_path, page_parser):
+            for transaction in transactions:
+                yield transaction
+
+    def _record_page(self, seconds: float):
+        self._pages_parsed += 1
+        self._page_seconds += seconds
+        self._recent_page_timings.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool size, queue depth and per-page timing statistics"""
+        recent = sorted(self._recent_page_timings)
+        return {
+            "pool_size": self.max_workers,
+            "pages_per_task": self.pages_per_task,
+            "queue_depth": self._queued,
+            "running_tasks": self._running,
+            "pages_parsed": self._pages_parsed,
+            "avg_page_ms": round(self._page_seconds / self._pages_parsed * 1000, 2) if self._pages_parsed else 0.0,
+            "p95_page_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 2) if recent else 0.0,
+            "max_page_ms": round(recent[-1] * 1000, 2) if recent else 0.0,
+        }
+
+    def shutdown(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+
+# Initialize engine shared by all endpoints
+extraction_engine = ExtractionEngine()
@@ -0,0 +1,34 @@
+from typing import Any, Dict, List
+from extraction.templates import TemplateIndex, group_lines, GENERIC_TEMPLATE
+
+# Importing the bank modules registers their templates
+import extraction.banks.generic  # noqa: F401
+import extraction.banks.mpesa  # noqa: F401
+
+# Bump when a template change alters the extracted transactions, so parses
+# cached by the statement store (and results and exports built from them)
+# are rebuilt
+PARSER_VERSION = 3
+
+# Fraction of page 1 that holds the bank's letterhead and account details
+HEADER_BAND = 0.3
+
+# Built once per process; worker processes build their own on import
+template_index = TemplateIndex()
+
+
+def detect_template(pdf: Any) -> str:
+    """Detect the bank from the header band of an open PDF's first page"""
+    if not pdf.pages:
+        return GENERIC_TEMPLATE
+    page = pdf.pages[0]
+    header = page.crop((0, 0, page.width, page.height * HEADER_BAND))
+    text = " ".join(word["text"] for word in header.extract_words())
+    return template_index.detect(text)
+
+
+def parse_page(template_name: str, page: Any) -> List[Dict]:
+    """Extract transactions from one page using the given bank template"""
+    template = template_index.get(template_name)
+    lines = group_lines(page.extract_words())
+    return template.parse_lines(lines, page.width)
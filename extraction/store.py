@@ -0,0 +1,187 @@
+import os
+import glob
+import gzip
+import json
+import asyncio
+import hashlib
+import tempfile
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from extraction.parser import PARSER_VERSION
+
+load_dotenv()
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_columns(transactions: List[Dict]) -> Dict:
+    """Pack a list of transaction dicts into columnar form"""
+    names = []
+    for t in transactions:
+        for key in t:
+            if key not in names:
+                names.append(key)
+
+    columns = {name: [t.get(name) for t in transactions] for name in names}
+
+    # Low-cardinality string columns (type, category) are dictionary-encoded
+    encoded = {}
+    for name, values in columns.items():
+        distinct = list(dict.fromkeys(v for v in values if isinstance(v, str)))
+        if values and len(distinct) <= len(values) // 4 and all(isinstance(v, str) for v in values):
+            index = {v: i for i, v in enumerate(distinct)}
+            encoded[name] = distinct
+            columns[name] = [index[v] for v in values]
+
+    return {"rows": len(transactions), "columns": columns, "dictionaries": encoded}
+
+
+def from_columns(packed: Dict) -> List[Dict]:
+    """Unpack columnar form back into a list of transaction dicts"""
+    columns = dict(packed["columns"])
+    for name, dictionary in packed.get("dictionaries", {}).items():
+        columns[name] = [dictionary[i] for i in columns[name]]
+
+    names = list(columns)
+    return [
+        {name: columns[name][i] for name in names}
+        for i in range(packed["rows"])
+    ]
+
+
+class ParsedStatementStore:
+    """Content-addressed on-disk store of extracted transactions.
+
+    Entries are keyed by the SHA-256 of the PDF and the parser version, and
+    written atomically, so every worker process pointed at the same
+    directory shares them and a parser change re-extracts every statement.
+    The least recently used entries are evicted once ``max_entries`` is
+    exceeded. The async methods do their hashing and file I/O in a thread.
+    """
+
+    def __init__(
+        self,
+        root_dir: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        version: Optional[int] = None
+    ):
+        self.root_dir = root_dir or os.getenv("STATEMENT_STORE_DIR", os.path.join("temp", "parsed"))
+        self.max_entries = max_entries or int(os.getenv("STATEMENT_STORE_MAX_ENTRIES", "512"))
+        self.version = version or PARSER_VERSION
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, f"{digest}.v{self.version}.json.gz")
+
+    def get(self, digest: str) -> Optional[List[Dict]]:
+        """Get cached transactions for a content hash, or None on a miss"""
+        path = self._entry_path(digest)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                packed = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Bump the access time used for LRU eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return from_columns(packed)
+
+    def put(self, digest: str, transactions: List[Dict]):
+        """Store transactions for a content hash"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(to_columns(transactions), f, separators=(",", ":"))
+            os.replace(tmp_path, self._entry_path(digest))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def delete(self, digest: str):
+        """Remove the cached transactions for a content hash, from every parser version"""
+        for path in glob.glob(os.path.join(glob.escape(self.root_dir), f"{digest}.*json.gz")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def get_or_extract(
+        self,
+        file_path: str,
+        extract: Callable[[str], Awaitable[List[Dict]]],
+        digest: Optional[str] = None
+    ) -> List[Dict]:
+        """Return cached transactions for a PDF, awaiting ``extract`` only on a miss"""
+        digest = digest or await asyncio.to_thread(hash_file, file_path)
+        transactions = await asyncio.to_thread(self.get, digest)
+        if transactions is None:
+            transactions = await extract(file_path)
+            await asyncio.to_thread(self.put, digest, transactions)
+        return transactions
+
+    async def stream_or_extract(
+        self,
+        file_path: str,
+        stream: Callable[[str], AsyncIterator[Dict]],
+        digest: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """Yield cached transactions for a PDF, or stream them from ``stream`` on a miss.
+
+        A streamed parse is stored only once it has run to completion.
+        """
+        digest = digest or await asyncio.to_thread(hash_file, file_path)
+        cached = await asyncio.to_thread(self.get, digest)
+        if cached is not None:
+            for transaction in cached:
+                yield transaction
+            return
+
+        transactions = []
+        async for transaction in stream(file_path):
+            transactions.append(transaction)
+            yield transaction
+        await asyncio.to_thread(self.put, digest, transactions)
+
+    def _evict(self):
+        """Remove least recently used entries beyond ``max_entries``"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root_dir):
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(self.root_dir, name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    continue
+
+            if len(entries) <= self.max_entries:
+                return
+
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+# Initialize store shared by all endpoints
+statement_store = ParsedStatementStore()
@@ -0,0 +1,278 @@
+import re
+import inspect
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Type
+
+GENERIC_TEMPLATE = "generic"
+
+# Slack, in points, when splitting cells at the left edge of a column's label
+ALIGN_TOLERANCE = 1.0
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """Parse an amount like '1,234.50', '-80.00' or '(80.00)'"""
+    cleaned = text.replace(",", "").replace(" ", "").strip()
+    if not cleaned:
+        return None
+    negative = cleaned.startswith("-") or (cleaned.startswith("(") and cleaned.endswith(")"))
+    try:
+        value = float(cleaned.strip("()-"))
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def parse_date(text: str, formats: Tuple[str, ...]) -> Optional[str]:
+    """Parse a date using the first matching format and return it as ISO"""
+    text = text.strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def group_lines(words: List[Dict], tolerance: float = 3.0) -> List[List[Dict]]:
+    """Group pdfplumber words into visual lines, each sorted left to right"""
+    lines = []
+    current = []
+    line_top = None
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if line_top is not None and word["top"] - line_top > tolerance:
+            lines.append(sorted(current, key=lambda w: w["x0"]))
+            current = []
+            line_top = None
+        if line_top is None:
+            line_top = word["top"]
+        current.append(word)
+    if current:
+        lines.append(sorted(current, key=lambda w: w["x0"]))
+    return lines
+
+
+def line_text(line: List[Dict]) -> str:
+    return " ".join(w["text"] for w in line)
+
+
+def normalize_label(text: str) -> str:
+    """Lowercase letters and digits only, so 'Receipt No.' matches 'RECEIPT NO' and 'Withdraw n'"""
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def join_wrapped_words(line: List[Dict], wrapped: List[Dict]) -> List[Dict]:
+    """Join each word of a wrapped line onto the word of ``line`` it starts under"""
+    words = [dict(word) for word in line]
+    for word in wrapped:
+        for above in words:
+            if above["x0"] - ALIGN_TOLERANCE <= word["x0"] <= above["x1"]:
+                above["text"] = f"{above['text']} {word['text']}"
+                above["x1"] = max(above["x1"], word["x1"])
+                break
+    return words
+
+
+class BankTemplate(ABC):
+    """Base class describing one bank's statement layout.
+
+    Subclasses declare the page-1 header markers used for detection and the
+    transaction table's columns, and implement ``build_transaction``.
+    Templates without columns must override ``parse_lines`` instead. Regexes
+    and default column edges are compiled once, when the template is
+    instantiated by the index.
+    """
+
+    name = GENERIC_TEMPLATE
+    # Text that only appears in this bank's page-1 header
+    header_markers: Tuple[str, ...] = ()
+    # (field, header label, default left edge as a fraction of page width).
+    # Labels match case-insensitively, ignoring punctuation and word breaks
+    columns: Tuple[Tuple[str, str, float], ...] = ()
+    # Cells start at their label's left edge rather than being centred under it
+    left_aligned = False
+    # The first column of a new row must match this; other lines are wrapped text
+    row_start = r".+"
+    # Columns whose text wraps onto the following lines; other text there is dropped
+    wrapped_fields: Tuple[str, ...] = ()
+    date_formats: Tuple[str, ...] = ("%Y-%m-%d",)
+    # Lines to ignore entirely (page footers, running totals)
+    skip_lines: Tuple[str, ...] = ()
+    # Lines that end the table on a page (disclaimers and other trailing text)
+    table_end: Tuple[str, ...] = ()
+
+    def __init__(self):
+        check_template(type(self))
+        self.fields = [field for field, _, _ in self.columns]
+        self.labels = [normalize_label(label) for _, label, _ in self.columns]
+        self.default_edges = [edge for _, _, edge in self.columns]
+        self.row_start_re = re.compile(self.row_start)
+        self.header_re = re.compile(".*?".join(re.escape(label) for label in self.labels)) if self.columns else None
+        self.skip_re = re.compile("|".join(self.skip_lines), re.IGNORECASE) if self.skip_lines else None
+        self.end_re = re.compile("|".join(self.table_end), re.IGNORECASE) if self.table_end else None
+
+    def is_header(self, text: str) -> bool:
+        return bool(self.header_re.search(normalize_label(text)))
+
+    def find_header(self, lines: List[List[Dict]]) -> Optional[Tuple[int, List[Dict]]]:
+        """Index of the first line below the table header, and the header's words.
+
+        Labels that wrap onto a second line ('Withdraw' over 'n') are joined
+        with the words below them.
+        """
+        for i, line in enumerate(lines):
+            if self.is_header(line_text(line)):
+                return i + 1, line
+            if i + 1 < len(lines):
+                joined = join_wrapped_words(line, lines[i + 1])
+                if self.is_header(line_text(joined)):
+                    return i + 2, joined
+        return None
+
+    def find_label(self, line: List[Dict], label: str, start: int) -> Optional[Tuple[int, int]]:
+        """Indexes of the first and last words spelling a label, searching from ``start``"""
+        for i in range(start, len(line)):
+            if not normalize_label(line[i]["text"]):
+                continue
+            text = ""
+            for j in range(i, len(line)):
+                text += normalize_label(line[j]["text"])
+                if text == label:
+                    return i, j
+                if not label.startswith(text):
+                    break
+        return None
+
+    def header_edges(self, line: List[Dict], page_width: float) -> List[float]:
+        """Derive column boundaries from the positions of a header row's labels"""
+        spans = []
+        start = 0
+        for label in self.labels:
+            found = self.find_label(line, label, start)
+            if found is None:
+                return [edge * page_width for edge in self.default_edges]
+            first, last = found
+            spans.append((line[first]["x0"], max(w["x1"] for w in line[first:last + 1])))
+            start = last + 1
+
+        if self.left_aligned:
+            return [0.0] + [x0 - ALIGN_TOLERANCE for x0, _ in spans[1:]]
+
+        # Split halfway between one label's right edge and the next one's left edge
+        edges = [0.0]
+        for (_, previous_x1), (x0, _) in zip(spans, spans[1:]):
+            edges.append((previous_x1 + x0) / 2)
+        return edges
+
+    def split_cells(self, line: List[Dict], edges: List[float]) -> Dict[str, str]:
+        """Assign each word on a line to a column by its horizontal centre"""
+        cells = {}
+        for word in line:
+            index = max(bisect_right(edges, (word["x0"] + word["x1"]) / 2) - 1, 0)
+            field = self.fields[index]
+            cells[field] = f"{cells[field]} {word['text']}" if field in cells else word["text"]
+        return cells
+
+    def parse_lines(self, lines: List[List[Dict]], page_width: float) -> List[Dict]:
+        """Turn a page's lines into transactions"""
+        # Everything above the table header (account details, summaries) is skipped
+        start = 0
+        edges = [edge * page_width for edge in self.default_edges]
+        header = self.find_header(lines)
+        if header is not None:
+            start, header_words = header
+            edges = self.header_edges(header_words, page_width)
+
+        rows = []
+        current = None
+        for line in lines[start:]:
+            text = line_text(line)
+            if self.end_re and self.end_re.search(text):
+                break
+            if self.is_header(text) or (self.skip_re and self.skip_re.search(text)):
+                continue
+            cells = self.split_cells(line, edges)
+            if self.row_start_re.match(cells.get(self.fields[0], "")):
+                if current is not None:
+                    rows.append(current)
+                current = cells
+            elif current is not None:
+                # Wrapped text continues the previous row's wrapping columns
+                for field, value in cells.items():
+                    if field in self.wrapped_fields:
+                        current[field] = f"{current[field]} {value}" if field in current else value
+        if current is not None:
+            rows.append(current)
+
+        transactions = []
+        for row in rows:
+            transaction = self.build_transaction(row)
+            if transaction is not None:
+                transactions.append(transaction)
+        return transactions
+
+    @abstractmethod
+    def build_transaction(self, cells: Dict[str, str]) -> Optional[Dict]:
+        """Convert a row's cells into a transaction dict, or None to drop the row"""
+
+
+_registry: Dict[str, Type[BankTemplate]] = {}
+
+
+def check_template(template_class: Type[BankTemplate]):
+    """Raise TypeError for a template that can't parse a statement"""
+    if inspect.isabstract(template_class):
+        missing = ", ".join(sorted(template_class.__abstractmethods__))
+        raise TypeError(f"{template_class.__name__} must implement {missing}")
+    if not template_class.columns and template_class.parse_lines is BankTemplate.parse_lines:
+        raise TypeError(f"{template_class.__name__} declares no columns, so it must override parse_lines")
+
+
+def register_template(template_class: Type[BankTemplate]) -> Type[BankTemplate]:
+    """Class decorator that makes a bank template available to the index.
+
+    Incomplete templates are rejected here, when the bank module is imported.
+    """
+    check_template(template_class)
+    _registry[template_class.name] = template_class
+    return template_class
+
+
+class TemplateIndex:
+    """Compiled dispatch index over every registered bank template.
+
+    All header markers are folded into one alternation with a named group
+    per template, so detecting the bank is a single regex search no matter
+    how many templates exist. Afterwards each line is dispatched straight
+    to the selected template by name.
+    """
+
+    def __init__(self, template_classes: Optional[List[Type[BankTemplate]]] = None):
+        template_classes = template_classes if template_classes is not None else list(_registry.values())
+        self._templates = {cls.name: cls() for cls in template_classes}
+        self._groups = {}
+
+        alternatives = []
+        for i, template in enumerate(self._templates.values()):
+            if not template.header_markers:
+                continue
+            group = f"t{i}"
+            self._groups[group] = template.name
+            markers = "|".join(re.escape(marker) for marker in template.header_markers)
+            alternatives.append(f"(?P<{group}>{markers})")
+        self._detector = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def detect(self, header_text: str) -> str:
+        """Return the name of the template whose markers appear in the header text"""
+        if self._detector is not None:
+            match = self._detector.search(header_text)
+            if match:
+                return self._groups[match.lastgroup]
+        return GENERIC_TEMPLATE
+
+    def get(self, name: str) -> BankTemplate:
+        return self._templates.get(name) or self._templates[GENERIC_TEMPLATE]
+
+    def names(self) -> List[str]:
+        return list(self._templates)
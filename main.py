@@ -1,15 +1,16 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import pdfplumber
-import pandas as pd
+from fastapi.responses import StreamingResponse
 import os
+import re
+import asyncio
+import logging
 import tempfile
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional
 import json
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import requests
 
 # Load environment variables
 load_dotenv()
@@ -17,10 +18,34 @@ load_dotenv()
 # Import our custom modules
 from ai.cerebras_client import cerebras_client
 from ai.openrouter_client import openrouter_client
+from ai.http_client import http_pool
+from ai.categorizer import transaction_categorizer, merchant_cache
+from ai.orchestrator import analysis_orchestrator, AnalysisTask
+from ai.streaming import format_sse
 from db.supabase_client import supabase_client
 from payments.stripe_client import stripe_client
+from extraction.store import statement_store
+from extraction.parser import PARSER_VERSION
+from extraction.engine import extraction_engine
+from storage.uploads import save_upload_stream, UploadTooLarge
+from exports.writers import export_transactions, MEDIA_TYPES, EXPORT_VERSION
+from exports.responses import cached_file_response
+from analytics.table import summarize_transactions
+from analytics.savings import savings_calculator
 
-app = FastAPI(title="Cerebras Bank Statement Analyzer", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled LLM connections and PDF worker processes
+    await http_pool.aclose()
+    await openrouter_client.cache.aclose()
+    await openrouter_client.rate_limiter.aclose()
+    await merchant_cache.aclose()
+    extraction_engine.shutdown()
+
+app = FastAPI(title="Cerebras Bank Statement Analyzer", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -41,11 +66,13 @@ class Transaction(BaseModel):
 class AnalysisRequest(BaseModel):
     model_name: str = "llama-4-scout-17b-16e-instruct"
     statement_period: str = "monthly"
+    include_advice: bool = True  # the LLM narrative; the savings matrix is always computed locally
 
 class SavingsAdvice(BaseModel):
-    advice: str
+    advice: Optional[str] = None
     categories: Dict[str, float]
     savings_matrix: Dict[str, Dict[str, float]]
+    errors: Dict[str, str] = {}  # analysis steps that failed and fell back to defaults
 
 class UserCreate(BaseModel):
     email: str
@@ -59,14 +86,48 @@ class PaymentRequest(BaseModel):
     amount: int  # in cents
     user_id: str
 
+DEFAULT_SAVINGS_ADVICE = "Based on your spending patterns, consider reducing dining expenses by 20% to save an additional $50 per month. Your utility costs are average for your income level."
+
+DEFAULT_SAVINGS_MATRIX = {
+    "conservative": {
+        "monthly_savings": 150.00,
+        "annual_savings": 1800.00,
+        "roi_projection": 2.5
+    },
+    "moderate": {
+        "monthly_savings": 300.00,
+        "annual_savings": 3600.00,
+        "roi_projection": 4.2
+    },
+    "aggressive": {
+        "monthly_savings": 500.00,
+        "annual_savings": 6000.00,
+        "roi_projection": 6.8
+    }
+}
+
 # Temporary directory for file processing
 TEMP_DIR = "temp"
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
 os.makedirs(TEMP_DIR, exist_ok=True)
 
 @app.get("/")
 async def root():
     return {"message": "Cerebras Bank Statement Analyzer API"}
 
+@app.get("/extraction/stats")
+async def extraction_stats():
+    """Get PDF extraction pool size, queue depth and per-page timings"""
+    return extraction_engine.stats()
+
+@app.get("/ai/stats")
+async def ai_stats():
+    """Get LLM completion cache counters and rate limiter wait metrics"""
+    return {
+        "completion_cache": openrouter_client.cache.stats(),
+        "rate_limiter": openrouter_client.rate_limiter.stats()
+    }
+
 @app.post("/users/create")
 async def create_user(user_data: UserCreate):
     """Create a new user account"""
@@ -116,29 +177,50 @@ async def upload_statement(file: UploadFile = File(...)):
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Save file temporarily
-    temp_file_path = os.path.join(TEMP_DIR, file.filename)
-    with open(temp_file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream the file to disk in chunks; it is named after its content hash
+    try:
+        saved = await save_upload_stream(file, TEMP_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
-    return {"filename": file.filename, "temp_path": temp_file_path}
+    return {
+        "filename": file.filename,
+        "temp_path": saved.path,
+        "size": saved.size,
+        "sha256": saved.sha256
+    }
 
 @app.post("/convert-to-excel/")
-async def convert_to_excel(file_path: str):
-    """Convert PDF bank statement to Excel format"""
+async def convert_to_excel(
+    file_path: str,
+    request: Request,
+    export_format: str = Query("xlsx", alias="format")
+):
+    """Convert PDF bank statement to Excel (or CSV/Parquet) format"""
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
+    if export_format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {export_format}")
     
-    # Extract data from PDF
-    transactions = extract_transactions_from_pdf(file_path)
+    # Reuse the export from a previous call unless the PDF has changed since
+    export_path = f"{os.path.splitext(file_path)[0]}.p{PARSER_VERSION}.v{EXPORT_VERSION}.{export_format}"
+    if not os.path.exists(export_path) or os.path.getmtime(export_path) < os.path.getmtime(file_path):
+        # Extract data from PDF (parsed once per unique file)
+        transactions = await load_transactions(file_path)
+        
+        # Stream rows into the export file off the event loop
+        await asyncio.to_thread(export_transactions, transactions, export_path, export_format)
     
-    # Convert to DataFrame and save as Excel
-    df = pd.DataFrame(transactions)
-    excel_path = file_path.replace('.pdf', '.xlsx')
-    df.to_excel(excel_path, index=False)
-    
-    return FileResponse(excel_path, filename=os.path.basename(excel_path))
+    # Uploads are named after their SHA-256, which makes a strong ETag
+    stem = os.path.basename(os.path.splitext(file_path)[0])
+    etag = f'"{stem}.{export_format}.p{PARSER_VERSION}.v{EXPORT_VERSION}"' if SHA256_RE.match(stem) else None
+    return cached_file_response(
+        request,
+        export_path,
+        etag=etag,
+        media_type=MEDIA_TYPES[export_format],
+        filename=f"{stem}.{export_format}"
+    )
 
 @app.post("/analyze-transactions/")
 async def analyze_transactions(file_path: str, request: AnalysisRequest):
@@ -146,118 +228,130 @@ async def analyze_transactions(file_path: str, request: AnalysisRequest):
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Extract transactions from PDF
-    transactions = extract_transactions_from_pdf(file_path)
+    # Extract transactions from PDF (parsed once per unique file)
+    transactions = await load_transactions(file_path)
     
-    # Categorize transactions using AI
-    categories = categorize_transactions(transactions, request.model_name)
-    
-    # Generate savings advice using AI
-    advice = generate_savings_advice(transactions, categories, request.model_name)
+    # The savings matrix is computed locally once categorization finishes; the
+    # optional advice narrative then describes it. Failed steps fall back to defaults
+    model_name = request.model_name
+    tasks = [
+        AnalysisTask(
+            "categories",
+            lambda: categorize_transactions(transactions, model_name),
+            default={}
+        ),
+        # Categorizing labels each transaction in place; the matrix reads those labels
+        AnalysisTask(
+            "savings_matrix",
+            lambda categories: generate_savings_matrix(transactions),
+            depends_on=["categories"],
+            default=DEFAULT_SAVINGS_MATRIX
+        ),
+    ]
+    if request.include_advice:
+        tasks.append(AnalysisTask(
+            "advice",
+            lambda categories, savings_matrix: generate_savings_advice(
+                transactions, categories, model_name, savings_matrix
+            ),
+            depends_on=["categories", "savings_matrix"],
+            default=DEFAULT_SAVINGS_ADVICE
+        ))
+    result = await analysis_orchestrator.run(tasks)
     
     return SavingsAdvice(
-        advice=advice,
-        categories=categories,
-        savings_matrix=generate_savings_matrix(transactions, categories)
+        advice=result.get("advice"),
+        categories=result.get("categories"),
+        savings_matrix=result.get("savings_matrix"),
+        errors=result.errors
     )
 
-@app.get("/transaction-summary/")
-async def transaction_summary(file_path: str):
-    """Get transaction summary with debits and credits"""
+@app.post("/analyze-transactions/advice/stream")
+async def stream_analysis_advice(file_path: str, request: AnalysisRequest):
+    """Server-sent events: the categories and savings matrix first, then the advice token by token.
+
+    Events are ``analysis`` (categories and savings matrix), ``token``
+    (``{"text": ...}`` deltas), then ``done`` or ``error``. If the client
+    disconnects, the response is cancelled and the upstream completion
+    is closed with it.
+    """
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
-    transactions = extract_transactions_from_pdf(file_path)
-    
-    # Separate debits and credits
-    debits = [t for t in transactions if t['type'] == 'debit']
-    credits = [t for t in transactions if t['type'] == 'credit']
+    transactions = await load_transactions(file_path)
+    model_name = request.model_name
     
-    # Calculate totals
-    total_debits = sum(t['amount'] for t in debits)
-    total_credits = sum(t['amount'] for t in credits)
+    async def events():
+        try:
+            categories = await categorize_transactions(transactions, model_name)
+        except Exception as e:
+            logger.warning("Categorization failed, streaming advice without categories: %s", e)
+            categories = {}
+        savings_matrix = await generate_savings_matrix(transactions)
+        yield format_sse({"categories": categories, "savings_matrix": savings_matrix}, event="analysis")
+        
+        try:
+            async for delta in stream_savings_advice(transactions, categories, model_name, savings_matrix):
+                yield format_sse({"text": delta}, event="token")
+        except Exception as e:
+            logger.warning("Advice stream failed: %s", e)
+            yield format_sse({"detail": str(e), "fallback": DEFAULT_SAVINGS_ADVICE}, event="error")
+            return
+        yield format_sse({}, event="done")
     
-    return {
-        "total_transactions": len(transactions),
-        "debits": {
-            "count": len(debits),
-            "total_amount": total_debits
-        },
-        "credits": {
-            "count": len(credits),
-            "total_amount": total_credits
-        }
-    }
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Ask proxies (nginx) not to buffer, or tokens arrive all at once
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-def extract_transactions_from_pdf(file_path: str) -> List[Dict]:
-    """Extract transaction data from PDF bank statement"""
-    transactions = []
+@app.get("/transaction-summary/")
+async def transaction_summary(file_path: str):
+    """Get transaction summary with debits and credits, per-category spend and monthly rollups"""
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
     
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            # This is a simplified extraction - in practice, you'd need more sophisticated parsing
-            # based on the actual format of bank statements
-            # For demo purposes, we'll return sample data
-            transactions.extend([
-                {"date": "2025-01-15", "description": "Grocery Store", "amount": 85.50, "type": "debit"},
-                {"date": "2025-01-16", "description": "Salary Deposit", "amount": 3500.00, "type": "credit"},
-                {"date": "2025-01-17", "description": "Electricity Bill", "amount": 120.75, "type": "debit"},
-                {"date": "2025-01-20", "description": "Coffee Shop", "amount": 4.95, "type": "debit"},
-                {"date": "2025-01-22", "description": "Online Transfer", "amount": 200.00, "type": "credit"},
-            ])
+    transactions = await load_transactions(file_path)
     
-    return transactions
+    # Vectorized over an array-backed table; run off the event loop for large statements
+    return await asyncio.to_thread(summarize_transactions, transactions)
 
-def categorize_transactions(transactions: List[Dict], model_name: str) -> Dict[str, float]:
-    """Categorize transactions using AI model"""
-    # Prepare the prompt for the AI model
-    transaction_text = "\n".join([f"{t['date']}: {t['description']} - ${t['amount']} ({t['type']})" for t in transactions])
-    
-    prompt = f"""
-    Please categorize the following bank transactions into appropriate spending categories.
-    Return only a JSON object with categories as keys and total amounts as values.
-    
-    Transactions:
-    {transaction_text}
-    """
-    
-    # Use OpenRouter for model routing
+async def load_transactions(file_path: str) -> List[Dict]:
+    """Get transactions from the parsed-statement store, extracting only on a miss"""
+    return await statement_store.get_or_extract(file_path, extract_transactions_from_pdf)
+
+async def extract_transactions_from_pdf(file_path: str) -> List[Dict]:
+    """Extract transaction data from PDF bank statement"""
+    # The bank is detected from page 1 and pages are parsed in the process pool
+    return await extraction_engine.extract(file_path)
+
+async def complete_prompt(prompt: str, model_name: str) -> str:
+    """Get a completion's text from OpenRouter, falling back to Cerebras"""
+    messages = [{"role": "user", "content": prompt}]
     try:
-        response = openrouter_client.chat_completion(
-            messages=[{"role": "user", "content": prompt}],
-            model=model_name
-        )
-        # In a real implementation, we would parse the AI response
-        # For now, we'll return sample categories
-        categories = {
-            "Groceries": 85.50,
-            "Salary": 3500.00,
-            "Utilities": 120.75,
-            "Dining": 4.95,
-            "Transfers": 200.00
-        }
-        return categories
+        response = await openrouter_client.chat_completion(messages=messages, model=model_name)
     except Exception as e:
         # Fallback to cerebras client if openrouter fails
         try:
-            response = cerebras_client.chat_completion(
-                messages=[{"role": "user", "content": prompt}],
-                model=model_name
-            )
-            categories = {
-                "Groceries": 85.50,
-                "Salary": 3500.00,
-                "Utilities": 120.75,
-                "Dining": 4.95,
-                "Transfers": 200.00
-            }
-            return categories
+            response = await cerebras_client.chat_completion(messages=messages, model=model_name)
         except Exception as e2:
-            raise HTTPException(status_code=500, detail=f"AI service error: {str(e)} and {str(e2)}")
+            raise Exception(f"{str(e)} and {str(e2)}")
+    return response["choices"][0]["message"]["content"]
 
-def generate_savings_advice(transactions: List[Dict], categories: Dict[str, float], model_name: str) -> str:
-    """Generate savings advice using AI model"""
+async def categorize_transactions(transactions: List[Dict], model_name: str) -> Dict[str, float]:
+    """Categorize transactions using AI model"""
+    # Only merchants missing from the merchant cache are sent to the model, in batches
+    try:
+        return await transaction_categorizer.categorize(transactions, model_name, complete_prompt)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+
+def build_savings_advice_prompt(
+    transactions: List[Dict],
+    categories: Dict[str, float],
+    savings_matrix: Optional[Dict[str, Dict[str, float]]] = None
+) -> str:
     transaction_text = "\n".join([f"{t['date']}: {t['description']} - ${t['amount']} ({t['type']})" for t in transactions])
     
     prompt = f"""
@@ -273,9 +367,24 @@ def generate_savings_advice(transactions: List[Dict], categories: Dict[str, floa
     Categories:
     {json.dumps(categories, indent=2)}
     """
+    if savings_matrix:
+        prompt += f"""
+    Explain this savings matrix (already calculated; do not change the numbers):
+    {json.dumps(savings_matrix, indent=2)}
+    """
+    return prompt
+
+async def generate_savings_advice(
+    transactions: List[Dict],
+    categories: Dict[str, float],
+    model_name: str,
+    savings_matrix: Optional[Dict[str, Dict[str, float]]] = None
+) -> str:
+    """Generate savings advice using AI model"""
+    prompt = build_savings_advice_prompt(transactions, categories, savings_matrix)
     
     try:
-        response = openrouter_client.chat_completion(
+        response = await openrouter_client.chat_completion(
             messages=[{"role": "user", "content": prompt}],
             model=model_name
         )
@@ -283,76 +392,38 @@ def generate_savings_advice(transactions: List[Dict], categories: Dict[str, floa
     except Exception as e:
         # Fallback to cerebras client if openrouter fails
         try:
-            response = cerebras_client.chat_completion(
+            response = await cerebras_client.chat_completion(
                 messages=[{"role": "user", "content": prompt}],
                 model=model_name
             )
             return response["choices"][0]["message"]["content"]
         except Exception as e2:
             # Return default advice if both services fail
-            return "Based on your spending patterns, consider reducing dining expenses by 20% to save an additional $50 per month. Your utility costs are average for your income level."
+            return DEFAULT_SAVINGS_ADVICE
 
-def generate_savings_matrix(transactions: List[Dict], categories: Dict[str, float]) -> Dict[str, Dict[str, float]]:
-    """Generate savings matrix for different scenarios"""
-    prompt = f"""
-    Based on the following transaction categories, generate a savings matrix with three strategies:
-    1. Conservative: Modest savings approach
-    2. Moderate: Balanced savings approach
-    3. Aggressive: Maximum savings approach
-    
-    For each strategy, provide:
-    - Monthly savings amount
-    - Annual savings amount
-    - Projected ROI percentage
-    
-    Return only a JSON object with the savings matrix.
-    
-    Categories:
-    {json.dumps(categories, indent=2)}
+async def stream_savings_advice(
+    transactions: List[Dict],
+    categories: Dict[str, float],
+    model_name: str,
+    savings_matrix: Optional[Dict[str, Dict[str, float]]] = None
+) -> AsyncIterator[str]:
+    """Yield savings advice text as the model generates it"""
+    prompt = build_savings_advice_prompt(transactions, categories, savings_matrix)
+    async for delta in openrouter_client.stream_chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        model=model_name
+    ):
+        yield delta
+
+async def generate_savings_matrix(transactions: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """Generate savings matrix for different scenarios from per-category spend.
+
+    Reads the ``category`` that categorize_transactions sets on each
+    transaction, so call it after categorization; uncategorized
+    transactions count as "other" spending.
     """
-    
-    try:
-        response = openrouter_client.chat_completion(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-4-scout-17b-16e-instruct"
-        )
-        # Return sample matrix if AI response fails
-        return {
-            "conservative": {
-                "monthly_savings": 150.00,
-                "annual_savings": 1800.00,
-                "roi_projection": 2.5
-            },
-            "moderate": {
-                "monthly_savings": 300.00,
-                "annual_savings": 3600.00,
-                "roi_projection": 4.2
-            },
-            "aggressive": {
-                "monthly_savings": 500.00,
-                "annual_savings": 6000.00,
-                "roi_projection": 6.8
-            }
-        }
-    except Exception as e:
-        # Return default matrix if AI service fails
-        return {
-            "conservative": {
-                "monthly_savings": 150.00,
-                "annual_savings": 1800.00,
-                "roi_projection": 2.5
-            },
-            "moderate": {
-                "monthly_savings": 300.00,
-                "annual_savings": 3600.00,
-                "roi_projection": 4.2
-            },
-            "aggressive": {
-                "monthly_savings": 500.00,
-                "annual_savings": 6000.00,
-                "roi_projection": 6.8
-            }
-        }
+    # Deterministic and local: reduction rates per category class applied to monthly spend
+    return await asyncio.to_thread(savings_calculator.from_transactions, transactions)
 
 if __name__ == "__main__":
     import uvicorn
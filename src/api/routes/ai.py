@@ -1,10 +1,13 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from ai.streaming import format_sse
+from analytics.savings import savings_calculator
 from src.models.schemas import User
-from src.services.auth import AuthService
-from src.services.ai import AIService
+from src.services.auth import auth_service
+from src.services.ai import AIService, DEFAULT_ADVICE
 
 router = APIRouter()
-auth_service = AuthService()
 ai_service = AIService()
 
 @router.get("/models")
@@ -47,4 +50,32 @@ async def analyze_spending(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+@router.post("/analyze/stream")
+async def stream_analysis(
+    transactions: list,
+    categories: dict,
+    model_name: str,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Stream the savings matrix, then the advice token by token, as server-sent events"""
+    savings_matrix = await asyncio.to_thread(savings_calculator.from_transactions, transactions)
+    
+    async def events():
+        yield format_sse({"savings_matrix": savings_matrix}, event="savings_matrix")
+        try:
+            async for delta in ai_service.stream_advice(categories, savings_matrix, model_name):
+                yield format_sse({"text": delta}, event="token")
+        except Exception as e:
+            print(f"AI service error: {e}")
+            yield format_sse({"detail": str(e), "fallback": DEFAULT_ADVICE}, event="error")
+            return
+        yield format_sse({}, event="done")
+    
+    # A client disconnect cancels this generator, which closes the upstream stream
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
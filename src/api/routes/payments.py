@@ -1,14 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from src.models.schemas import User, CreditPackage
-from src.services.auth import AuthService
+from src.services.auth import auth_service
 from src.services.payment import PaymentService
-from src.services.user import UserService
+from src.services.user import UserService, get_user_service
 from src.core.config import settings
 
 router = APIRouter()
-auth_service = AuthService()
 payment_service = PaymentService()
-user_service = UserService()
 
 @router.get("/packages")
 async def get_credit_packages():
@@ -35,7 +33,10 @@ async def create_payment_intent(
         )
 
 @router.post("/webhook")
-async def stripe_webhook(payload: dict):
+async def stripe_webhook(
+    payload: dict,
+    user_service: UserService = Depends(get_user_service)
+):
     """Handle Stripe webhook events"""
     try:
         event = payment_service.construct_event(payload)
@@ -44,11 +45,16 @@ async def stripe_webhook(payload: dict):
             payment_intent = event.data.object
             metadata = payment_intent.metadata
             
-            # Add credits to user's account
-            await user_service.add_credits(
+            # Add credits to user's account; keyed by the payment id so
+            # Stripe's webhook retries don't credit twice
+            added = await user_service.add_credits(
                 user_id=metadata.user_id,
-                credits=int(metadata.credits)
+                amount=int(metadata.credits),
+                payment_id=payment_intent.id,
+                paid_cents=payment_intent.amount
             )
+            if not added:
+                raise Exception("Failed to add credits")
         
         return {"status": "success"}
     except Exception as e:
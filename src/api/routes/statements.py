@@ -1,28 +1,141 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
-from src.models.schemas import StatementAnalysis, User
-from src.services.auth import AuthService
+import json
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request, Query, status
+from fastapi.responses import StreamingResponse
+from src.models.schemas import StatementAnalysis, TransactionSummary, User
+from src.services.auth import auth_service
 from src.services.statement import StatementService
-from src.services.user import UserService
+from src.services.user import user_service
+from src.services.jobs import StatementJobQueue, TERMINAL_STATUSES
+from src.core.config import settings
+from storage.uploads import UploadTooLarge
+from exports.writers import MEDIA_TYPES
+from exports.responses import cached_file_response
 
 router = APIRouter()
-auth_service = AuthService()
 statement_service = StatementService()
-user_service = UserService()
 
-@router.post("/upload")
+async def process_statement_job(job: dict) -> dict:
+    """Background job handler: analyze the statement, refunding its credit if that fails.
+
+    The result is stored with the job and sent on every poll, so only a
+    summary is kept; the transactions are served by the summary and
+    download endpoints.
+    """
+    try:
+        result = await statement_service.analyze_statement(
+            job["file_id"], job["file_path"], job.get("content_hash")
+        )
+    except Exception:
+        await user_service.refund_credit(job["user_id"], job["file_id"])
+        raise
+    return {
+        "file_id": result["file_id"],
+        "transaction_count": len(result["transactions"]),
+        "categories": result["categories"],
+        "analysis": result["analysis"]
+    }
+
+statement_jobs = StatementJobQueue(process_statement_job)
+
+async def save_upload(file: UploadFile, user_id: str, file_id: Optional[str] = None):
+    try:
+        return await statement_service.save_upload(file, user_id, file_id)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+
+@router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_statement(
     file: UploadFile = File(...),
     current_user: User = Depends(auth_service.get_current_user)
 ):
     """Upload a bank statement PDF file"""
-    # Check if user has credits
-    credits = await user_service.get_credits(current_user.id)
-    if credits <= 0:
+    # Validate file
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only PDF files are allowed"
+        )
+    
+    # Charge the credit up front in one atomic call, keyed by the upload so it
+    # can't be charged twice; it is refunded if the upload or processing fails
+    file_id = statement_service.new_file_id(current_user.id)
+    if not await user_service.deduct_credit(current_user.id, reference=file_id):
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail="Insufficient credits"
         )
     
+    try:
+        _, saved = await save_upload(file, current_user.id, file_id)
+        job = await statement_jobs.enqueue(
+            user_id=current_user.id,
+            file_id=file_id,
+            file_path=saved.path,
+            original_filename=file.filename,
+            file_size=saved.size,
+            content_hash=saved.sha256
+        )
+    except Exception:
+        await user_service.refund_credit(current_user.id, file_id)
+        raise
+    
+    return {"job_id": job["job_id"], "file_id": file_id, "status": job["status"]}
+
+async def get_user_job(job_id: str, user_id: str) -> dict:
+    job = await statement_jobs.get(job_id)
+    if not job or job["user_id"] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Poll the processing status (and result, once completed) of an upload"""
+    job = await get_user_job(job_id, current_user.id)
+    job.pop("file_path", None)
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_status(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Server-sent events with the job's status until it completes or fails"""
+    await get_user_job(job_id, current_user.id)
+    
+    async def events():
+        last_status = None
+        while not await request.is_disconnected():
+            job = await statement_jobs.get(job_id)
+            if job is None:
+                break
+            if job["status"] != last_status:
+                last_status = job["status"]
+                job.pop("file_path", None)
+                yield f"event: status\ndata: {json.dumps(job)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_INTERVAL)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.post("/extract/stream")
+async def stream_transactions(
+    file: UploadFile = File(...),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Stream extracted transactions as NDJSON while the PDF is parsed"""
     # Validate file
     if not file.filename.endswith('.pdf'):
         raise HTTPException(
@@ -30,13 +143,13 @@ async def upload_statement(
             detail="Only PDF files are allowed"
         )
     
-    # Process statement
-    result = await statement_service.process_statement(file, current_user.id)
+    _, saved = await save_upload(file, current_user.id)
     
-    # Deduct credit
-    await user_service.deduct_credit(current_user.id)
+    async def ndjson():
+        async for transaction in statement_service.stream_transactions(saved.path, saved.sha256):
+            yield json.dumps(transaction) + "\n"
     
-    return result
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @router.get("/analysis/{file_id}", response_model=StatementAnalysis)
 async def get_analysis(
@@ -52,16 +165,47 @@ async def get_analysis(
         )
     return analysis
 
+@router.get("/summary/{file_id}", response_model=TransactionSummary)
+async def get_summary(
+    file_id: str,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Get totals, per-category spend and monthly rollups for a statement"""
+    summary = await statement_service.get_summary(file_id, current_user.id)
+    if not summary:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Statement not found"
+        )
+    return summary
+
 @router.get("/download/{file_id}")
 async def download_excel(
     file_id: str,
+    request: Request,
+    export_format: str = Query("xlsx", alias="format"),
     current_user: User = Depends(auth_service.get_current_user)
 ):
-    """Download Excel version of the statement"""
-    excel_file = await statement_service.get_excel_file(file_id, current_user.id)
-    if not excel_file:
+    """Download Excel (or CSV/Parquet) version of the statement"""
+    if export_format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format: {export_format}"
+        )
+    
+    export = await statement_service.get_export(file_id, current_user.id, export_format)
+    if not export:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
-    return excel_file
\ No newline at end of file
+    
+    # Cached exports are served straight from disk; revalidation costs a stat
+    export_path, etag = export
+    return cached_file_response(
+        request,
+        export_path,
+        etag=etag,
+        media_type=MEDIA_TYPES[export_format],
+        filename=f"{file_id}.{export_format}"
+    )
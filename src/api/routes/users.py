@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from src.models.schemas import UserCreate, User, Token
-from src.services.auth import AuthService
-from src.services.user import UserService
+from src.services.auth import auth_service
+from src.services.user import UserService, get_user_service
+from src.services.passwords import PasswordHasherBusy
 from src.core.config import settings
 
 router = APIRouter()
-auth_service = AuthService()
-user_service = UserService()
 
 @router.post("/signup", response_model=Token)
-async def create_user(user_data: UserCreate):
+async def create_user(
+    user_data: UserCreate,
+    user_service: UserService = Depends(get_user_service)
+):
     user = await user_service.create_user(user_data)
     if not user:
         raise HTTPException(
@@ -26,7 +28,14 @@ async def create_user(user_data: UserCreate):
 
 @router.post("/login", response_model=Token)
 async def login(user_data: UserCreate):
-    user = await auth_service.authenticate_user(user_data.email, user_data.password)
+    try:
+        user = await auth_service.authenticate_user(user_data.email, user_data.password)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,6 +50,9 @@ async def get_current_user(current_user: User = Depends(auth_service.get_current
     return current_user
 
 @router.get("/credits")
-async def get_user_credits(current_user: User = Depends(auth_service.get_current_user)):
+async def get_user_credits(
+    current_user: User = Depends(auth_service.get_current_user),
+    user_service: UserService = Depends(get_user_service)
+):
     credits = await user_service.get_credits(current_user.id)
     return {"credits": credits}
\ No newline at end of file
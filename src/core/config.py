@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Cerebras Bank Statement Analyzer"
@@ -10,6 +10,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-super-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_TTL: float = 30.0  # seconds; 0 disables the authenticated-user cache
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE: int = 64  # waiting hash/verify calls before sign-ins get a 429
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -25,14 +29,76 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    SUPABASE_MAX_CONNECTIONS: int = 20
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_TIMEOUT: float = 10.0
+    
+    # Redis
+    REDIS_URL: Optional[str] = None
+    
+    # Rate limiting: requests per period (seconds) per user, or per IP when anonymous.
+    # Routes map by longest path prefix to a limit class; everything else is "default".
+    RATE_LIMIT_REQUESTS: int = 100
+    RATE_LIMIT_PERIOD: int = 60
+    RATE_LIMIT_CLASSES: Dict[str, Dict[str, int]] = {
+        "auth": {"requests": 10, "period": 60},
+        "upload": {"requests": 20, "period": 3600},
+        "ai": {"requests": 30, "period": 60},
+    }
+    RATE_LIMIT_ROUTES: Dict[str, str] = {
+        "/api/users/login": "auth",
+        "/api/users/signup": "auth",
+        "/api/statements/upload": "upload",
+        "/api/ai/": "ai",
+    }
+    RATE_LIMIT_REDIS_MAX_CONNECTIONS: int = 50
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.5
+    RATE_LIMIT_REDIS_RETRY: float = 5.0  # seconds on local limits after a Redis error
+    
+    # Input sanitization is opt-in: body fields declared as SanitizedStr are
+    # cleaned during validation, and query parameters listed here (path
+    # prefix -> names) are cleaned by SanitizationMiddleware before routing
+    SANITIZE_QUERY_FIELDS: Dict[str, List[str]] = {"/api/ai/": ["model_name"]}
+    SANITIZE_CACHE_SIZE: int = 4096
+    
+    # Background statement jobs
+    JOB_QUEUE_BACKEND: str = "memory"  # "memory" or "redis"
+    JOB_WORKERS: int = 2
+    JOB_RESULT_TTL: int = 24 * 60 * 60  # 1 day
+    JOB_EVENTS_POLL_INTERVAL: float = 1.0
+    JOB_LEASE_TTL: int = 60  # seconds before a redis job whose worker stopped is requeued
     
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     
+    # GDPR (expired rows are purged by purge_expired_data in 00004_access_log_retention.sql)
+    DATA_RETENTION_DAYS: int = 30
+    PRIVACY_CONTACT_EMAIL: str = "privacy@your-domain.com"
+    # Paths served without the consent cookie: health checks, docs, sign-up
+    # and login (consent is given in the app first), and the Stripe webhook
+    GDPR_EXEMPT_PATHS: List[str] = [
+        "/health",
+        "/docs",
+        "/docs/oauth2-redirect",
+        "/redoc",
+        "/openapi.json",
+        "/api/users/signup",
+        "/api/users/login",
+        "/api/payments/webhook",
+    ]
+    RETENTION_INTERVAL: int = 3600  # seconds between purge_expired_data runs
+    RETENTION_BATCH_SIZE: int = 5000
+    
+    # Access logs are queued in memory and bulk inserted
+    AUDIT_LOG_BATCH_SIZE: int = 500
+    AUDIT_LOG_FLUSH_INTERVAL: float = 2.0
+    AUDIT_LOG_MAX_QUEUE: int = 50000
+    
     # Credits
     NEW_USER_CREDITS: int = 1
-    CREDIT_PACKAGES = [
+    CREDIT_PACKAGES: List[Dict[str, Any]] = [
         {"amount": 50, "credits": 5, "description": "$0.50 for 5 credits"},
         {"amount": 200, "credits": 25, "description": "$2.00 for 25 credits"},
         {"amount": 500, "credits": 75, "description": "$5.00 for 75 credits"}
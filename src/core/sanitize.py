@@ -0,0 +1,37 @@
+import re
+from functools import lru_cache
+from typing import Annotated, Any, Dict, Iterable
+from pydantic import AfterValidator
+from src.core.config import settings
+
+# Only these characters can start markup or an entity; anything without them
+# comes back from bleach.clean unchanged
+_MARKUP_RE = re.compile(r"[<>&]")
+
+
+@lru_cache(maxsize=settings.SANITIZE_CACHE_SIZE)
+def _clean_markup(value: str) -> str:
+    import bleach
+    return bleach.clean(value)
+
+
+def sanitize_text(value: str) -> str:
+    """Strip HTML from a value, skipping bleach for the common markup-free case"""
+    if not _MARKUP_RE.search(value):
+        return value
+    return _clean_markup(value)
+
+
+def sanitize_fields(data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Sanitize the named string fields of a dict in place"""
+    for field in fields:
+        value = data.get(field)
+        if isinstance(value, str):
+            data[field] = sanitize_text(value)
+    return data
+
+
+# Opt a body model field into sanitization by declaring it as SanitizedStr; it
+# is cleaned during request validation. FastAPI ignores the validator on query
+# parameters, so those are listed in SANITIZE_QUERY_FIELDS instead
+SanitizedStr = Annotated[str, AfterValidator(sanitize_text)]
@@ -1,14 +1,63 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.routes import users, statements, payments, ai
 from src.core.config import settings
+from src.services.supabase import SupabasePool, supabase_pool, get_db
+from src.services.passwords import password_hasher
+from src.services.rate_limit import rate_limiter
+from src.services.audit import access_log_writer
+from src.services.user_cache import user_cache
+from src.middleware.security import SecurityMiddleware
+from src.middleware.sanitize import SanitizationMiddleware
+from extraction.engine import extraction_engine
+from ai.http_client import http_pool
+from ai.openrouter_client import openrouter_client
+from ai.categorizer import merchant_cache
+from storage.content_store import upload_store
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await supabase_pool.start()
+    await user_cache.start()
+    await statements.statement_jobs.start()
+    await access_log_writer.start()
+    retention = [
+        asyncio.create_task(upload_store.run_retention()),
+        asyncio.create_task(access_log_writer.run_retention()),
+    ]
+    yield
+    for task in retention:
+        task.cancel()
+    await access_log_writer.stop()
+    await statements.statement_jobs.stop()
+    # Release pooled LLM connections and PDF worker processes
+    await http_pool.aclose()
+    await openrouter_client.cache.aclose()
+    await openrouter_client.rate_limiter.aclose()
+    await merchant_cache.aclose()
+    extraction_engine.shutdown()
+    await supabase_pool.aclose()
+    await user_cache.aclose()
+    password_hasher.shutdown()
+    await rate_limiter.aclose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description=settings.DESCRIPTION,
+    lifespan=lifespan,
 )
 
+# Query sanitization, then rate limiting, security headers and access
+# logging; added before CORS so CORS stays outermost and 429s still carry
+# its headers. GDPRMiddleware isn't mounted: the frontend doesn't ask for
+# consent yet, so it would refuse every signed-in request
+app.add_middleware(SanitizationMiddleware)
+app.add_middleware(SecurityMiddleware)
+
 # Set up CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +73,30 @@ app.include_router(statements.router, prefix="/api/statements", tags=["statement
 app.include_router(payments.router, prefix="/api/payments", tags=["payments"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
 
+@app.get("/health")
+async def health(db: SupabasePool = Depends(get_db)):
+    """Liveness plus a database round trip; 503 when Supabase is unreachable"""
+    database = await db.health()
+    return JSONResponse(
+        status_code=200 if database["healthy"] else 503,
+        content={"status": "ok" if database["healthy"] else "degraded", "database": database}
+    )
+
+@app.get("/auth/stats")
+async def auth_stats():
+    """Get password hashing pool queue depth, rejections and latency histograms"""
+    return password_hasher.stats()
+
+@app.get("/ratelimit/stats")
+async def rate_limit_stats():
+    """Get allowed/limited counters and whether limits are shared through Redis"""
+    return rate_limiter.stats()
+
+@app.get("/audit/stats")
+async def audit_stats():
+    """Get access-log queue depth and written/dropped counters"""
+    return access_log_writer.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
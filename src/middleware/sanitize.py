@@ -0,0 +1,55 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from src.core.config import settings
+from src.core.sanitize import sanitize_text
+
+# Raw or percent-encoded <, > and &; a query string with none of them has
+# nothing to sanitize. A bare & separates parameters, so only the encoded
+# form counts.
+_MARKUP_BYTES = (b"<", b">", b"%3c", b"%3e", b"%26")
+
+
+class SanitizationMiddleware:
+    """Pure ASGI middleware that sanitizes opted-in query parameters.
+
+    Routes opt in per parameter through ``SANITIZE_QUERY_FIELDS`` (path
+    prefix -> parameter names). Query strings without markup characters
+    are passed through untouched; otherwise only the listed parameters are
+    cleaned and the query string is re-encoded. Request bodies are never
+    read here: body model fields opt in with ``SanitizedStr`` and are
+    cleaned during validation.
+    """
+
+    def __init__(self, app, fields: Optional[Dict[str, Iterable[str]]] = None):
+        self.app = app
+        fields = fields if fields is not None else settings.SANITIZE_QUERY_FIELDS
+        # Longest prefix first so the most specific route wins
+        self.routes: List[Tuple[str, frozenset]] = sorted(
+            ((prefix, frozenset(names)) for prefix, names in fields.items()),
+            key=lambda route: len(route[0]),
+            reverse=True
+        )
+
+    def _fields_for(self, path: str) -> Optional[frozenset]:
+        for prefix, names in self.routes:
+            if path.startswith(prefix):
+                return names
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            query_string = scope.get("query_string", b"")
+            if query_string and any(marker in query_string.lower() for marker in _MARKUP_BYTES):
+                fields = self._fields_for(scope["path"])
+                if fields:
+                    scope = dict(scope, query_string=self._clean_query(query_string, fields))
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _clean_query(query_string: bytes, fields: frozenset) -> bytes:
+        params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+        cleaned = [
+            (key, sanitize_text(value) if key in fields else value)
+            for key, value in params
+        ]
+        return urlencode(cleaned).encode("latin-1")
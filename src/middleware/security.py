@@ -1,127 +1,153 @@
-from fastapi import FastAPI, Request, Response
-from fastapi.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI
 from fastapi.responses import JSONResponse
-from typing import Callable
-import time
-import re
-import bleach
+from typing import List, Optional, Tuple
+import math
 from src.core.config import settings
 from src.services.security import SecurityService
+from src.services.rate_limit import rate_limiter
+from src.middleware.sanitize import SanitizationMiddleware
 
 security_service = SecurityService()
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+Headers = List[Tuple[bytes, bytes]]
+
+# Built once; every response gets the same list appended to its headers
+SECURITY_HEADERS: Headers = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"content-security-policy", (
+        b"default-src 'self'; "
+        b"script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+        b"style-src 'self' 'unsafe-inline'; "
+        b"img-src 'self' data:; "
+        b"font-src 'self' data:; "
+        b"connect-src 'self' https://*.supabase.co https://*.openrouter.ai https://*.cerebras.ai;"
+    )),
+]
+
+AUDITED_METHODS = ("POST", "PUT", "DELETE")
+CONSENT_COOKIE = b"gdpr_consent=accepted"
+
+
+def header_value(scope, name: bytes) -> Optional[bytes]:
+    """First value of a request header (name in lower case) from the raw ASGI headers"""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def with_headers(send, headers: Headers):
+    """Wrap ``send`` so the response start message also carries ``headers``.
+
+    Body messages are forwarded as they are, so streamed responses pass
+    straight through without being buffered or copied.
+    """
+    async def send_with_headers(message):
+        if message["type"] == "http.response.start":
+            message["headers"] = [*message.get("headers", ()), *headers]
+        await send(message)
+    return send_with_headers
+
+
+class SecurityMiddleware:
+    """Pure ASGI middleware: rate limiting, security headers and access logging"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Rate limiting check
-        client_ip = request.client.host
-        if await self._is_rate_limited(client_ip):
-            return JSONResponse(
+        authorization = header_value(scope, b"authorization")
+        client = scope.get("client")
+        client_ip = client[0] if client else None
+        limit = await rate_limiter.check(
+            scope["path"],
+            authorization.decode("latin-1") if authorization else None,
+            client_ip
+        )
+        if not limit.allowed:
+            response = JSONResponse(
                 status_code=429,
-                content={"detail": "Too many requests"}
+                content={"detail": "Too many requests"},
+                headers={
+                    "Retry-After": str(max(1, math.ceil(limit.retry_after))),
+                    "X-RateLimit-Limit": str(limit.limit),
+                    "X-RateLimit-Remaining": "0",
+                }
             )
-
-        # Input sanitization for query params and body
-        await self._sanitize_request(request)
+            await response(scope, receive, send)
+            return
 
         # Security headers
-        response = await call_next(request)
-        self._add_security_headers(response)
+        headers = [
+            *SECURITY_HEADERS,
+            (b"x-ratelimit-limit", str(limit.limit).encode()),
+            (b"x-ratelimit-remaining", str(limit.remaining).encode()),
+        ]
+        await self.app(scope, receive, with_headers(send, headers))
 
         # GDPR logging
-        if request.method in ["POST", "PUT", "DELETE"]:
-            await security_service.log_data_access(
-                user_id=request.state.user.id if hasattr(request.state, "user") else None,
-                data_type=request.url.path,
-                action=request.method
+        if scope["method"] in AUDITED_METHODS:
+            user = scope.get("state", {}).get("user")
+            security_service.log_data_access(
+                user_id=getattr(user, "id", None),
+                data_type=scope["path"],
+                action=scope["method"],
+                ip_address=client_ip
             )
 
-        return response
-
-    async def _is_rate_limited(self, client_ip: str) -> bool:
-        """Check if the client has exceeded rate limits."""
-        from redis import Redis
-        redis = Redis.from_url(settings.REDIS_URL)
-        key = f"rate_limit:{client_ip}"
-        current = redis.get(key)
-        
-        if current is None:
-            redis.setex(key, settings.RATE_LIMIT_PERIOD, 1)
-            return False
-            
-        current = int(current)
-        if current >= settings.RATE_LIMIT_REQUESTS:
-            return True
-            
-        redis.incr(key)
-        return False
 
-    async def _sanitize_request(self, request: Request):
-        """Sanitize input data to prevent XSS and injection attacks."""
-        # Sanitize query parameters
-        cleaned_query_params = {}
-        for key, value in request.query_params.items():
-            cleaned_key = bleach.clean(key)
-            cleaned_value = bleach.clean(value)
-            cleaned_query_params[cleaned_key] = cleaned_value
-        request.scope["query_string"] = "&".join(
-            f"{k}={v}" for k, v in cleaned_query_params.items()
-        ).encode()
-
-        # Sanitize request body if it's form data
-        if request.method in ["POST", "PUT"] and request.headers.get("content-type") == "application/x-www-form-urlencoded":
-            form_data = await request.form()
-            cleaned_form = {}
-            for key, value in form_data.items():
-                cleaned_key = bleach.clean(key)
-                cleaned_value = bleach.clean(value)
-                cleaned_form[cleaned_key] = cleaned_value
-            request._form = cleaned_form
-
-    def _add_security_headers(self, response: Response):
-        """Add security headers to response."""
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data:; "
-            "font-src 'self' data:; "
-            "connect-src 'self' https://*.supabase.co https://*.openrouter.ai https://*.cerebras.ai;"
-        )
+class GDPRMiddleware:
+    """Pure ASGI middleware: requires the consent cookie and adds GDPR headers.
+
+    CORS preflights and ``GDPR_EXEMPT_PATHS`` (health checks, docs, sign-up
+    and login, the payment webhook) are let through without the cookie.
+    """
+
+    def __init__(self, app, exempt_paths: Optional[List[str]] = None):
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths if exempt_paths is not None else settings.GDPR_EXEMPT_PATHS)
+        self.headers: Headers = [
+            (b"x-data-processing-basis", b"consent"),
+            (b"x-data-retention-period", f"{settings.DATA_RETENTION_DAYS} days".encode()),
+            (b"x-privacy-contact", settings.PRIVACY_CONTACT_EMAIL.encode()),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class GDPRMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Check for GDPR consent
-        if not self._has_gdpr_consent(request):
-            return JSONResponse(
+        exempt = scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths
+        if not exempt and not self._has_gdpr_consent(scope):
+            response = JSONResponse(
                 status_code=403,
                 content={"detail": "GDPR consent required"}
             )
+            await response(scope, receive, send)
+            return
 
-        response = await call_next(request)
-
-        # Data minimization
-        if isinstance(response, JSONResponse):
-            data = response.body
-            sanitized_data = security_service.sanitize_data_for_gdpr(data)
-            response.body = sanitized_data
+        await self.app(scope, receive, with_headers(send, self.headers))
 
-        # Add GDPR-related headers
-        response.headers["X-Data-Processing-Basis"] = "consent"
-        response.headers["X-Data-Retention-Period"] = f"{settings.DATA_RETENTION_DAYS} days"
-        response.headers["X-Privacy-Contact"] = settings.PRIVACY_CONTACT_EMAIL
-
-        return response
+    def _has_gdpr_consent(self, scope) -> bool:
+        """Check the raw Cookie headers for gdpr_consent=accepted without parsing every cookie."""
+        for key, value in scope["headers"]:
+            if key == b"cookie" and CONSENT_COOKIE in value:
+                if any(part.strip() == CONSENT_COOKIE for part in value.split(b";")):
+                    return True
+        return False
 
-    def _has_gdpr_consent(self, request: Request) -> bool:
-        """Check if the user has provided GDPR consent."""
-        consent_cookie = request.cookies.get("gdpr_consent")
-        return consent_cookie == "accepted"
 
 def setup_security_middleware(app: FastAPI):
     """Set up all security-related middleware."""
+    app.add_middleware(SanitizationMiddleware)
     app.add_middleware(SecurityMiddleware)
-    app.add_middleware(GDPRMiddleware)
\ No newline at end of file
+    app.add_middleware(GDPRMiddleware)
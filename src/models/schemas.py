@@ -30,6 +30,27 @@ class StatementAnalysis(BaseModel):
     savings_matrix: Dict[str, Dict[str, float]]
     created_at: datetime = datetime.now()
 
+class TypeTotal(BaseModel):
+    count: int
+    total_amount: float
+
+class MonthlyRollup(BaseModel):
+    month: str  # YYYY-MM
+    count: int
+    debits: float
+    credits: float
+    net: float
+    closing_balance: float
+
+class TransactionSummary(BaseModel):
+    total_transactions: int
+    debits: TypeTotal
+    credits: TypeTotal
+    net: float
+    period: Dict[str, Optional[str]]
+    by_category: Dict[str, float]
+    monthly: List[MonthlyRollup]
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -1,7 +1,14 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 import os
-import requests
+import json
+import asyncio
 from src.core.config import settings
+from ai.http_client import http_pool
+from ai.openrouter_client import openrouter_client
+from ai.categorizer import transaction_categorizer
+from analytics.savings import savings_calculator
+
+DEFAULT_ADVICE = "Review your discretionary spending categories first; they usually offer the largest savings."
 
 class AIService:
     def __init__(self):
@@ -16,8 +23,8 @@ class AIService:
         
         # Get Cerebras models
         try:
-            cerebras_response = requests.get(
-                f"{self.cerebras_base_url}/models",
+            cerebras_response = await http_pool.client(self.cerebras_base_url).get(
+                "/models",
                 headers={"Authorization": f"Bearer {self.cerebras_api_key}"}
             )
             if cerebras_response.status_code == 200:
@@ -27,8 +34,8 @@ class AIService:
         
         # Get OpenRouter models
         try:
-            openrouter_response = requests.get(
-                f"{self.openrouter_base_url}/models",
+            openrouter_response = await http_pool.client(self.openrouter_base_url).get(
+                "/models",
                 headers={"Authorization": f"Bearer {self.openrouter_api_key}"}
             )
             if openrouter_response.status_code == 200:
@@ -44,65 +51,81 @@ class AIService:
         model_name: str
     ) -> Dict[str, float]:
         """Categorize transactions using AI"""
-        # Prepare the prompt
-        transaction_text = "\n".join(
-            [f"{t['date']}: {t['description']} - ${t['amount']} ({t['type']})"
-             for t in transactions]
-        )
-        
-        prompt = f"""
-        Please categorize the following bank transactions into appropriate spending categories.
-        Return only a JSON object with categories as keys and total amounts as values.
-        
-        Transactions:
-        {transaction_text}
-        """
-        
-        # Try OpenRouter first
+        # Descriptions are deduplicated and known merchants come from the cache,
+        # so only new merchants are sent to the model
+        try:
+            return await transaction_categorizer.categorize(transactions, model_name, self._complete)
+        except Exception as e:
+            raise Exception(f"AI service error: {e}")
+    
+    async def _complete(self, prompt: str, model_name: str) -> str:
+        """Get a completion's text, trying OpenRouter first and then Cerebras"""
         try:
             response = await self._call_openrouter(prompt, model_name)
-            return self._parse_categories_response(response)
         except Exception as e:
             print(f"OpenRouter error: {e}")
             # Fallback to Cerebras
             try:
                 response = await self._call_cerebras(prompt, model_name)
-                return self._parse_categories_response(response)
             except Exception as e2:
-                raise Exception(f"AI service error: {e} and {e2}")
+                raise Exception(f"{e} and {e2}")
+        return response["choices"][0]["message"]["content"]
     
     async def analyze_spending(
         self,
         transactions: List[Dict],
         categories: Dict[str, float],
-        model_name: str
+        model_name: str,
+        include_advice: bool = True
     ) -> Dict[str, Any]:
-        """Generate financial advice and savings matrix"""
-        prompt = f"""
-        Based on these transactions and categories, provide:
-        1. Financial advice for optimizing spending
-        2. A savings matrix with three strategies (conservative, moderate, aggressive)
-        
-        Transactions: {transactions}
-        Categories: {categories}
-        
-        Return a JSON object with 'advice' and 'savings_matrix' keys.
+        """Generate financial advice and savings matrix.
+
+        The savings matrix is calculated locally; the LLM only writes the
+        advice narrative, which falls back to a default if both providers fail.
         """
+        savings_matrix = await asyncio.to_thread(savings_calculator.from_transactions, transactions)
+        if not include_advice:
+            return {"advice": None, "savings_matrix": savings_matrix}
         
+        prompt = self._advice_prompt(categories, savings_matrix)
         try:
-            response = await self._call_openrouter(prompt, model_name)
-            return self._parse_analysis_response(response)
+            advice = await self._complete(prompt, model_name)
         except Exception as e:
-            try:
-                response = await self._call_cerebras(prompt, model_name)
-                return self._parse_analysis_response(response)
-            except Exception as e2:
-                raise Exception(f"AI service error: {e} and {e2}")
+            print(f"AI service error: {e}")
+            advice = DEFAULT_ADVICE
+        return {"advice": advice, "savings_matrix": savings_matrix}
+    
+    async def stream_advice(
+        self,
+        categories: Dict[str, float],
+        savings_matrix: Dict[str, Any],
+        model_name: str
+    ) -> AsyncIterator[str]:
+        """Yield the advice narrative as the model generates it.
+
+        Goes through the shared OpenRouter client, so the stream gets its
+        Cerebras fallback, rate limiting and completion cache.
+        """
+        messages = [{"role": "user", "content": self._advice_prompt(categories, savings_matrix)}]
+        async for delta in openrouter_client.stream_chat_completion(messages, model=model_name):
+            yield delta
+    
+    def _advice_prompt(self, categories: Dict[str, float], savings_matrix: Dict[str, Any]) -> str:
+        return f"""
+        Based on these spending categories and savings matrix, provide financial advice
+        for optimizing spending. Explain the three strategies (conservative, moderate,
+        aggressive); the numbers are already calculated, so do not change them.
+        
+        Categories: {json.dumps(categories)}
+        Savings matrix: {json.dumps(savings_matrix)}
+        
+        Return only the advice as plain text.
+        """
     
     async def _call_openrouter(self, prompt: str, model_name: str) -> Dict:
         """Make API call to OpenRouter"""
-        response = requests.post(
-            f"{self.openrouter_base_url}/chat/completions",
+        response = await http_pool.client(self.openrouter_base_url).post(
+            "/chat/completions",
             headers={
                 "Authorization": f"Bearer {self.openrouter_api_key}",
                 "Content-Type": "application/json"
@@ -120,8 +143,8 @@ class AIService:
     
     async def _call_cerebras(self, prompt: str, model_name: str) -> Dict:
         """Make API call to Cerebras"""
-        response = requests.post(
-            f"{self.cerebras_base_url}/chat/completions",
+        response = await http_pool.client(self.cerebras_base_url).post(
+            "/chat/completions",
             headers={
                 "Authorization": f"Bearer {self.cerebras_api_key}",
                 "Content-Type": "application/json"
@@ -136,23 +159,3 @@ class AIService:
             raise Exception(f"Cerebras API error: {response.text}")
         
         return response.json()
-    
-    def _parse_categories_response(self, response: Dict) -> Dict[str, float]:
-        """Parse AI response for transaction categories"""
-        try:
-            content = response["choices"][0]["message"]["content"]
-            # In practice, you'd need more robust parsing here
-            # This is a simplified version
-            return eval(content)
-        except Exception as e:
-            raise Exception(f"Error parsing categories response: {e}")
-    
-    def _parse_analysis_response(self, response: Dict) -> Dict[str, Any]:
-        """Parse AI response for spending analysis"""
-        try:
-            content = response["choices"][0]["message"]["content"]
-            # In practice, you'd need more robust parsing here
-            # This is a simplified version
-            return eval(content)
-        except Exception as e:
-            raise Exception(f"Error parsing analysis response: {e}")
\ No newline at end of file
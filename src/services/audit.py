@@ -0,0 +1,157 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+from src.core.config import settings
+from src.services.supabase import SupabasePool, supabase_pool
+
+RETENTION_TASK = "purge_expired_data"
+
+
+class AccessLogWriter:
+    """Buffers GDPR access-log records and writes them in bulk inserts.
+
+    ``log`` only appends to an in-memory queue, so auditing a request
+    costs microseconds instead of a database round trip. A background task
+    flushes the queue as one insert whenever ``batch_size`` records are
+    waiting or ``flush_interval`` seconds have passed. Failed batches go
+    back to the front of the queue and are retried; past ``max_queue``
+    records the oldest are dropped (and counted) rather than growing
+    without bound. Expired logs and statements are purged by
+    ``run_retention`` in small batches on a schedule; every worker runs the
+    schedule but only the one that claims the interval's run purges.
+    """
+
+    def __init__(
+        self,
+        db: Optional[SupabasePool] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.db = db or supabase_pool
+        self.batch_size = batch_size or settings.AUDIT_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.AUDIT_LOG_FLUSH_INTERVAL
+        self.max_queue = max_queue or settings.AUDIT_LOG_MAX_QUEUE
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._metrics = {"logged": 0, "written": 0, "dropped": 0, "failed_flushes": 0}
+
+    def log(
+        self,
+        user_id: Optional[str],
+        data_type: str,
+        action: str,
+        ip_address: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        """Queue an access-log record; never blocks or touches the database"""
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self._metrics["dropped"] += 1
+        self._queue.append({
+            "user_id": user_id,
+            "data_type": data_type,
+            "action": action,
+            "ip_address": ip_address,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "details": details,
+        })
+        self._metrics["logged"] += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._queue:
+            if not await self.flush():
+                break
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                if not await self.flush():
+                    # Back off until the next interval rather than hammering the database
+                    break
+                if len(self._queue) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        """Write one batch; on failure the records are put back for the next try"""
+        batch: List[Dict[str, Any]] = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        if not batch:
+            return True
+        try:
+            await self.db.table("access_logs").insert(batch).execute()
+        except Exception as e:
+            print(f"Error writing {len(batch)} access logs: {e}")
+            self._metrics["failed_flushes"] += 1
+            room = max(self.max_queue - len(self._queue), 0)
+            kept = batch[-room:] if room else []
+            self._metrics["dropped"] += len(batch) - len(kept)
+            self._queue.extendleft(reversed(kept))
+            return False
+        self._metrics["written"] += len(batch)
+        return True
+
+    async def purge_expired(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Delete expired access logs and completed statements, one small batch at a time"""
+        batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+        deleted = {"access_logs": 0, "statements": 0}
+        while True:
+            response = await self.db.rpc("purge_expired_data", {
+                "p_retention_days": settings.DATA_RETENTION_DAYS,
+                "p_batch_size": batch_size
+            }).execute()
+            row = response.data[0]
+            deleted["access_logs"] += row["access_logs_deleted"]
+            deleted["statements"] += row["statements_deleted"]
+            if row["access_logs_deleted"] < batch_size and row["statements_deleted"] < batch_size:
+                return deleted
+
+    async def claim_retention_run(self, interval: float) -> bool:
+        """Claim this interval's purge; False if another worker already ran it"""
+        response = await self.db.rpc("claim_maintenance_run", {
+            "p_task": RETENTION_TASK,
+            "p_interval_seconds": int(interval)
+        }).execute()
+        return bool(response.data)
+
+    async def run_retention(self, interval: Optional[float] = None):
+        """Purge expired data once per interval across all workers, until cancelled"""
+        interval = interval or settings.RETENTION_INTERVAL
+        while True:
+            try:
+                if await self.claim_retention_run(interval):
+                    deleted = await self.purge_expired()
+                    if any(deleted.values()):
+                        print(f"Deleted expired data: {deleted}")
+            except Exception as e:
+                print(f"Data retention error: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and logged/written/dropped counters"""
+        return {**self._metrics, "queue_depth": len(self._queue)}
+
+
+# Initialize writer shared by the security service
+access_log_writer = AccessLogWriter()
@@ -2,25 +2,24 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from src.core.config import settings
 from src.models.schemas import TokenData, User
-from src.services.user import UserService
+from src.services.user import UserService, get_user_service
+from src.services.passwords import password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 class AuthService:
-    def __init__(self):
-        self.user_service = UserService()
+    def __init__(self, user_service: Optional[UserService] = None):
+        self.user_service = user_service or get_user_service()
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
     
-    def get_password_hash(self, password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await password_hasher.hash(password)
     
     def create_access_token(self, data: dict) -> str:
         to_encode = data.copy()
@@ -37,11 +36,11 @@ class AuthService:
         user = await self.user_service.get_user_by_email(email)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
     
-    async def get_current_user(self, token: str = Depends(oauth2_scheme)) -> User:
+    async def get_current_user(self, request: Request, token: str = Depends(oauth2_scheme)) -> User:
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -61,7 +60,13 @@ class AuthService:
         except JWTError:
             raise credentials_exception
         
-        user = await self.user_service.get_user_by_email(token_data.email)
+        user = await self.user_service.get_authenticated_user(token_data.email)
         if user is None:
             raise credentials_exception
-        return user
\ No newline at end of file
+        # SecurityMiddleware's access log reads the user from the request state
+        request.state.user = user
+        return user
+
+
+# Initialize service shared by all routers
+auth_service = AuthService()
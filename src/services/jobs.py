@@ -0,0 +1,384 @@
+import json
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from src.core.config import settings
+from src.services.supabase import supabase_pool
+
+# Mirrors the valid_status constraint on bank_statements
+PENDING = "pending"
+PROCESSING = "processing"
+COMPLETED = "completed"
+ERROR = "error"
+TERMINAL_STATUSES = (COMPLETED, ERROR)
+
+QUEUE_KEY = "jobs:statements"
+PROCESSING_KEY = "jobs:statements:processing"
+RECOVERY_LOCK_KEY = "jobs:statements:recovering"
+
+STATEMENT_COLUMNS = "id, user_id, status, error_message, upload_date, processed_date, storage_path, file_id, content_hash"
+
+# Move a job from the processing list back to the queue, unless a worker holds its lease
+REQUEUE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return 0
+end
+if redis.call('LREM', KEYS[2], 1, ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+def lease_key(job_id: str) -> str:
+    return f"job:{job_id}:lease"
+
+
+class StatementJobQueue:
+    """Queue of uploaded statements processed by a pool of background workers.
+
+    Uploads return a job id straight away; workers drain the queue, run the
+    handler and record progress both in the job store and in the
+    ``bank_statements.status`` column. The handler's return value is kept
+    with the job and returned on every poll, so it should be a small
+    summary, not the full result.
+
+    Delivery is at-least-once. With the ``redis`` backend a worker moves
+    the job id to a processing list (BLMOVE) and holds a lease on it while
+    the handler runs; the id leaves that list only once the job has
+    finished. Jobs whose lease expired (their worker or replica died) are
+    moved back to the queue by every replica's reaper. On startup,
+    ``pending`` and ``processing`` statements that no worker will pick up
+    are queued again from ``bank_statements``, so a restart never strands
+    an upload whose credit was already charged. The redis queue and job
+    records are shared by every replica (``UPLOAD_DIR`` must then be shared
+    storage too); the ``memory`` backend is per process and meant for a
+    single API process.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        lease_ttl: Optional[int] = None
+    ):
+        self.handler = handler
+        self.workers = workers or settings.JOB_WORKERS
+        self.backend = backend or settings.JOB_QUEUE_BACKEND
+        self.lease_ttl = lease_ttl or settings.JOB_LEASE_TTL
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._redis = None
+        self._requeue = None
+
+    def _get_redis(self):
+        if self._redis is None:
+            from redis.asyncio import Redis
+            self._redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self._requeue = self._redis.register_script(REQUEUE_SCRIPT)
+        return self._redis
+
+    @property
+    def uses_redis(self) -> bool:
+        return self.backend == "redis" and bool(settings.REDIS_URL)
+
+    async def start(self):
+        """Queue statements left unfinished by a previous run, then start the workers"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        try:
+            recovered = await self.recover()
+            if recovered:
+                print(f"Requeued {recovered} unfinished statements")
+        except Exception as e:
+            print(f"Error recovering statement jobs: {e}")
+        for n in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(n)))
+        if self.uses_redis:
+            self._tasks.append(asyncio.create_task(self._reap()))
+
+    async def stop(self):
+        """Stop the workers; jobs they were running go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._requeue = None
+
+    async def enqueue(
+        self,
+        user_id: str,
+        file_id: str,
+        file_path: str,
+        original_filename: str,
+        file_size: int,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Record a pending statement and queue it for processing.
+
+        Raises if the statement can't be recorded or queued, so the caller
+        can fail the upload and refund its credit.
+        """
+        job_id = await self._create_statement_record(
+            user_id, original_filename, file_path, file_size, file_id, content_hash
+        )
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "file_id": file_id,
+            "file_path": file_path,
+            "content_hash": content_hash,
+            "status": PENDING,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        try:
+            await self._save(job)
+            await self._push(job_id)
+        except Exception:
+            # The upload is refunded; don't leave a pending row for recovery to run
+            await self._update_statement(job_id, {"status": ERROR, "error_message": "Could not queue statement"})
+            raise
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job, falling back to the bank_statements row if another process owns it"""
+        if self.uses_redis:
+            raw = await self._get_redis().get(f"job:{job_id}")
+            if raw:
+                return json.loads(raw)
+        elif job_id in self._jobs:
+            return dict(self._jobs[job_id])
+
+        try:
+            response = await (
+                supabase_pool.table("bank_statements")
+                .select(STATEMENT_COLUMNS)
+                .eq("id", job_id)
+                .execute()
+            )
+        except Exception as e:
+            print(f"Error fetching statement status: {e}")
+            return None
+        if not response.data:
+            return None
+        return self._job_from_row(response.data[0])
+
+    async def recover(self) -> int:
+        """Queue ``pending``/``processing`` statements that no worker will pick up; returns how many"""
+        known: Set[str] = set()
+        query = (
+            supabase_pool.table("bank_statements")
+            .select(STATEMENT_COLUMNS)
+            .in_("status", [PENDING, PROCESSING])
+        )
+        if self.uses_redis:
+            redis = self._get_redis()
+            # One replica recovers; the others would queue the same rows again
+            if not await redis.set(RECOVERY_LOCK_KEY, "1", nx=True, ex=self.lease_ttl):
+                return 0
+            known.update(await redis.lrange(QUEUE_KEY, 0, -1))
+            known.update(await redis.lrange(PROCESSING_KEY, 0, -1))
+            # Rows this new are still being queued by their upload request
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.lease_ttl)
+            query = query.lt("upload_date", cutoff.isoformat())
+        else:
+            known.update(self._jobs)
+
+        response = await query.execute()
+        recovered = 0
+        for row in response.data:
+            if row["id"] in known:
+                continue
+            if not row.get("file_id"):
+                print(f"Statement {row['id']} predates job recovery and can't be requeued")
+                continue
+            job = self._job_from_row(row)
+            job["status"] = PENDING
+            await self._save(job)
+            await self._push(job["job_id"])
+            recovered += 1
+        return recovered
+
+    async def requeue_expired(self, suspects: Set[str]) -> Set[str]:
+        """Move jobs without a lease back to the queue; returns the ids to check next time.
+
+        An id is only requeued if it had no lease on the previous sweep as
+        well, since a worker takes the lease just after moving the id.
+        """
+        redis = self._get_redis()
+        unleased = set()
+        for job_id in await redis.lrange(PROCESSING_KEY, 0, -1):
+            if await redis.exists(lease_key(job_id)):
+                continue
+            if job_id not in suspects:
+                unleased.add(job_id)
+            elif await self._requeue(keys=[QUEUE_KEY, PROCESSING_KEY, lease_key(job_id)], args=[job_id]):
+                print(f"Requeued statement {job_id}: its worker stopped")
+        return unleased
+
+    def _job_from_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "job_id": row["id"],
+            "user_id": row["user_id"],
+            "file_id": row.get("file_id"),
+            "file_path": row.get("storage_path"),
+            "content_hash": row.get("content_hash"),
+            "status": row["status"],
+            "error": row["error_message"],
+            "result": None,
+            "created_at": row["upload_date"],
+            "updated_at": row["processed_date"] or row["upload_date"],
+        }
+
+    async def _save(self, job: Dict[str, Any]):
+        if self.uses_redis:
+            await self._get_redis().set(f"job:{job['job_id']}", json.dumps(job), ex=settings.JOB_RESULT_TTL)
+        else:
+            self._jobs[job["job_id"]] = job
+
+    async def _push(self, job_id: str):
+        if self.uses_redis:
+            await self._get_redis().lpush(QUEUE_KEY, job_id)
+        else:
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._queue.put_nowait(job_id)
+
+    async def _update_statement(self, job_id: str, update: Dict[str, Any]):
+        try:
+            await supabase_pool.table("bank_statements").update(update).eq("id", job_id).execute()
+        except Exception as e:
+            print(f"Error updating statement status: {e}")
+
+    async def _set_status(self, job: Dict[str, Any], status: str, error: Optional[str] = None):
+        job["status"] = status
+        job["error"] = error
+        job["updated_at"] = datetime.now().isoformat()
+        await self._save(job)
+
+        update = {"status": status, "error_message": error}
+        if status in TERMINAL_STATUSES:
+            update["processed_date"] = job["updated_at"]
+        await self._update_statement(job["job_id"], update)
+
+    async def _create_statement_record(
+        self,
+        user_id: str,
+        original_filename: str,
+        storage_path: str,
+        file_size: int,
+        file_id: str,
+        content_hash: Optional[str]
+    ) -> str:
+        """Insert the pending bank_statements row; its id doubles as the job id"""
+        response = await supabase_pool.table("bank_statements").insert({
+            "user_id": user_id,
+            "original_filename": original_filename,
+            "storage_path": storage_path,
+            "file_size": file_size,
+            "file_id": file_id,
+            "content_hash": content_hash,
+            "status": PENDING,
+        }).execute()
+        return response.data[0]["id"]
+
+    async def _next_job_id(self) -> Optional[str]:
+        if self.uses_redis:
+            return await self._get_redis().blmove(QUEUE_KEY, PROCESSING_KEY, 1, "RIGHT", "LEFT")
+        return await self._queue.get()
+
+    async def _claim(self, job_id: str) -> bool:
+        """Take the job's lease; False if another worker already holds it"""
+        if not self.uses_redis:
+            return True
+        return bool(await self._get_redis().set(lease_key(job_id), "1", nx=True, ex=self.lease_ttl))
+
+    async def _hold_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self._get_redis().expire(lease_key(job_id), self.lease_ttl)
+            except Exception as e:
+                print(f"Error renewing lease on statement {job_id}: {e}")
+
+    async def _ack(self, job_id: str, release_lease: bool = True):
+        """Remove a finished (or duplicate) job from the processing list"""
+        if self.uses_redis:
+            redis = self._get_redis()
+            await redis.lrem(PROCESSING_KEY, 1, job_id)
+            if release_lease:
+                await redis.delete(lease_key(job_id))
+
+    async def _release(self, job: Dict[str, Any]):
+        """Hand an interrupted job back to the queue so another worker runs it"""
+        try:
+            await self._set_status(job, PENDING)
+            if self.uses_redis:
+                await self._get_redis().delete(lease_key(job["job_id"]))
+                await self._requeue(keys=[QUEUE_KEY, PROCESSING_KEY, lease_key(job["job_id"])], args=[job["job_id"]])
+            else:
+                self._queue.put_nowait(job["job_id"])
+        except Exception as e:
+            # With redis the expired lease gets the job requeued anyway
+            print(f"Error requeueing statement {job['job_id']}: {e}")
+
+    async def _process(self, job_id: str):
+        job = await self.get(job_id)
+        if job is None or not job.get("file_path") or job["status"] in TERMINAL_STATUSES:
+            await self._ack(job_id)
+            return
+        if not await self._claim(job_id):
+            # Delivered twice; the worker holding the lease is running it
+            await self._ack(job_id, release_lease=False)
+            return
+
+        heartbeat = asyncio.create_task(self._hold_lease(job_id)) if self.uses_redis else None
+        try:
+            await self._set_status(job, PROCESSING)
+            try:
+                result = await self.handler(job)
+            except Exception as e:
+                print(f"Error processing statement {job_id}: {e}")
+                await self._set_status(job, ERROR, str(e))
+            else:
+                job["result"] = result
+                await self._set_status(job, COMPLETED)
+        except BaseException:
+            # Shutting down, or the job store failed: the job isn't finished
+            await self._release(job)
+            raise
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+        await self._ack(job_id)
+
+    async def _worker(self, n: int):
+        while True:
+            try:
+                job_id = await self._next_job_id()
+                if job_id is not None:
+                    await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job worker {n} error: {e}")
+                await asyncio.sleep(1)
+
+    async def _reap(self):
+        suspects: Set[str] = set()
+        while True:
+            await asyncio.sleep(self.lease_ttl)
+            try:
+                suspects = await self.requeue_expired(suspects)
+            except Exception as e:
+                print(f"Error requeueing expired statement jobs: {e}")
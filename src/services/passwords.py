@@ -0,0 +1,130 @@
+import time
+import asyncio
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+from passlib.context import CryptContext
+from src.core.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already waiting"""
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__("Too many concurrent sign-ins, try again shortly")
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram, Prometheus style"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "buckets_ms": buckets,
+        }
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop in a small, bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so a few threads verify
+    passwords in parallel while the loop keeps serving other requests. At
+    most ``max_workers`` calls run and ``max_queue`` more wait; anything
+    beyond that fails fast with PasswordHasherBusy (a 429) instead of
+    piling up behind a login storm. Queue wait and hashing time are
+    recorded in histograms per operation.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or settings.PASSWORD_HASH_WORKERS
+        self.max_queue = max_queue if max_queue is not None else settings.PASSWORD_HASH_QUEUE
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+        self._wait = LatencyHistogram()
+        self._latency = {"hash": LatencyHistogram(), "verify": LatencyHistogram()}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so each uvicorn worker owns its own pool
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._executor
+
+    async def _run(self, operation: str, fn: Callable, *args) -> Any:
+        executor = self._get_executor()
+        if self._queued >= self.max_queue and self._slots.locked():
+            self._rejected += 1
+            raise PasswordHasherBusy()
+
+        started = time.perf_counter()
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        self._wait.observe((time.perf_counter() - started) * 1000)
+
+        self._running += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self._latency[operation].observe((time.perf_counter() - started) * 1000)
+            self._running -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool size, queue depth, rejections and latency histograms"""
+        return {
+            "pool_size": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queued,
+            "running": self._running,
+            "rejected": self._rejected,
+            "queue_wait": self._wait.snapshot(),
+            "hash": self._latency["hash"].snapshot(),
+            "verify": self._latency["verify"].snapshot(),
+        }
+
+    def shutdown(self):
+        """Stop the hashing threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+
+# Initialize hasher shared by the auth and security services
+password_hasher = PasswordHasher()
@@ -0,0 +1,171 @@
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from jose import JWTError, jwt
+from src.core.config import settings
+
+# GCRA in one round trip: the key holds the request's theoretical arrival
+# time (TAT) in ms. A request is allowed while the TAT stays within one
+# period of now, which gives a smooth sliding window of `limit` requests
+# per `period` with no fixed-window edge bursts. Uses the Redis clock so
+# every worker agrees on time.
+GCRA_SCRIPT = """
+local period = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = period / limit
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, math.ceil(allow_at - now), 0}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, 0, math.floor((period - (new_tat - now)) / interval)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds
+
+
+class LocalGCRA:
+    """In-process GCRA with the same semantics as the Redis script"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+
+    def check(self, key: str, limit: int, period: float) -> Tuple[bool, int, float]:
+        now = time.monotonic()
+        interval = period / limit
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + interval
+        allow_at = new_tat - period
+        if now < allow_at:
+            return False, 0, allow_at - now
+        if len(self._tats) >= self.max_keys and key not in self._tats:
+            self._prune(now)
+        self._tats[key] = new_tat
+        return True, int((period - (new_tat - now)) / interval), 0.0
+
+    def _prune(self, now: float):
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        if len(self._tats) >= self.max_keys:
+            self._tats.clear()
+
+
+class RateLimiter:
+    """Per-route, per-client request limits checked in a single Redis round trip.
+
+    Each request maps to a limit class by the longest matching path prefix
+    in ``RATE_LIMIT_ROUTES`` and is counted against its user (the token
+    subject) when authenticated, or its IP otherwise. Checks run the GCRA
+    script over one shared async connection pool; while Redis is
+    unreachable they fall back to in-process counters and Redis is retried
+    after ``RATE_LIMIT_REDIS_RETRY`` seconds.
+    """
+
+    def __init__(
+        self,
+        classes: Optional[Dict[str, Dict[str, int]]] = None,
+        routes: Optional[Dict[str, str]] = None,
+        redis_url: Optional[str] = None
+    ):
+        self.classes = {
+            "default": {"requests": settings.RATE_LIMIT_REQUESTS, "period": settings.RATE_LIMIT_PERIOD},
+            **(classes if classes is not None else settings.RATE_LIMIT_CLASSES),
+        }
+        routes = routes if routes is not None else settings.RATE_LIMIT_ROUTES
+        # Longest prefix first so the most specific route wins
+        self.routes: List[Tuple[str, str]] = sorted(routes.items(), key=lambda r: len(r[0]), reverse=True)
+        self.redis_url = redis_url if redis_url is not None else settings.REDIS_URL
+        self.local = LocalGCRA()
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+        self._metrics = {"allowed": 0, "limited": 0, "redis_errors": 0, "local_checks": 0}
+
+    def _get_script(self):
+        if self._script is None and self.redis_url:
+            try:
+                from redis.asyncio import Redis
+            except ImportError:
+                self.redis_url = None
+                return None
+            self._redis = Redis.from_url(
+                self.redis_url,
+                max_connections=settings.RATE_LIMIT_REDIS_MAX_CONNECTIONS,
+                socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+                socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+            )
+            self._script = self._redis.register_script(GCRA_SCRIPT)
+        return self._script
+
+    def limit_class(self, path: str) -> str:
+        for prefix, name in self.routes:
+            if path.startswith(prefix):
+                return name
+        return "default"
+
+    def client_key(self, authorization: Optional[str], client_ip: Optional[str]) -> str:
+        """The token subject for authenticated requests, the client IP otherwise"""
+        if authorization and authorization[:7].lower() == "bearer ":
+            try:
+                payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                if payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            except JWTError:
+                pass
+        return f"ip:{client_ip or 'unknown'}"
+
+    async def check(self, path: str, authorization: Optional[str], client_ip: Optional[str]) -> RateLimitResult:
+        """Count a request and report whether it is within its class's limit"""
+        name = self.limit_class(path)
+        limit = self.classes.get(name, self.classes["default"])
+        requests, period = int(limit["requests"]), float(limit["period"])
+        key = f"rate_limit:{name}:{self.client_key(authorization, client_ip)}"
+
+        allowed, remaining, retry_after = await self._check(key, requests, period)
+        self._metrics["allowed" if allowed else "limited"] += 1
+        return RateLimitResult(allowed, requests, remaining, retry_after)
+
+    async def _check(self, key: str, requests: int, period: float) -> Tuple[bool, int, float]:
+        script = self._get_script() if time.monotonic() >= self._redis_down_until else None
+        if script is not None:
+            try:
+                allowed, retry_ms, remaining = await script(keys=[key], args=[int(period * 1000), requests])
+                return bool(allowed), int(remaining), int(retry_ms) / 1000
+            except Exception as e:
+                print(f"Rate limiter Redis error, using local limits: {e}")
+                self._metrics["redis_errors"] += 1
+                self._redis_down_until = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY
+
+        self._metrics["local_checks"] += 1
+        return self.local.check(key, requests, period)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get allowed/limited counters and whether Redis is in use"""
+        return {
+            **self._metrics,
+            "classes": self.classes,
+            "shared": bool(self.redis_url) and time.monotonic() >= self._redis_down_until,
+        }
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._script = None
+
+
+# Initialize limiter shared by the security middleware
+rate_limiter = RateLimiter()
@@ -1,15 +1,13 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from passlib.context import CryptContext
 from jose import JWTError, jwt
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from src.core.config import settings
 from src.models.schemas import User
-from src.services.supabase import supabase
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.services.supabase import supabase_pool
+from src.services.passwords import PasswordHasherBusy, password_hasher
+from src.services.audit import access_log_writer
 
 # OAuth2 setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -20,23 +18,29 @@ class SecurityService:
         self.algorithm = settings.ALGORITHM
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return await password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         """Generate password hash."""
-        return pwd_context.hash(password)
+        return await password_hasher.hash(password)
 
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate a user and return user object if valid."""
         try:
-            user = await supabase.table("users").select("*").eq("email", email).single().execute()
+            user = await supabase_pool.table("users").select("*").eq("email", email).single().execute()
             if not user.data:
                 return None
-            if not self.verify_password(password, user.data["encrypted_password"]):
+            if not await self.verify_password(password, user.data["encrypted_password"]):
                 return None
             return User(**user.data)
+        except PasswordHasherBusy as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,7 +72,7 @@ class SecurityService:
         except JWTError:
             raise credentials_exception
 
-        user = await supabase.table("users").select("*").eq("email", email).single().execute()
+        user = await supabase_pool.table("users").select("*").eq("email", email).single().execute()
         if not user.data:
             raise credentials_exception
         return User(**user.data)
@@ -95,12 +99,6 @@ class SecurityService:
                 data[field] = "***REDACTED***"
         return data
 
-    def log_data_access(self, user_id: str, data_type: str, action: str):
-        """Log data access for GDPR compliance."""
-        supabase.table("access_logs").insert({
-            "user_id": user_id,
-            "data_type": data_type,
-            "action": action,
-            "timestamp": datetime.utcnow().isoformat(),
-            "ip_address": request.client.host
-        }).execute()
\ No newline at end of file
+    def log_data_access(self, user_id: str, data_type: str, action: str, ip_address: Optional[str] = None):
+        """Log data access for GDPR compliance (queued and written in batches)."""
+        access_log_writer.log(user_id, data_type, action, ip_address)
@@ -1,11 +1,17 @@
 import os
-import pdfplumber
-import pandas as pd
-from typing import Dict, List, Optional
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import UploadFile
 from datetime import datetime
 from src.core.config import settings
 from src.services.ai import AIService
+from extraction.store import statement_store
+from extraction.parser import PARSER_VERSION
+from extraction.engine import extraction_engine
+from storage.uploads import SavedUpload, save_upload_stream
+from storage.content_store import upload_store, export_name
+from exports.writers import export_transactions, EXPORT_VERSION
+from analytics.table import summarize_transactions
 
 class StatementService:
     def __init__(self):
@@ -16,15 +22,19 @@ class StatementService:
     async def process_statement(self, file: UploadFile, user_id: str) -> Dict:
         """Process uploaded bank statement"""
         # Save file
-        file_id = f"{user_id}_{datetime.now().timestamp()}"
-        file_path = os.path.join(self.upload_dir, f"{file_id}.pdf")
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        file_id, saved = await self.save_upload(file, user_id)
+        return await self.analyze_statement(file_id, saved.path, saved.sha256)
+    
+    async def analyze_statement(self, file_id: str, file_path: str, content_hash: Optional[str] = None) -> Dict:
+        """Extract, analyze and export a saved statement (run by background jobs)"""
+        # Identical bytes were analyzed before: reuse the existing results and exports
+        if content_hash:
+            stored = await asyncio.to_thread(upload_store.get_result, content_hash, PARSER_VERSION)
+            if stored is not None:
+                return {"file_id": file_id, **stored}
         
         # Extract transactions
-        transactions = await self.extract_transactions(file_path)
+        transactions = await self.extract_transactions(file_path, content_hash)
         
         # Analyze with AI
         categories = await self.ai_service.categorize_transactions(
@@ -38,48 +48,79 @@ class StatementService:
             "llama-4-scout-17b-16e-instruct"  # Default model
         )
         
-        # Convert to Excel
-        await self.convert_to_excel(transactions, file_id)
-        
-        return {
-            "file_id": file_id,
+        result = {
             "transactions": transactions,
             "categories": categories,
             "analysis": analysis
         }
-    
-    async def extract_transactions(self, file_path: str) -> List[Dict]:
-        """Extract transaction data from PDF"""
-        transactions = []
         
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                # Here you would implement the actual PDF parsing logic
-                # This is a placeholder that returns sample data
-                transactions.extend([
-                    {
-                        "date": "2025-01-15",
-                        "description": "Grocery Store",
-                        "amount": 85.50,
-                        "type": "debit"
-                    },
-                    {
-                        "date": "2025-01-16",
-                        "description": "Salary Deposit",
-                        "amount": 3500.00,
-                        "type": "credit"
-                    }
-                ])
+        # Convert to Excel
+        if content_hash:
+            await asyncio.to_thread(upload_store.put_result, content_hash, result, PARSER_VERSION)
+            await self.export_artifact(content_hash, transactions, "xlsx")
+        else:
+            await self.convert_to_excel(transactions, file_id)
         
-        return transactions
+        return {"file_id": file_id, **result}
+    
+    def new_file_id(self, user_id: str) -> str:
+        """Id for a new upload, prefixed with the uploader's id"""
+        return f"{user_id}_{datetime.now().timestamp()}"
+    
+    async def save_upload(
+        self,
+        file: UploadFile,
+        user_id: str,
+        file_id: Optional[str] = None
+    ) -> Tuple[str, SavedUpload]:
+        """Stream an uploaded PDF to disk and return its file id and the saved upload.
+
+        The PDF is kept once per content hash in the upload store, so a
+        re-upload of the same bytes points at the existing copy. Raises
+        UploadTooLarge once the upload passes MAX_UPLOAD_SIZE.
+        """
+        file_id = file_id or self.new_file_id(user_id)
+        saved = await save_upload_stream(
+            file,
+            self.upload_dir,
+            filename=f"{file_id}.pdf",
+            max_size=settings.MAX_UPLOAD_SIZE
+        )
+        saved.path, _ = await asyncio.to_thread(
+            upload_store.adopt, saved.sha256, saved.path, user_id, file_id
+        )
+        return file_id, saved
+    
+    async def extract_transactions(self, file_path: str, content_hash: Optional[str] = None) -> List[Dict]:
+        """Extract transaction data from PDF, reusing a previous parse of the same file"""
+        return await statement_store.get_or_extract(file_path, self._extract_from_pdf, content_hash)
+    
+    async def _extract_from_pdf(self, file_path: str) -> List[Dict]:
+        """Parse the PDF's pages in the extraction process pool"""
+        return await extraction_engine.extract(file_path)
+    
+    async def stream_transactions(self, file_path: str, content_hash: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Yield transactions as each page of the PDF is parsed"""
+        async for transaction in statement_store.stream_or_extract(file_path, self._stream_from_pdf, content_hash):
+            yield transaction
+    
+    def _stream_from_pdf(self, file_path: str) -> AsyncIterator[Dict]:
+        """Stream page results from the extraction process pool"""
+        return extraction_engine.stream(file_path)
     
     async def convert_to_excel(self, transactions: List[Dict], file_id: str) -> str:
         """Convert transactions to Excel format"""
-        df = pd.DataFrame(transactions)
-        excel_path = os.path.join(self.upload_dir, f"{file_id}.xlsx")
-        df.to_excel(excel_path, index=False)
-        return excel_path
+        return await self.export(transactions, file_id, "xlsx")
+    
+    async def export(self, transactions: List[Dict], file_id: str, fmt: str) -> str:
+        """Stream transactions into an xlsx, csv or parquet file and return its path"""
+        export_path = os.path.join(self.upload_dir, f"{file_id}.{fmt}")
+        return await asyncio.to_thread(export_transactions, transactions, export_path, fmt)
+    
+    async def export_artifact(self, content_hash: str, transactions: List[Dict], fmt: str) -> str:
+        """Export transactions into the upload store, shared by every upload of the statement"""
+        export_path = upload_store.artifact_path(content_hash, export_name(fmt, EXPORT_VERSION, PARSER_VERSION))
+        return await asyncio.to_thread(export_transactions, transactions, export_path, fmt)
     
     async def get_analysis(self, file_id: str, user_id: str) -> Optional[Dict]:
         """Retrieve analysis results for a specific statement"""
@@ -111,9 +152,44 @@ class StatementService:
             }
         }
     
-    async def get_excel_file(self, file_id: str, user_id: str) -> Optional[str]:
-        """Retrieve Excel file for a specific statement"""
-        excel_path = os.path.join(self.upload_dir, f"{file_id}.xlsx")
-        if os.path.exists(excel_path):
-            return excel_path
-        return None
\ No newline at end of file
+    async def get_summary(self, file_id: str, user_id: str) -> Optional[Dict]:
+        """Totals, per-category spend and monthly rollups for a processed statement"""
+        if not file_id.startswith(f"{user_id}_"):
+            return None
+        content_hash = upload_store.digest_for(file_id)
+        transactions = await asyncio.to_thread(self._stored_transactions, content_hash) if content_hash else None
+        if transactions is None:
+            return None
+        return await asyncio.to_thread(summarize_transactions, transactions)
+    
+    def _stored_transactions(self, content_hash: str) -> Optional[List[Dict]]:
+        """Transactions of a statement from its stored analysis, else its parsed cache"""
+        stored = upload_store.get_result(content_hash, PARSER_VERSION)
+        return stored["transactions"] if stored else statement_store.get(content_hash)
+    
+    async def get_export(self, file_id: str, user_id: str, fmt: str = "xlsx") -> Optional[Tuple[str, Optional[str]]]:
+        """Get the path and ETag of a statement export, generating it only if it isn't cached.
+
+        The ETag is derived from the statement's content hash, so it is the
+        same for every upload of the same bytes and changes only with them
+        (or with the export format or parser version).
+        """
+        # File ids are prefixed with the uploader's id
+        if not file_id.startswith(f"{user_id}_"):
+            return None
+        
+        content_hash = upload_store.digest_for(file_id)
+        if content_hash is None:
+            # Uploads saved before the upload store existed
+            export_path = os.path.join(self.upload_dir, f"{file_id}.{fmt}")
+            return (export_path, None) if os.path.exists(export_path) else None
+        
+        export_path = upload_store.artifact_path(content_hash, export_name(fmt, EXPORT_VERSION, PARSER_VERSION))
+        if not os.path.exists(export_path):
+            transactions = await asyncio.to_thread(self._stored_transactions, content_hash)
+            if transactions is None:
+                # Not processed yet
+                return None
+            await self.export_artifact(content_hash, transactions, fmt)
+        
+        return export_path, f'"{content_hash}.{fmt}.p{PARSER_VERSION}.v{EXPORT_VERSION}"'
\ No newline at end of file
@@ -1,5 +1,129 @@
-from supabase import create_client, Client
+import time
+from typing import Any, Dict, Optional
+import httpx
+from gotrue import AsyncGoTrueClient
+from gotrue.http_clients import AsyncClient as AuthHTTPClient
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from postgrest.utils import AsyncClient as PostgrestHTTPClient
 from src.core.config import settings
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
\ No newline at end of file
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client whose HTTP session has bounded connection limits"""
+
+    def __init__(self, base_url: str, limits: httpx.Limits, **kwargs):
+        self.limits = limits
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify: bool = True) -> PostgrestHTTPClient:
+        # Newer postgrest releases pass verify; older ones call this without it
+        return PostgrestHTTPClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            limits=self.limits,
+        )
+
+
+class SupabasePool:
+    """One set of async Supabase clients shared by the whole app.
+
+    Database calls go through a single PostgREST client and auth calls
+    (sign up) through a separate GoTrue client, each over its own
+    keep-alive connection pool. Keeping them apart means signing a user up
+    never swaps the service key on the database client for the user's
+    token. The pool is opened and closed by the app lifespan.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.url = (url or settings.SUPABASE_URL).rstrip("/")
+        self.key = key or settings.SUPABASE_KEY
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        )
+        self.timeout = timeout or settings.SUPABASE_TIMEOUT
+        self._db: Optional[PooledPostgrestClient] = None
+        self._auth: Optional[AsyncGoTrueClient] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"apiKey": self.key, "Authorization": f"Bearer {self.key}"}
+
+    @property
+    def db(self) -> PooledPostgrestClient:
+        """Shared PostgREST client, created on first use"""
+        if self._db is None or self._db.session.is_closed:
+            self._db = PooledPostgrestClient(
+                f"{self.url}/rest/v1",
+                limits=self.limits,
+                headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **self.headers},
+                timeout=self.timeout,
+            )
+        return self._db
+
+    @property
+    def auth(self) -> AsyncGoTrueClient:
+        """Shared GoTrue client; sessions are not stored or refreshed"""
+        if self._auth is None:
+            self._auth = AsyncGoTrueClient(
+                url=f"{self.url}/auth/v1",
+                headers=self.headers,
+                auto_refresh_token=False,
+                persist_session=False,
+                http_client=AuthHTTPClient(limits=self.limits, timeout=self.timeout),
+            )
+        return self._auth
+
+    def table(self, name: str):
+        return self.db.from_(name)
+
+    def rpc(self, fn: str, params: Dict[str, Any]):
+        return self.db.rpc(fn, params)
+
+    async def start(self):
+        """Create the clients up front so the first request doesn't pay for it"""
+        self._db = self.db
+        self._auth = self.auth
+
+    async def health(self) -> Dict[str, Any]:
+        """Check the database is reachable with a one-row query"""
+        started = time.perf_counter()
+        try:
+            await self.table("users").select("id").limit(1).execute()
+            healthy = True
+        except Exception as e:
+            print(f"Supabase health check failed: {e}")
+            healthy = False
+        return {
+            "healthy": healthy,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def aclose(self):
+        """Close both connection pools"""
+        db, auth = self._db, self._auth
+        self._db = self._auth = None
+        if db is not None:
+            await db.aclose()
+        if auth is not None:
+            await auth.close()
+
+
+# Initialize pool shared by all services
+supabase_pool = SupabasePool()
+
+
+def get_db() -> SupabasePool:
+    """FastAPI dependency for the shared Supabase pool"""
+    return supabase_pool
@@ -1,26 +1,27 @@
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime
 from src.models.schemas import User, UserCreate
-from supabase import create_client
-from src.core.config import settings
+from src.services.supabase import SupabasePool, supabase_pool
+from src.services.user_cache import UserCache, user_cache
 
 class UserService:
-    def __init__(self):
-        self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    def __init__(self, db: Optional[SupabasePool] = None, cache: Optional[UserCache] = None):
+        self.db = db or supabase_pool
+        self.cache = cache or user_cache
     
     async def create_user(self, user_data: UserCreate) -> Optional[User]:
         """Create a new user account"""
         try:
-            response = self.supabase.auth.sign_up({
+            response = await self.db.auth.sign_up({
                 "email": user_data.email,
                 "password": user_data.password
             })
             
             # Create user profile in database
-            user_profile = self.supabase.table("users").insert({
+            user_profile = await self.db.table("users").insert({
                 "id": response.user.id,
                 "email": user_data.email,
-                "credits": settings.NEW_USER_CREDITS,
+                "credits": 0,  # the signup grant is added through the credit ledger
                 "created_at": datetime.now().isoformat()
             }).execute()
             
@@ -32,7 +33,7 @@ class UserService:
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
         try:
-            response = self.supabase.table("users").select("*").eq("email", email).execute()
+            response = await self.db.table("users").select("*").eq("email", email).execute()
             if response.data:
                 return User(**response.data[0])
             return None
@@ -40,10 +41,22 @@ class UserService:
             print(f"Error fetching user: {e}")
             return None
     
+    async def get_authenticated_user(self, email: str) -> Optional[User]:
+        """Get the user behind a token subject, served from the user cache when fresh"""
+        return await self.cache.get_or_load(email, lambda: self.get_user_by_email(email))
+    
+    async def invalidate_user(self, user_id: str):
+        """Drop a cached user after their profile changes, in every worker"""
+        self.cache.invalidate(user_id=user_id)
+        await self.cache.publish_invalidation(user_id)
+    
     async def get_credits(self, user_id: str) -> int:
         """Get user's credit balance"""
+        cached = self.cache.get_by_id(user_id)
+        if cached is not None:
+            return cached.credits
         try:
-            response = self.supabase.table("users").select("credits").eq("id", user_id).execute()
+            response = await self.db.table("users").select("credits").eq("id", user_id).execute()
             if response.data:
                 return response.data[0]["credits"]
             return 0
@@ -51,42 +64,79 @@ class UserService:
             print(f"Error fetching credits: {e}")
             return 0
     
-    async def add_credits(self, user_id: str, amount: int) -> bool:
-        """Add credits to user's account"""
+    async def change_credits(
+        self,
+        user_id: str,
+        credits: int,
+        kind: str,
+        reference: Optional[str] = None,
+        amount: int = 0
+    ) -> Tuple[str, int]:
+        """Apply a credit change through the ledger in a single atomic RPC.
+
+        Returns the status ('applied', 'duplicate' or 'insufficient') and the
+        resulting balance. A change whose reference was already applied is a
+        no-op, so retried webhooks and jobs never double count. The balance
+        is written through to this worker's cached user and the other
+        workers drop theirs.
+        """
         try:
-            current_credits = await self.get_credits(user_id)
-            new_credits = current_credits + amount
-            
-            self.supabase.table("users").update({
-                "credits": new_credits
-            }).eq("id", user_id).execute()
-            
-            return True
+            response = await self.db.rpc("apply_credit_change", {
+                "p_user_id": user_id,
+                "p_credits": credits,
+                "p_kind": kind,
+                "p_reference": reference,
+                "p_amount": amount
+            }).execute()
+        except Exception:
+            # The change may have been applied anyway; make every worker reread the balance
+            await self.invalidate_user(user_id)
+            raise
+        row = response.data[0]
+        balance = row["balance"] or 0
+        self.cache.update_credits(user_id, balance)
+        if row["status"] == "applied":
+            await self.cache.publish_invalidation(user_id)
+        return row["status"], balance
+    
+    async def add_credits(
+        self,
+        user_id: str,
+        amount: int,
+        payment_id: Optional[str] = None,
+        paid_cents: int = 0
+    ) -> bool:
+        """Add credits to user's account (once per payment id)"""
+        try:
+            kind = "purchase" if payment_id else "grant"
+            status, _ = await self.change_credits(user_id, amount, kind, payment_id, paid_cents)
+            return status in ("applied", "duplicate")
         except Exception as e:
             print(f"Error adding credits: {e}")
             return False
     
-    async def deduct_credit(self, user_id: str) -> bool:
-        """Deduct one credit from user's account"""
+    async def deduct_credit(self, user_id: str, reference: Optional[str] = None) -> bool:
+        """Deduct one credit from user's account; False if the balance is empty"""
         try:
-            current_credits = await self.get_credits(user_id)
-            if current_credits <= 0:
-                return False
-            
-            new_credits = current_credits - 1
-            self.supabase.table("users").update({
-                "credits": new_credits
-            }).eq("id", user_id).execute()
-            
-            return True
+            status, _ = await self.change_credits(user_id, -1, "usage", reference)
+            return status in ("applied", "duplicate")
         except Exception as e:
             print(f"Error deducting credit: {e}")
             return False
     
+    async def refund_credit(self, user_id: str, reference: str) -> bool:
+        """Give back the credit charged for ``reference`` (once)"""
+        try:
+            status, _ = await self.change_credits(user_id, 1, "refund", reference)
+            return status in ("applied", "duplicate")
+        except Exception as e:
+            print(f"Error refunding credit: {e}")
+            return False
+    
     async def get_user_stats(self, user_id: str) -> dict:
         """Get user's usage statistics"""
         try:
-            response = self.supabase.table("statements").select("*").eq("user_id", user_id).execute()
+            response = await self.db.table("statements").select("*").eq("user_id", user_id).execute()
             return {
                 "total_statements": len(response.data),
                 "credits_used": len(response.data),
@@ -98,4 +148,13 @@ class UserService:
                 "total_statements": 0,
                 "credits_used": 0,
                 "last_upload": None
-            }
\ No newline at end of file
+            }
+
+
+# Initialize service shared by routes and the auth service
+user_service = UserService()
+
+
+def get_user_service() -> UserService:
+    """FastAPI dependency for the shared user service"""
+    return user_service
@@ -0,0 +1,171 @@
+import json
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from src.core.config import settings
+from src.models.schemas import User
+
+INVALIDATION_CHANNEL = "users:invalidate"
+
+
+class UserCache:
+    """Short-TTL, in-process cache of authenticated users keyed by token subject.
+
+    Authenticated requests look the user up here instead of running a
+    ``select *`` each time, and concurrent misses for the same subject share
+    one lookup. Credit changes made in this process update the cached
+    balance in place. With ``REDIS_URL`` set, every change is also
+    published on a Redis channel and the other workers drop their copy of
+    the user; without Redis, changes made elsewhere show up once the entry
+    expires, so keep the TTL short.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        redis_url: Optional[str] = None
+    ):
+        self.ttl = ttl if ttl is not None else settings.USER_CACHE_TTL
+        self.max_entries = max_entries or settings.USER_CACHE_MAX_ENTRIES
+        self.redis_url = redis_url if redis_url is not None else settings.REDIS_URL
+        self.instance_id = uuid.uuid4().hex
+        self._users: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._subjects: Dict[str, str] = {}  # user id -> subject
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def get(self, subject: str) -> Optional[User]:
+        """Cached user for a token subject, or None if missing or expired"""
+        entry = self._users.get(subject)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._drop(subject)
+            return None
+        self._users.move_to_end(subject)
+        return user
+
+    def get_by_id(self, user_id: str) -> Optional[User]:
+        subject = self._subjects.get(user_id)
+        return self.get(subject) if subject else None
+
+    def set(self, subject: str, user: User):
+        if self.ttl <= 0:
+            return
+        self._users[subject] = (time.monotonic() + self.ttl, user)
+        self._users.move_to_end(subject)
+        self._subjects[user.id] = subject
+        while len(self._users) > self.max_entries:
+            self._drop(next(iter(self._users)))
+
+    async def get_or_load(self, subject: str, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        """Cached user, loading it once for all concurrent callers on a miss"""
+        user = self.get(subject)
+        if user is not None:
+            return user
+
+        pending = self._pending.get(subject)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[subject] = future
+        try:
+            user = await load()
+            if user is not None:
+                self.set(subject, user)
+            future.set_result(user)
+            return user
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about a never-retrieved exception
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._pending[subject]
+
+    def update_credits(self, user_id: str, balance: int):
+        """Write a new credit balance through to the cached user, keeping its TTL"""
+        subject = self._subjects.get(user_id)
+        entry = self._users.get(subject) if subject else None
+        if entry is not None:
+            expires_at, user = entry
+            self._users[subject] = (expires_at, user.model_copy(update={"credits": balance}))
+
+    def invalidate(self, user_id: Optional[str] = None, subject: Optional[str] = None):
+        """Forget a user, e.g. after a profile change"""
+        subject = subject or self._subjects.get(user_id)
+        if subject:
+            self._drop(subject)
+
+    def clear(self):
+        self._users.clear()
+        self._subjects.clear()
+
+    def _get_redis(self):
+        if self._redis is None:
+            from redis.asyncio import Redis
+            self._redis = Redis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def publish_invalidation(self, user_id: str):
+        """Tell the other workers to drop their cached copy of a user"""
+        if not self.redis_url:
+            return
+        message = json.dumps({"user_id": user_id, "origin": self.instance_id})
+        try:
+            await self._get_redis().publish(INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            print(f"Error publishing user cache invalidation: {e}")
+
+    def handle_invalidation(self, message: str):
+        """Drop the user named in an invalidation published by another worker"""
+        data = json.loads(message)
+        if data.get("origin") != self.instance_id:
+            self.invalidate(user_id=data["user_id"])
+
+    async def start(self):
+        """Start listening for invalidations from other workers"""
+        if self.redis_url and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def aclose(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self._get_redis().pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"User cache invalidation listener error: {e}")
+            # Invalidations sent while disconnected were missed
+            self.clear()
+            await asyncio.sleep(1)
+
+    def _drop(self, subject: str):
+        entry = self._users.pop(subject, None)
+        if entry is not None and self._subjects.get(entry[1].id) == subject:
+            del self._subjects[entry[1].id]
+
+
+# Initialize cache shared by the user and auth services
+user_cache = UserCache()
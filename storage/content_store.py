@@ -0,0 +1,237 @@
+import os
+import re
+import json
+import time
+import fcntl
+import shutil
+import asyncio
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from extraction.store import statement_store
+
+load_dotenv()
+
+BLOB_NAME = "statement.pdf"
+REFS_DIR = "refs"
+FILES_DIR = "files"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def export_name(fmt: str, version: int = 1, parser_version: int = 1) -> str:
+    """Artifact name of a statement export in the given format, layout and parser version"""
+    return f"statement.p{parser_version}.v{version}.{fmt}"
+
+
+def result_name(parser_version: int = 1) -> str:
+    """Artifact name of a statement's analysis result for the given parser version"""
+    return f"analysis.p{parser_version}.json"
+
+
+class ContentAddressedStore:
+    """Uploaded statements stored once per SHA-256, shared by every uploader.
+
+    Each entry holds the PDF, its analysis result and exported artifacts,
+    plus one reference file per user who uploaded it; each upload's file
+    id is indexed to the entry it resolved to. A reference expires
+    ``retention_days`` after that user's last upload of the file, matching
+    the bank_statements retention in 00002_security_gdpr.sql; once an entry
+    has no references left it is deleted along with everything derived
+    from it, including its parsed transactions. Entries are locked with
+    flock so API workers sharing the directory don't race each other.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, retention_days: Optional[int] = None):
+        self.root_dir = root_dir or os.getenv(
+            "UPLOAD_STORE_DIR", os.path.join(os.getenv("UPLOAD_DIR", "uploads"), "objects")
+        )
+        self.retention_days = retention_days or int(os.getenv("DATA_RETENTION_DAYS", "30"))
+        os.makedirs(os.path.join(self.root_dir, FILES_DIR), exist_ok=True)
+
+    def entry_path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.entry_path(digest), BLOB_NAME)
+
+    def artifact_path(self, digest: str, name: str) -> str:
+        return os.path.join(self.entry_path(digest), name)
+
+    def _ref_path(self, digest: str, user_id: str) -> str:
+        # User ids are hashed so they are safe as file names and not stored in the clear
+        name = hashlib.sha256(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.entry_path(digest), REFS_DIR, f"{name}.json")
+
+    def _file_path(self, file_id: str) -> str:
+        return os.path.join(self.root_dir, FILES_DIR, file_id)
+
+    @contextmanager
+    def _locked(self, digest: str, create: bool = False) -> Iterator[bool]:
+        """Hold the entry's lock; yields False if the entry doesn't exist"""
+        path = self.entry_path(digest)
+        while True:
+            if create:
+                os.makedirs(os.path.join(path, REFS_DIR), exist_ok=True)
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                if create:
+                    continue
+                yield False
+                return
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # The entry may have been deleted while we waited for the lock
+                if os.path.exists(path) and os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    yield True
+                    return
+            finally:
+                os.close(fd)
+            if not create:
+                yield False
+                return
+
+    def _write_json(self, path: str, data: Any):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def adopt(self, digest: str, upload_path: str, user_id: str, file_id: str) -> Tuple[str, bool]:
+        """Take ownership of a freshly saved upload and add the user's reference.
+
+        Returns the stored PDF's path and whether it is new; an upload whose
+        bytes are already stored is deleted in favour of the existing copy.
+        """
+        with self._locked(digest, create=True):
+            blob = self.blob_path(digest)
+            is_new = not os.path.exists(blob)
+            if is_new:
+                os.replace(upload_path, blob)
+            elif os.path.abspath(upload_path) != os.path.abspath(blob):
+                os.remove(upload_path)
+
+            ref_path = self._ref_path(digest, user_id)
+            try:
+                with open(ref_path, "r", encoding="utf-8") as f:
+                    ref = json.load(f)
+            except (OSError, ValueError):
+                ref = {"file_ids": []}
+            if file_id not in ref["file_ids"]:
+                ref["file_ids"].append(file_id)
+            # Rewriting the file also refreshes the mtime the retention window runs from
+            self._write_json(ref_path, ref)
+
+        with open(self._file_path(file_id), "w", encoding="utf-8") as f:
+            f.write(digest)
+        return blob, is_new
+
+    def digest_for(self, file_id: str) -> Optional[str]:
+        """Content hash an upload's file id resolved to, or None if it has expired"""
+        if os.path.basename(file_id) != file_id:
+            return None
+        try:
+            with open(self._file_path(file_id), "r", encoding="utf-8") as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+        if not _DIGEST_RE.match(digest) or not os.path.exists(self.blob_path(digest)):
+            return None
+        return digest
+
+    def get_result(self, digest: str, parser_version: int = 1) -> Optional[Dict]:
+        """Get the stored analysis result for a statement, or None"""
+        try:
+            with open(self.artifact_path(digest, result_name(parser_version)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_result(self, digest: str, result: Dict, parser_version: int = 1):
+        """Store the analysis result for a statement"""
+        with self._locked(digest) as exists:
+            if exists:
+                self._write_json(self.artifact_path(digest, result_name(parser_version)), result)
+
+    def references(self, digest: str) -> int:
+        """Number of users holding a reference to a statement"""
+        try:
+            return len(os.listdir(os.path.join(self.entry_path(digest), REFS_DIR)))
+        except OSError:
+            return 0
+
+    def release(self, digest: str, user_id: str) -> bool:
+        """Drop a user's reference, deleting the entry if it was the last one"""
+        with self._locked(digest) as exists:
+            if not exists:
+                return False
+            try:
+                os.remove(self._ref_path(digest, user_id))
+            except FileNotFoundError:
+                pass
+            return self._delete_if_unreferenced(digest)
+
+    def release_user(self, user_id: str) -> int:
+        """Drop every reference held by a user (e.g. for a data deletion request)"""
+        return sum(self.release(digest, user_id) for digest in self._digests())
+
+    def prune(self) -> int:
+        """Expire references past the retention window and delete unreferenced entries"""
+        cutoff = time.time() - self.retention_days * 24 * 60 * 60
+        deleted = 0
+        for digest in self._digests():
+            with self._locked(digest) as exists:
+                if not exists:
+                    continue
+                refs_dir = os.path.join(self.entry_path(digest), REFS_DIR)
+                for name in os.listdir(refs_dir):
+                    path = os.path.join(refs_dir, name)
+                    try:
+                        if os.stat(path).st_mtime < cutoff:
+                            os.remove(path)
+                    except OSError:
+                        continue
+                deleted += self._delete_if_unreferenced(digest)
+
+        # Drop file ids whose entry is gone
+        files_dir = os.path.join(self.root_dir, FILES_DIR)
+        for file_id in os.listdir(files_dir):
+            if self.digest_for(file_id) is None:
+                try:
+                    os.remove(os.path.join(files_dir, file_id))
+                except OSError:
+                    pass
+        return deleted
+
+    async def run_retention(self, interval: Optional[float] = None):
+        """Prune expired entries periodically until cancelled"""
+        interval = interval or float(os.getenv("UPLOAD_STORE_PRUNE_INTERVAL", "3600"))
+        while True:
+            try:
+                deleted = await asyncio.to_thread(self.prune)
+                if deleted:
+                    print(f"Deleted {deleted} expired statements from the upload store")
+            except Exception as e:
+                print(f"Upload store retention error: {e}")
+            await asyncio.sleep(interval)
+
+    def _digests(self) -> List[str]:
+        return [
+            name for name in os.listdir(self.root_dir)
+            if _DIGEST_RE.match(name) and os.path.isdir(os.path.join(self.root_dir, name))
+        ]
+
+    def _delete_if_unreferenced(self, digest: str) -> bool:
+        # Caller holds the entry lock
+        if self.references(digest):
+            return False
+        shutil.rmtree(self.entry_path(digest), ignore_errors=True)
+        statement_store.delete(digest)
+        return True
+
+
+# Initialize upload store shared by all endpoints
+upload_store = ContentAddressedStore()
@@ -0,0 +1,73 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+from typing import Optional
+from fastapi import UploadFile
+from dotenv import load_dotenv
+
+load_dotenv()
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+DEFAULT_MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))  # 10MB
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_size: int):
+        super().__init__(f"File exceeds the maximum upload size of {max_size // (1024 * 1024)}MB")
+        self.max_size = max_size
+
+
+class SavedUpload:
+    """An upload written to disk, with its size and SHA-256 content hash"""
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+
+async def save_upload_stream(
+    file: UploadFile,
+    directory: str,
+    filename: Optional[str] = None,
+    max_size: Optional[int] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> SavedUpload:
+    """Copy an upload to disk in fixed-size chunks, hashing it on the way.
+
+    Only one chunk is held in memory at a time. The upload is rejected with
+    UploadTooLarge as soon as it passes ``max_size``. The file is written
+    to a temporary name and moved into place once complete; without an
+    explicit ``filename`` it is named after its content hash.
+    """
+    max_size = max_size or DEFAULT_MAX_UPLOAD_SIZE
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(max_size)
+
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        path = os.path.join(directory, filename or f"{sha256}{extension}")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return SavedUpload(path, size, sha256)
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import httpx
+import pytest
+
+# Settings and the module-level stores read these at import time, so they are
+# set before any test module imports the app code
+TEST_DIR = tempfile.mkdtemp(prefix="bank-analyzer-tests-")
+
+for name in ("CEREBRAS_API_KEY", "OPENROUTER_API_KEY", "STRIPE_SECRET_KEY", "SUPABASE_KEY"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ["REDIS_URL"] = ""
+os.environ["STATEMENT_STORE_DIR"] = os.path.join(TEST_DIR, "parsed")
+os.environ["MERCHANT_CACHE_PATH"] = os.path.join(TEST_DIR, "merchant_categories.json")
+os.environ["UPLOAD_DIR"] = os.path.join(TEST_DIR, "uploads")
+os.environ["UPLOAD_STORE_DIR"] = os.path.join(TEST_DIR, "uploads", "objects")
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one line of Helvetica text per string on each page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = "".join(
+            "BT /F1 9 Tf 40 %d Td (%s) Tj ET\n" % (760 - 14 * i, line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"))
+            for i, line in enumerate(lines)
+        ).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return str(path)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    def make(pages, name="statement.pdf"):
+        return write_pdf(tmp_path / name, pages)
+    return make
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    """Route the shared LLM HTTP pool through an ``httpx.MockTransport`` handler"""
+    from ai.http_client import http_pool
+
+    def install(handler):
+        transport = httpx.MockTransport(handler)
+        clients = {}
+
+        def client(base_url):
+            if base_url not in clients:
+                clients[base_url] = httpx.AsyncClient(base_url=base_url, transport=transport)
+            return clients[base_url]
+
+        monkeypatch.setattr(http_pool, "client", client)
+        return clients
+    return install
+
+
+class FakeQuery:
+    """Just enough of the postgrest query builder for the services under test"""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.filters = []
+        self.action = ("select", None)
+
+    def select(self, columns="*"):
+        self.action = ("select", None)
+        return self
+
+    def insert(self, row):
+        self.action = ("insert", row)
+        return self
+
+    def update(self, values):
+        self.action = ("update", values)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    async def execute(self):
+        if self.db.fail:
+            raise self.db.fail
+        rows = self.db.tables.setdefault(self.name, [])
+        kind, values = self.action
+        if kind == "insert":
+            inserted = []
+            for values in values if isinstance(values, list) else [values]:
+                inserted.append({"id": f"{self.name}-{len(rows) + 1}", **values})
+                rows.append(inserted[-1])
+            return FakeResponse([dict(row) for row in inserted])
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if kind == "update":
+            for row in matched:
+                row.update(values)
+        return FakeResponse([dict(row) for row in matched])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeCall:
+    def __init__(self, db, fn, params):
+        self.db = db
+        self.fn = fn
+        self.params = params
+
+    async def execute(self):
+        if self.db.fail:
+            raise self.db.fail
+        self.db.calls.append((self.fn, self.params))
+        return FakeResponse(self.db.functions[self.fn](**self.params))
+
+
+class FakeDB:
+    """In-memory stand-in for ``supabase_pool``.
+
+    ``tables`` maps a table name to its rows and ``functions`` maps an RPC
+    name to a callable returning its result rows.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.functions = {}
+        self.calls = []
+        self.fail = None
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, fn, params):
+        return FakeCall(self, fn, params)
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDB()
@@ -0,0 +1,127 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.middleware import security
+from src.middleware.security import SecurityMiddleware
+from src.services.audit import AccessLogWriter
+from src.services.rate_limit import RateLimiter
+
+
+def writer(db, **kwargs):
+    return AccessLogWriter(db=db, **{"batch_size": 2, "flush_interval": 60, "max_queue": 5, **kwargs})
+
+
+def test_records_are_written_in_batches(fake_db):
+    log = writer(fake_db)
+    for n in range(3):
+        log.log(f"u{n}", "/api/statements/upload", "POST", "1.2.3.4")
+
+    async def run():
+        await log.flush()
+        await log.stop()
+
+    asyncio.run(run())
+    rows = fake_db.tables["access_logs"]
+    assert [row["user_id"] for row in rows] == ["u0", "u1", "u2"]
+    assert log.stats()["written"] == 3
+    assert log.stats()["queue_depth"] == 0
+
+
+def test_full_batch_wakes_the_flusher(fake_db):
+    log = writer(fake_db)
+
+    async def run():
+        await log.start()
+        log.log("u1", "/a", "POST")
+        log.log("u2", "/a", "POST")
+        for _ in range(100):
+            if log.stats()["written"] == 2:
+                break
+            await asyncio.sleep(0.01)
+        await log.stop()
+
+    asyncio.run(run())
+    assert len(fake_db.tables["access_logs"]) == 2
+
+
+def test_failed_batches_are_retried_and_overflow_is_dropped(fake_db):
+    log = writer(fake_db)
+    for n in range(6):
+        log.log(f"u{n}", "/a", "POST")
+    assert log.stats()["dropped"] == 1
+
+    fake_db.fail = ConnectionError("database down")
+    assert asyncio.run(log.flush()) is False
+    assert log.stats()["queue_depth"] == 5
+    fake_db.fail = None
+    asyncio.run(log.stop())
+    assert [row["user_id"] for row in fake_db.tables["access_logs"]] == ["u1", "u2", "u3", "u4", "u5"]
+
+
+class Retention:
+    """Models claim_maintenance_run() and purge_expired_data() from 00004_access_log_retention.sql"""
+
+    def __init__(self, expired_logs):
+        self.expired_logs = expired_logs
+        self.claimed = set()
+        self.purges = 0
+
+    def claim(self, p_task, p_interval_seconds):
+        if p_task in self.claimed:
+            return False
+        self.claimed.add(p_task)
+        return True
+
+    def purge(self, p_retention_days, p_batch_size):
+        self.purges += 1
+        deleted = min(self.expired_logs, p_batch_size)
+        self.expired_logs -= deleted
+        return [{"access_logs_deleted": deleted, "statements_deleted": 0}]
+
+
+def test_purge_repeats_until_a_short_batch(fake_db):
+    retention = Retention(expired_logs=5)
+    fake_db.functions["purge_expired_data"] = retention.purge
+    deleted = asyncio.run(writer(fake_db).purge_expired(batch_size=2))
+    assert deleted == {"access_logs": 5, "statements": 0}
+    assert retention.purges == 3
+
+
+def test_only_one_worker_purges_per_interval(fake_db, monkeypatch):
+    retention = Retention(expired_logs=3)
+    fake_db.functions["claim_maintenance_run"] = retention.claim
+    fake_db.functions["purge_expired_data"] = retention.purge
+    workers = [writer(fake_db) for _ in range(3)]
+
+    async def run():
+        tasks = [asyncio.create_task(w.run_retention(interval=3600)) for w in workers]
+        while len([c for c in fake_db.calls if c[0] == "claim_maintenance_run"]) < 3:
+            await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    assert retention.purges == 1
+    assert retention.expired_logs == 0
+
+
+def test_mutating_requests_reach_the_writer(fake_db, monkeypatch):
+    log = writer(fake_db, batch_size=100)
+    monkeypatch.setattr("src.services.security.access_log_writer", log)
+    monkeypatch.setattr(security, "rate_limiter", RateLimiter(redis_url=""))
+    app = FastAPI()
+
+    @app.api_route("/api/statements/upload", methods=["GET", "POST"])
+    async def upload():
+        return {"ok": True}
+
+    app.add_middleware(SecurityMiddleware)
+    client = TestClient(app)
+    client.get("/api/statements/upload")
+    client.post("/api/statements/upload")
+
+    assert log.stats()["queue_depth"] == 1
+    assert log._queue[0]["action"] == "POST"
+    assert log._queue[0]["data_type"] == "/api/statements/upload"
+    assert log._queue[0]["ip_address"] == "testclient"
@@ -0,0 +1,135 @@
+import json
+import asyncio
+import pytest
+from ai.categorizer import (
+    UNCATEGORIZED, MerchantCategoryCache, TransactionCategorizer, normalize_description, parse_json_object
+)
+from ai.openrouter_client import OpenRouterClient
+from analytics.savings import savings_calculator
+
+CATEGORIES = {"coffee shop": "Dining", "fresh mart": "Groceries", "city power": "Utilities", "metro rail": "Transport"}
+
+
+def transaction(description, amount):
+    return {"date": "2024-01-01", "description": description, "amount": amount, "type": "debit"}
+
+
+class FakeModel:
+    """Completion function that categorizes from CATEGORIES and records its prompts"""
+
+    def __init__(self, broken=()):
+        self.prompts = []
+        self.broken = broken
+
+    async def __call__(self, prompt, model_name):
+        self.prompts.append(prompt)
+        merchants = [line.strip() for line in prompt.split("Descriptions:")[1].splitlines() if line.strip()]
+        if any(m in self.broken for m in merchants):
+            return "Sorry, I can't help with that."
+        return json.dumps({m: CATEGORIES[m] for m in merchants})
+
+    def sent(self):
+        return [line.strip() for p in self.prompts for line in p.split("Descriptions:")[1].splitlines() if line.strip()]
+
+
+@pytest.fixture
+def categorizer(tmp_path):
+    cache = MerchantCategoryCache(path=str(tmp_path / "merchants.json"), redis_url="")
+    return TransactionCategorizer(cache, batch_tokens=6, max_concurrency=4)
+
+
+def test_normalize_description():
+    assert normalize_description("COFFEE SHOP #88 0412") == "coffee shop"
+    assert normalize_description("Coffee Shop") == "coffee shop"
+    assert normalize_description("POS 4411*2231 Fresh-Mart") == "pos fresh mart"
+    assert normalize_description("#12345 / 0712***678") == ""
+    assert parse_json_object('Here you go: {"a": "b"} thanks') == {"a": "b"}
+
+
+def test_each_merchant_is_sent_once_and_then_cached(categorizer):
+    transactions = [
+        transaction("COFFEE SHOP #88", 4.5),
+        transaction("Coffee Shop 0412", 3.0),
+        transaction("Fresh Mart", 20.0),
+    ]
+    model = FakeModel()
+    totals = asyncio.run(categorizer.categorize(transactions, "m", model))
+
+    assert totals == {"Dining": 7.5, "Groceries": 20.0}
+    assert sorted(model.sent()) == ["coffee shop", "fresh mart"]
+    assert [t["category"] for t in transactions] == ["Dining", "Dining", "Groceries"]
+
+    # A fresh categorizer over the same file needs no LLM call at all
+    again = TransactionCategorizer(MerchantCategoryCache(path=categorizer.merchant_cache.path, redis_url=""))
+    model = FakeModel()
+    asyncio.run(again.categorize([transaction("coffee shop", 1.0)], "m", model))
+    assert model.prompts == []
+
+
+def test_a_failed_batch_only_leaves_its_merchants_uncategorized(categorizer):
+    transactions = [transaction(name, 1.0) for name in CATEGORIES]
+    model = FakeModel(broken={"city power"})
+    totals = asyncio.run(categorizer.categorize(transactions, "m", model))
+
+    assert len(model.prompts) == 4
+    by_description = {t["description"]: t["category"] for t in transactions}
+    assert by_description["city power"] == UNCATEGORIZED
+    assert by_description["coffee shop"] == "Dining"
+    assert by_description["metro rail"] == "Transport"
+    assert totals[UNCATEGORIZED] == 1.0
+
+    # The failed merchant is retried next time instead of being cached as uncategorized
+    stored = json.load(open(categorizer.merchant_cache.path))
+    assert "city power" not in stored and stored["coffee shop"] == "Dining"
+
+
+def test_fails_when_every_batch_fails(categorizer):
+    model = FakeModel(broken=set(CATEGORIES))
+    with pytest.raises(ValueError):
+        asyncio.run(categorizer.categorize([transaction("coffee shop", 1.0)], "m", model))
+
+
+def test_reference_only_descriptions_are_not_sent(categorizer):
+    transactions = [transaction("#12345 / 0712***678", 9.0), transaction("Coffee Shop", 2.0)]
+    model = FakeModel()
+    totals = asyncio.run(categorizer.categorize(transactions, "m", model))
+
+    assert model.sent() == ["coffee shop"]
+    assert totals == {UNCATEGORIZED: 9.0, "Dining": 2.0}
+
+
+def test_file_cache_merges_with_other_writers(tmp_path):
+    path = tmp_path / "merchants.json"
+    path.write_text(json.dumps({"written elsewhere": "Rent"}))
+    cache = MerchantCategoryCache(path=str(path), redis_url="")
+
+    asyncio.run(cache.set_many({"coffee shop": "Dining"}))
+    assert json.loads(path.read_text()) == {"written elsewhere": "Rent", "coffee shop": "Dining"}
+    assert asyncio.run(cache.get_many(["coffee shop", "written elsewhere", "unknown"])) == {
+        "coffee shop": "Dining", "written elsewhere": "Rent"
+    }
+
+
+def test_default_limiter_lets_concurrent_batches_through():
+    client = OpenRouterClient()
+
+    async def run():
+        return await asyncio.gather(*[client.rate_limiter.acquire("openrouter", "m") for _ in range(4)])
+
+    assert asyncio.run(run()) == [0, 0, 0, 0]
+
+
+def test_categories_are_set_on_the_callers_transactions_for_the_savings_matrix(categorizer):
+    transactions = [
+        transaction("Coffee Shop", 40.0),
+        transaction("City Power", 100.0),
+        {"date": "2024-01-31", "description": "Fresh Mart", "amount": 500.0, "type": "credit"},
+    ]
+    uncategorized = savings_calculator.from_transactions(transactions)
+    asyncio.run(categorizer.categorize(transactions, "m", FakeModel()))
+
+    assert [t["category"] for t in transactions] == ["Dining", "Utilities", "Groceries"]
+    # The savings matrix reads those labels rather than the returned totals
+    matrix = savings_calculator.from_transactions(transactions)
+    assert matrix == savings_calculator.calculate({"Dining": 40.0, "Utilities": 100.0})
+    assert matrix != uncategorized
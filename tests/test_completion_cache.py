@@ -0,0 +1,95 @@
+import asyncio
+import httpx
+import fakeredis.aioredis
+from ai.response_cache import CompletionCache, completion_cache_key
+from ai.openrouter_client import OpenRouterClient
+
+MESSAGES = [{"role": "user", "content": "Categorize: Coffee Shop"}]
+COMPLETION = {"choices": [{"message": {"role": "assistant", "content": "Dining"}}]}
+
+
+def test_cache_key_is_canonical():
+    key = completion_cache_key("m", MESSAGES, 0.7, 100)
+    assert key == completion_cache_key("m", [dict(reversed(list(MESSAGES[0].items())))], 0.7, 100)
+    assert key != completion_cache_key("m", MESSAGES, 0.8, 100)
+    assert key != completion_cache_key("other", MESSAGES, 0.7, 100)
+    assert key.startswith("completion:")
+
+
+def test_local_tier_lru_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("ai.response_cache.time.monotonic", lambda: now[0])
+    cache = CompletionCache(ttl=60, max_entries=2, redis_url="")
+
+    async def run():
+        await cache.set("a", {"n": 1})
+        await cache.set("b", {"n": 2})
+        assert await cache.get("a") == {"n": 1}
+        await cache.set("c", {"n": 3})  # evicts "b", the least recently used
+        assert await cache.get("b") is None
+        now[0] += 61
+        assert await cache.get("a") is None
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert stats["local_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_redis_tier_is_shared_and_promoted():
+    redis = fakeredis.aioredis.FakeRedis()
+    writer = CompletionCache(ttl=60, redis_url="redis://test")
+    reader = CompletionCache(ttl=60, redis_url="redis://test")
+    writer._redis = reader._redis = redis
+
+    async def run():
+        await writer.set("k", COMPLETION)
+        assert await reader.get("k") == COMPLETION
+        assert await reader.get("k") == COMPLETION
+
+    asyncio.run(run())
+    assert reader.stats()["redis_hits"] == 1
+    assert reader.stats()["local_hits"] == 1
+
+
+def test_redis_errors_are_misses():
+    class BrokenRedis:
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, *args, **kwargs):
+            raise ConnectionError("down")
+
+    cache = CompletionCache(ttl=60, redis_url="redis://test")
+    cache._redis = BrokenRedis()
+
+    async def run():
+        await cache.set("k", COMPLETION)
+        cache._entries.clear()
+        return await cache.get("k")
+
+    assert asyncio.run(run()) is None
+    assert cache.stats()["redis_errors"] == 2
+
+
+def test_client_serves_repeated_prompts_from_the_cache(mock_http):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=COMPLETION)
+
+    mock_http(handler)
+    client = OpenRouterClient()
+    client.cache = CompletionCache(ttl=60, redis_url="")
+
+    async def run():
+        first = await client.chat_completion(MESSAGES, model="llama3.1-8b")
+        second = await client.chat_completion(MESSAGES, model="llama3.1-8b")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == COMPLETION
+    assert len(calls) == 1
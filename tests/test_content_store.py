@@ -0,0 +1,97 @@
+import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from storage.content_store import ContentAddressedStore, result_name
+
+PDF = b"%PDF-1.4 statement"
+DIGEST = hashlib.sha256(PDF).hexdigest()
+
+
+def saved_upload(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(PDF)
+    return str(path)
+
+
+def test_same_bytes_are_stored_once(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"))
+    first, is_new = store.adopt(DIGEST, saved_upload(tmp_path, "a.pdf"), "u1", "u1_1")
+    second, again = store.adopt(DIGEST, saved_upload(tmp_path, "b.pdf"), "u2", "u2_1")
+
+    assert (is_new, again) == (True, False)
+    assert first == second == store.blob_path(DIGEST)
+    # The duplicate upload is dropped in favour of the stored copy
+    assert not os.path.exists(tmp_path / "b.pdf")
+    assert store.references(DIGEST) == 2
+    assert store.digest_for("u1_1") == store.digest_for("u2_1") == DIGEST
+
+
+def test_reupload_by_the_same_user_is_one_reference(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"))
+    store.adopt(DIGEST, saved_upload(tmp_path, "a.pdf"), "u1", "u1_1")
+    store.adopt(DIGEST, saved_upload(tmp_path, "b.pdf"), "u1", "u1_2")
+    assert store.references(DIGEST) == 1
+    assert store.digest_for("u1_2") == DIGEST
+
+
+def test_entry_is_deleted_with_its_last_reference(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"))
+    store.adopt(DIGEST, saved_upload(tmp_path, "a.pdf"), "u1", "u1_1")
+    store.adopt(DIGEST, saved_upload(tmp_path, "b.pdf"), "u2", "u2_1")
+    store.put_result(DIGEST, {"transactions": []})
+
+    assert store.release(DIGEST, "u1") is False
+    assert store.get_result(DIGEST) == {"transactions": []}
+    assert store.release(DIGEST, "u2") is True
+    assert not os.path.exists(store.entry_path(DIGEST))
+    assert store.digest_for("u2_1") is None
+    # Results aren't written back for an entry that is gone
+    store.put_result(DIGEST, {"transactions": []})
+    assert not os.path.exists(store.artifact_path(DIGEST, result_name()))
+
+
+def test_prune_expires_old_references(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"), retention_days=30)
+    store.adopt(DIGEST, saved_upload(tmp_path, "a.pdf"), "u1", "u1_1")
+    old = time.time() - 31 * 24 * 60 * 60
+    os.utime(store._ref_path(DIGEST, "u1"), (old, old))
+
+    assert store.prune() == 1
+    assert not os.path.exists(store.entry_path(DIGEST))
+    assert os.listdir(tmp_path / "objects" / "files") == []
+
+
+def test_digest_for_rejects_path_traversal(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"))
+    assert store.digest_for("../secret") is None
+
+
+def test_concurrent_uploads_and_releases_keep_the_entry_consistent(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"))
+    users = [f"u{n}" for n in range(16)]
+
+    def upload(user):
+        store.adopt(DIGEST, saved_upload(tmp_path, f"{user}.pdf"), user, f"{user}_1")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(upload, users))
+    assert store.references(DIGEST) == len(users)
+    with open(store.blob_path(DIGEST), "rb") as f:
+        assert f.read() == PDF
+
+    # Releases racing with new uploads never delete an entry someone still references
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        released = pool.map(lambda user: store.release(DIGEST, user), users[1:])
+        pool.submit(upload, "late").result()
+        assert not any(released)
+    assert store.references(DIGEST) == 2
+    assert store.digest_for("late_1") == DIGEST
+
+
+def test_results_are_kept_per_parser_version(tmp_path):
+    store = ContentAddressedStore(str(tmp_path / "objects"))
+    store.adopt(DIGEST, saved_upload(tmp_path, "a.pdf"), "u1", "u1_1")
+    store.put_result(DIGEST, {"transactions": []}, parser_version=1)
+    assert store.get_result(DIGEST, parser_version=2) is None
+    assert store.get_result(DIGEST, parser_version=1) == {"transactions": []}
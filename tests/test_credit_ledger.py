@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from src.models.schemas import User
+from src.services.user import UserService
+from src.services.user_cache import UserCache
+
+
+class Ledger:
+    """Python model of apply_credit_change() in 00003_credit_ledger.sql"""
+
+    def __init__(self, balances):
+        self.balances = dict(balances)
+        self.entries = []
+
+    def __call__(self, p_user_id, p_credits, p_kind, p_reference=None, p_amount=0):
+        if p_reference is not None and (p_kind, p_reference) in {(k, r) for k, r, _ in self.entries}:
+            return [{"status": "duplicate", "balance": self.balances.get(p_user_id)}]
+        if self.balances.get(p_user_id, 0) + p_credits < 0:
+            return [{"status": "insufficient", "balance": self.balances.get(p_user_id, 0)}]
+        self.entries.append((p_kind, p_reference, p_credits))
+        self.balances[p_user_id] += p_credits
+        return [{"status": "applied", "balance": self.balances[p_user_id]}]
+
+
+@pytest.fixture
+def ledger(fake_db):
+    ledger = Ledger({"u1": 1})
+    fake_db.functions["apply_credit_change"] = ledger
+    return ledger
+
+
+@pytest.fixture
+def service(fake_db):
+    return UserService(db=fake_db, cache=UserCache(ttl=60))
+
+
+def test_change_is_one_rpc(service, ledger, fake_db):
+    status, balance = asyncio.run(service.change_credits("u1", 5, "purchase", "pi_1", 500))
+    assert (status, balance) == ("applied", 6)
+    assert fake_db.calls == [("apply_credit_change", {
+        "p_user_id": "u1", "p_credits": 5, "p_kind": "purchase", "p_reference": "pi_1", "p_amount": 500
+    })]
+
+
+def test_retried_payment_is_credited_once(service, ledger):
+    async def run():
+        return [await service.add_credits("u1", 5, payment_id="pi_1") for _ in range(3)]
+
+    assert asyncio.run(run()) == [True, True, True]
+    assert ledger.balances["u1"] == 6
+
+
+def test_deduct_and_refund_are_keyed_by_upload(service, ledger):
+    async def run():
+        return (
+            await service.deduct_credit("u1", reference="u1_1"),
+            await service.deduct_credit("u1", reference="u1_2"),
+            await service.refund_credit("u1", "u1_1"),
+            await service.refund_credit("u1", "u1_1"),
+        )
+
+    # The second upload finds the balance empty; the refund is applied once
+    assert asyncio.run(run()) == (True, False, True, True)
+    assert ledger.balances["u1"] == 1
+    assert [kind for kind, _, _ in ledger.entries] == ["usage", "refund"]
+
+
+def test_balance_is_written_through_to_the_cache(service, ledger):
+    user = User(id="u1", email="a@example.com", credits=1, created_at="2025-01-01T00:00:00")
+    service.cache.set("a@example.com", user)
+    asyncio.run(service.add_credits("u1", 5, payment_id="pi_1"))
+    assert service.cache.get("a@example.com").credits == 6
+    assert asyncio.run(service.get_credits("u1")) == 6
+
+
+def test_errors_fail_the_change(service, ledger, fake_db):
+    fake_db.fail = ConnectionError("database down")
+    assert asyncio.run(service.deduct_credit("u1", reference="u1_1")) is False
+    assert asyncio.run(service.add_credits("u1", 5, payment_id="pi_1")) is False
+    assert ledger.balances["u1"] == 1
@@ -0,0 +1,94 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from exports.responses import cached_file_response, etag_matches, parse_range
+
+ETAG = '"abc123"'
+BODY = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "statement.xlsx"
+    path.write_bytes(BODY)
+    app = FastAPI()
+
+    @app.api_route("/download", methods=["GET", "HEAD"])
+    async def download(request: Request):
+        return cached_file_response(request, str(path), etag=ETAG, media_type="text/csv", filename="s.csv")
+
+    return TestClient(app)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range(None, 1000) is None
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+    with pytest.raises(ValueError):
+        parse_range("bytes=10-5", 1000)
+
+
+def test_etag_matches():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"other", W/{ETAG}', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches('"other"', ETAG)
+    assert not etag_matches(None, ETAG)
+
+
+def test_full_download_carries_validators(client):
+    response = client.get("/download")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["etag"] == ETAG
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_revalidation_returns_304(client):
+    response = client.get("/download", headers={"If-None-Match": ETAG})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == ETAG
+
+
+def test_range_request_returns_206(client):
+    response = client.get("/download", headers={"Range": "bytes=100-4195"})
+    assert response.status_code == 206
+    assert response.content == BODY[100:4196]
+    assert response.headers["content-range"] == f"bytes 100-4195/{len(BODY)}"
+    assert response.headers["content-length"] == "4096"
+
+
+def test_suffix_range(client):
+    response = client.get("/download", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == BODY[-10:]
+
+
+def test_unsatisfiable_range_returns_416(client):
+    response = client.get("/download", headers={"Range": f"bytes={len(BODY)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_stale_if_range_sends_the_whole_file(client):
+    response = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert response.status_code == 200
+    assert response.content == BODY
+    response = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+    assert response.status_code == 206
+    assert response.content == BODY[:10]
+
+
+def test_head_range_sends_headers_only(client):
+    response = client.head("/download", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == b""
+    assert response.headers["content-length"] == "10"
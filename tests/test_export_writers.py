@@ -0,0 +1,73 @@
+import csv
+from datetime import date
+import pytest
+from exports.writers import export_transactions, typed_rows
+
+TRANSACTIONS = [
+    {"date": "2025-01-15", "description": "Grocery Store", "amount": "85.5", "type": "debit", "category": "Groceries"},
+    {"date": "2025-01-16T09:00:00", "description": "Salary", "amount": 1000, "type": "credit", "category": "Income"},
+    {"date": "not a date", "description": "Fee", "amount": "n/a", "type": "debit"},
+]
+
+
+def test_rows_get_real_dates_and_amounts():
+    rows = list(typed_rows(TRANSACTIONS))
+    assert rows[0] == (date(2025, 1, 15), "Grocery Store", 85.5, "debit", "Groceries")
+    assert rows[1][0] == date(2025, 1, 16)
+    assert rows[2] == (None, "Fee", None, "debit", "")
+
+
+def test_csv_export(tmp_path):
+    path = export_transactions(iter(TRANSACTIONS), str(tmp_path / "out.csv"), "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["Date", "Description", "Amount", "Type", "Category"]
+    assert rows[1] == ["2025-01-15", "Grocery Store", "85.50", "debit", "Groceries"]
+    assert rows[3] == ["", "Fee", "", "debit", ""]
+
+
+def test_xlsx_export_is_typed(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    # A generator: the writer must not need the whole list
+    path = export_transactions((t for t in TRANSACTIONS), str(tmp_path / "out.xlsx"))
+    ws = openpyxl.load_workbook(path)["Transactions"]
+    rows = list(ws.iter_rows(values_only=True))
+    assert rows[0] == ("Date", "Description", "Amount", "Type", "Category")
+    assert rows[1][0].date() == date(2025, 1, 15)
+    assert rows[1][2] == 85.5
+    assert ws["A2"].number_format == "yyyy-mm-dd"
+    assert ws.freeze_panes == "A2"
+
+
+def test_parquet_export_in_row_groups(tmp_path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        pytest.skip(f"pyarrow unavailable: {e}")
+    from exports.writers import write_parquet
+
+    path = str(tmp_path / "out.parquet")
+    write_parquet(TRANSACTIONS * 5, path, batch_rows=4)
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_rows == 15
+    assert parquet.num_row_groups == 4
+    table = parquet.read()
+    assert table.column("amount").to_pylist()[:3] == [85.5, 1000.0, None]
+
+
+def test_failed_export_leaves_no_partial_file(tmp_path):
+    def broken():
+        yield TRANSACTIONS[0]
+        raise RuntimeError("source failed")
+
+    target = tmp_path / "out.csv"
+    target.write_text("previous export")
+    with pytest.raises(RuntimeError):
+        export_transactions(broken(), str(target), "csv")
+    assert target.read_text() == "previous export"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.csv"]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        export_transactions([], "out.pdf", "pdf")
@@ -0,0 +1,42 @@
+import asyncio
+from extraction.engine import ExtractionEngine
+
+PAGES = [
+    [f"2024-01-{page + 1:02d} Shop {page}-{row} {row + 1}.00" for row in range(3)]
+    for page in range(7)
+]
+
+
+def test_extract_returns_every_page_in_order(make_pdf):
+    path = make_pdf(PAGES)
+    engine = ExtractionEngine(max_workers=2, pages_per_task=2)
+    try:
+        transactions = asyncio.run(engine.extract(path))
+    finally:
+        engine.shutdown()
+
+    assert [t["description"] for t in transactions] == [
+        f"Shop {page}-{row}" for page in range(7) for row in range(3)
+    ]
+    assert transactions[0] == {"date": "2024-01-01", "description": "Shop 0-0", "amount": 1.0, "type": "debit"}
+
+
+def test_page_ranges_keep_every_worker_busy():
+    engine = ExtractionEngine(max_workers=4, pages_per_task=8)
+    assert engine._page_ranges(10) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+    assert engine._page_ranges(64) == [(start, start + 8) for start in range(0, 64, 8)]
+    assert engine._page_ranges(0) == []
+
+
+def test_stats_count_parsed_pages(make_pdf):
+    path = make_pdf(PAGES[:3])
+    engine = ExtractionEngine(max_workers=1, pages_per_task=1)
+    try:
+        asyncio.run(engine.extract(path))
+    finally:
+        engine.shutdown()
+
+    stats = engine.stats()
+    assert stats["pages_parsed"] == 3
+    assert stats["pool_size"] == 1
+    assert stats["queue_depth"] == 0 and stats["running_tasks"] == 0
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.core.config import settings
+from src.middleware import security
+from src.middleware.security import GDPRMiddleware, setup_security_middleware
+from src.services.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(security, "rate_limiter", RateLimiter(redis_url=""))
+    monkeypatch.setattr(security.security_service, "log_data_access", lambda **kw: None)
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/api/users/login")
+    async def login():
+        return {"token": "t"}
+
+    @app.api_route("/api/statements/upload", methods=["POST", "OPTIONS"])
+    async def upload():
+        return {"ok": True}
+
+    setup_security_middleware(app)
+    return TestClient(app)
+
+
+def test_requests_without_consent_are_refused(client):
+    response = client.post("/api/statements/upload")
+    assert response.status_code == 403
+    assert response.json() == {"detail": "GDPR consent required"}
+
+
+def test_consent_cookie_is_matched_exactly(client):
+    response = client.post("/api/statements/upload", headers={"Cookie": "theme=dark; gdpr_consent=accepted"})
+    assert response.status_code == 200
+    assert response.headers["x-data-processing-basis"] == "consent"
+    assert response.headers["x-data-retention-period"] == f"{settings.DATA_RETENTION_DAYS} days"
+    # Security headers come from the inner middleware
+    assert response.headers["x-frame-options"] == "DENY"
+    refused = client.post("/api/statements/upload", headers={"Cookie": "gdpr_consent=accepted_not"})
+    assert refused.status_code == 403
+
+
+def test_exempt_paths_and_preflights_pass(client):
+    assert client.get("/health").status_code == 200
+    assert client.post("/api/users/login").status_code == 200
+    assert client.options("/api/statements/upload").status_code == 200
+
+
+def test_exempt_paths_are_configurable():
+    middleware = GDPRMiddleware(None, exempt_paths=["/status"])
+    assert middleware.exempt_paths == frozenset({"/status"})
+    assert "/api/payments/webhook" in GDPRMiddleware(None).exempt_paths
+
+
+def test_app_does_not_require_consent_yet():
+    from src.main import app
+
+    # The frontend has no consent flow, so enforcing it would refuse every user
+    assert GDPRMiddleware not in [m.cls for m in app.user_middleware]
+    client = TestClient(app)
+    origin = settings.CORS_ORIGINS[0]
+    preflight = client.options(
+        "/api/statements/upload",
+        headers={"Origin": origin, "Access-Control-Request-Method": "POST"}
+    )
+    assert preflight.status_code == 200
+    assert preflight.headers["access-control-allow-origin"] == origin
+    # Without a token the API asks for credentials, not consent
+    assert client.get("/api/users/me", headers={"Origin": origin}).status_code == 401
\ No newline at end of file
@@ -0,0 +1,48 @@
+import json
+import asyncio
+import httpx
+import pytest
+from ai.http_client import AsyncHTTPPool
+from ai.cerebras_client import cerebras_client
+
+
+def test_one_keep_alive_client_per_provider():
+    pool = AsyncHTTPPool(max_connections=7, max_keepalive_connections=3, timeout=12, connect_timeout=2, http2=False)
+
+    async def run():
+        first = pool.client("https://api.cerebras.ai/v1")
+        assert pool.client("https://api.cerebras.ai/v1") is first
+        other = pool.client("https://openrouter.ai/api/v1")
+        assert other is not first
+        await pool.aclose()
+        assert first.is_closed and other.is_closed
+        # A closed pool hands out a fresh client instead of a dead one
+        reopened = pool.client("https://api.cerebras.ai/v1")
+        assert reopened is not first and not reopened.is_closed
+        await pool.aclose()
+
+    asyncio.run(run())
+    assert pool.limits.max_connections == 7
+    assert pool.limits.max_keepalive_connections == 3
+    assert pool.timeout.read == 12 and pool.timeout.connect == 2
+
+
+def test_cerebras_client_posts_through_the_pool(mock_http):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    mock_http(handler)
+    response = asyncio.run(cerebras_client.chat_completion([{"role": "user", "content": "hi"}], model="llama3.1-8b"))
+
+    assert response["choices"][0]["message"]["content"] == "ok"
+    assert str(requests[0].url) == "https://api.cerebras.ai/v1/chat/completions"
+    assert json.loads(requests[0].content)["model"] == "llama3.1-8b"
+
+
+def test_cerebras_client_raises_on_api_errors(mock_http):
+    mock_http(lambda request: httpx.Response(503, text="overloaded"))
+    with pytest.raises(Exception, match="Cerebras API error: 503 - overloaded"):
+        asyncio.run(cerebras_client.chat_completion([{"role": "user", "content": "hi"}]))
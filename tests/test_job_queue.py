@@ -0,0 +1,290 @@
+import asyncio
+import fakeredis.aioredis
+import pytest
+from src.core.config import settings
+from src.services import jobs
+from src.services.jobs import (
+    StatementJobQueue, PROCESSING_KEY, QUEUE_KEY, REQUEUE_SCRIPT, lease_key
+)
+
+
+@pytest.fixture
+def db(fake_db, monkeypatch):
+    monkeypatch.setattr(jobs, "supabase_pool", fake_db)
+    return fake_db
+
+
+def redis_queue(handler, monkeypatch, **kwargs):
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://test")
+    queue = StatementJobQueue(handler, backend="redis", **kwargs)
+    queue._redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    queue._requeue = queue._redis.register_script(REQUEUE_SCRIPT)
+    return queue
+
+
+def statement(db, job_id, status, file_id="u1_1", upload_date="2020-01-01T00:00:00+00:00"):
+    row = {
+        "id": job_id, "user_id": "u1", "status": status, "error_message": None,
+        "upload_date": upload_date, "processed_date": None,
+        "storage_path": "/uploads/a.pdf", "file_id": file_id, "content_hash": "abc",
+    }
+    db.tables.setdefault("bank_statements", []).append(row)
+    return row
+
+
+async def wait_for(predicate, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if await predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+async def status_of(queue, job_id):
+    job = await queue.get(job_id)
+    return job and job["status"]
+
+
+async def _is(queue, job_id, status):
+    return await status_of(queue, job_id) == status
+
+
+async def _empty(redis, key):
+    return await redis.llen(key) == 0
+
+
+def test_job_runs_and_records_status(db):
+    async def handler(job):
+        return {"file_id": job["file_id"], "transaction_count": 3}
+
+    async def run():
+        queue = StatementJobQueue(handler, workers=1, backend="memory")
+        await queue.start()
+        job = await queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10, "abc")
+        await wait_for(lambda: _is(queue, job["job_id"], "completed"))
+        await queue.stop()
+        return await queue.get(job["job_id"])
+
+    job = asyncio.run(run())
+    assert job["result"] == {"file_id": "u1_1", "transaction_count": 3}
+    row = db.tables["bank_statements"][0]
+    assert row["status"] == "completed"
+    assert row["file_id"] == "u1_1" and row["content_hash"] == "abc"
+    assert row["processed_date"] is not None
+
+
+def test_handler_failure_marks_error(db):
+    async def handler(job):
+        raise ValueError("unreadable PDF")
+
+    async def run():
+        queue = StatementJobQueue(handler, workers=1, backend="memory")
+        await queue.start()
+        job = await queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10)
+        await wait_for(lambda: _is(queue, job["job_id"], "error"))
+        await queue.stop()
+
+    asyncio.run(run())
+    row = db.tables["bank_statements"][0]
+    assert row["status"] == "error"
+    assert row["error_message"] == "unreadable PDF"
+
+
+def test_enqueue_raises_when_the_statement_cant_be_recorded(db):
+    db.fail = ConnectionError("database down")
+    queue = StatementJobQueue(lambda job: None, backend="memory")
+    with pytest.raises(ConnectionError):
+        asyncio.run(queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10))
+    assert queue._jobs == {}
+
+
+def test_enqueue_marks_the_row_failed_when_queueing_fails(db, monkeypatch):
+    queue = StatementJobQueue(lambda job: None, backend="memory")
+
+    async def broken_push(job_id):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(queue, "_push", broken_push)
+    with pytest.raises(ConnectionError):
+        asyncio.run(queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10))
+    assert db.tables["bank_statements"][0]["status"] == "error"
+
+
+def test_start_requeues_unfinished_statements(db):
+    statement(db, "s1", "pending")
+    statement(db, "s2", "processing")
+    statement(db, "s3", "completed")
+    statement(db, "s4", "pending", file_id=None)
+    ran = []
+
+    async def handler(job):
+        ran.append((job["job_id"], job["file_id"], job["file_path"], job["content_hash"]))
+        return {}
+
+    async def run():
+        queue = StatementJobQueue(handler, workers=1, backend="memory")
+        await queue.start()
+        await wait_for(lambda: _is(queue, "s2", "completed"))
+        await queue.stop()
+
+    asyncio.run(run())
+    assert sorted(ran) == [("s1", "u1_1", "/uploads/a.pdf", "abc"), ("s2", "u1_1", "/uploads/a.pdf", "abc")]
+    statuses = {row["id"]: row["status"] for row in db.tables["bank_statements"]}
+    assert statuses == {"s1": "completed", "s2": "completed", "s3": "completed", "s4": "pending"}
+
+
+def test_status_update_failure_releases_the_job(db, monkeypatch):
+    async def handler(job):
+        return {}
+
+    async def run():
+        queue = StatementJobQueue(handler, workers=1, backend="memory")
+        save = queue._save
+        failures = []
+
+        async def flaky_save(job):
+            if job["status"] == "processing" and not failures:
+                failures.append(job["job_id"])
+                raise ConnectionError("job store down")
+            await save(job)
+
+        monkeypatch.setattr(queue, "_save", flaky_save)
+        job = await queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10)
+        job_id = await queue._next_job_id()
+        assert job_id == job["job_id"]
+        with pytest.raises(ConnectionError):
+            await queue._process(job_id)
+        released = (await status_of(queue, job_id), queue._queue.qsize())
+        await queue._process(await queue._next_job_id())
+        return failures, released, await status_of(queue, job_id)
+
+    failures, released, final = asyncio.run(run())
+    assert len(failures) == 1
+    # The job went back to the queue instead of being lost with the worker
+    assert released == ("pending", 1)
+    assert final == "completed"
+
+
+def test_redis_job_is_acked_only_after_it_finishes(db, monkeypatch):
+    release = None
+
+    async def handler(job):
+        await release.wait()
+        return {"ok": True}
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        queue = redis_queue(handler, monkeypatch, workers=1, lease_ttl=30)
+        redis = queue._redis
+        await queue.start()
+        job = await queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10)
+        await wait_for(lambda: _is(queue, job["job_id"], "processing"))
+        in_flight = (await redis.lrange(PROCESSING_KEY, 0, -1), await redis.exists(lease_key(job["job_id"])))
+        release.set()
+        await wait_for(lambda: _is(queue, job["job_id"], "completed"))
+        await wait_for(lambda: _empty(redis, PROCESSING_KEY))
+        done = (await redis.exists(lease_key(job["job_id"])), await redis.llen(QUEUE_KEY))
+        await queue.stop()
+        return job["job_id"], in_flight, done
+
+    job_id, in_flight, done = asyncio.run(run())
+    assert in_flight == ([job_id], 1)
+    assert done == (0, 0)
+
+
+def test_redis_job_interrupted_by_shutdown_goes_back_to_the_queue(db, monkeypatch):
+    async def handler(job):
+        await asyncio.Event().wait()
+
+    async def run():
+        queue = redis_queue(handler, monkeypatch, workers=1, lease_ttl=30)
+        redis = queue._redis
+        await queue.start()
+        job = await queue.enqueue("u1", "u1_1", "/uploads/a.pdf", "a.pdf", 10)
+        await wait_for(lambda: _is(queue, job["job_id"], "processing"))
+        for task in queue._tasks:
+            task.cancel()
+        await asyncio.gather(*queue._tasks, return_exceptions=True)
+        queue._tasks = []
+        state = (
+            await redis.lrange(QUEUE_KEY, 0, -1),
+            await redis.llen(PROCESSING_KEY),
+            await redis.exists(lease_key(job["job_id"])),
+            await status_of(queue, job["job_id"]),
+        )
+        await queue.stop()
+        return job["job_id"], state
+
+    job_id, state = asyncio.run(run())
+    assert state == ([job_id], 0, 0, "pending")
+
+
+def test_reaper_requeues_jobs_whose_worker_died(db, monkeypatch):
+    async def run():
+        queue = redis_queue(lambda job: None, monkeypatch, lease_ttl=30)
+        redis = queue._redis
+        await redis.rpush(PROCESSING_KEY, "dead", "alive")
+        await redis.set(lease_key("alive"), "1", ex=30)
+        first = await queue.requeue_expired(set())
+        after_first = await redis.llen(QUEUE_KEY)
+        second = await queue.requeue_expired(first)
+        state = (await redis.lrange(QUEUE_KEY, 0, -1), await redis.lrange(PROCESSING_KEY, 0, -1))
+        await queue.stop()
+        return first, after_first, second, state
+
+    first, after_first, second, state = asyncio.run(run())
+    # A job is given one sweep to take its lease before it is requeued
+    assert first == {"dead"}
+    assert after_first == 0
+    assert second == set()
+    assert state == (["dead"], ["alive"])
+
+
+def test_duplicate_delivery_is_dropped_while_leased(db, monkeypatch):
+    ran = []
+
+    async def handler(job):
+        ran.append(job["job_id"])
+        return {}
+
+    async def run():
+        queue = redis_queue(handler, monkeypatch, lease_ttl=30)
+        redis = queue._redis
+        row = statement(db, "s1", "processing")
+        await queue._save(queue._job_from_row(row))
+        await redis.set(lease_key("s1"), "1", ex=30)
+        await redis.rpush(PROCESSING_KEY, "s1", "s1")
+        await queue._process("s1")
+        state = (await redis.llen(PROCESSING_KEY), await redis.exists(lease_key("s1")))
+        await queue.stop()
+        return state
+
+    assert asyncio.run(run()) == (1, 1)
+    assert ran == []
+
+
+def test_redis_recovery_skips_queued_and_recent_statements(db, monkeypatch):
+    statement(db, "queued", "pending")
+    statement(db, "running", "processing")
+    statement(db, "lost", "processing")
+    statement(db, "new", "pending", upload_date="2999-01-01T00:00:00+00:00")
+
+    async def run():
+        queue = redis_queue(lambda job: None, monkeypatch, lease_ttl=30)
+        redis = queue._redis
+        await redis.rpush(QUEUE_KEY, "queued")
+        await redis.rpush(PROCESSING_KEY, "running")
+        recovered = await queue.recover()
+        again = await queue.recover()
+        queued = await redis.lrange(QUEUE_KEY, 0, -1)
+        job = await queue.get("lost")
+        await queue.stop()
+        return recovered, again, queued, job
+
+    recovered, again, queued, job = asyncio.run(run())
+    assert recovered == 1
+    # Another replica starting at the same time leaves recovery to the first
+    assert again == 0
+    assert queued == ["lost", "queued"]
+    assert job["status"] == "pending" and job["file_path"] == "/uploads/a.pdf"
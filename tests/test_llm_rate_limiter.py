@@ -0,0 +1,91 @@
+import asyncio
+import fakeredis.aioredis
+import pytest
+from ai.rate_limiter import RateLimiter, TokenBucket, TOKEN_BUCKET_SCRIPT
+
+
+def test_token_bucket_reserves_and_reports_the_wait(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("ai.rate_limiter.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=1.0, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # Concurrent callers queue behind each other instead of sharing one slot
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+    now[0] += 10
+    assert bucket.reserve() == 0
+
+
+def test_acquire_awaits_instead_of_blocking(monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr("ai.rate_limiter.asyncio.sleep", fake_sleep)
+    limiter = RateLimiter(model_rate=12, provider_rate=600, burst=2, shared=False)
+
+    async def run():
+        return [await limiter.acquire("openrouter", "m") for _ in range(4)]
+
+    waits = asyncio.run(run())
+    assert waits[:2] == [0, 0]
+    assert waits[2] == pytest.approx(5.0, abs=0.05)
+    assert waits[3] == pytest.approx(10.0, abs=0.05)
+    assert slept == waits[2:]
+
+    stats = limiter.stats()
+    assert stats["acquired"] == 4 and stats["delayed"] == 2
+    assert stats["shared"] is False
+
+
+def test_models_have_independent_buckets(monkeypatch):
+    async def fake_sleep(seconds):
+        pass
+
+    monkeypatch.setattr("ai.rate_limiter.asyncio.sleep", fake_sleep)
+    # Buckets hold max(burst, 10s worth of requests): 1 for the model, 100 for the provider
+    limiter = RateLimiter(model_rate=6, provider_rate=600, burst=1, shared=False)
+
+    async def run():
+        return [
+            await limiter.acquire("openrouter", "a"),
+            await limiter.acquire("openrouter", "b"),
+            await limiter.acquire("openrouter", "a"),
+        ]
+
+    first_a, first_b, second_a = asyncio.run(run())
+    assert first_a == 0 and first_b == 0
+    assert second_a == pytest.approx(10.0, abs=0.1)
+
+
+def test_shared_buckets_in_redis_and_local_fallback():
+    redis = fakeredis.aioredis.FakeRedis()
+    limiter = RateLimiter(model_rate=6, provider_rate=600, burst=1, redis_url="redis://test", shared=True)
+    limiter._redis = redis
+    limiter._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    class BrokenScript:
+        async def __call__(self, **kwargs):
+            raise ConnectionError("down")
+
+    async def run():
+        waits = [await limiter._reserve("model:openrouter:m", 6) for _ in range(2)]
+        limiter._script = BrokenScript()
+        waits.append(await limiter._reserve("model:openrouter:m", 6))
+        return waits
+
+    first, second, fallback = asyncio.run(run())
+    assert first == 0
+    assert second == pytest.approx(10.0, abs=0.05)
+    # Redis is down: the local bucket (still full) takes over
+    assert fallback == 0
+    assert limiter.stats()["redis_errors"] == 1
+
+
+def test_burst_is_a_floor_on_bucket_capacity():
+    limiter = RateLimiter(model_rate=10, provider_rate=600, burst=4, shared=False)
+    assert limiter._limits(10) == (10 / 60, 4.0)
+    assert limiter._limits(600) == (10.0, 100.0)
@@ -0,0 +1,79 @@
+import time
+import asyncio
+import pytest
+from ai.orchestrator import AnalysisOrchestrator, AnalysisTask
+
+orchestrator = AnalysisOrchestrator(default_timeout=5)
+
+
+def run(tasks):
+    return asyncio.run(orchestrator.run(tasks))
+
+
+def delayed(value, seconds=0.1):
+    async def func(**inputs):
+        await asyncio.sleep(seconds)
+        return value(**inputs) if callable(value) else value
+    return func
+
+
+def test_independent_tasks_run_concurrently_and_dependents_get_results():
+    started = time.perf_counter()
+    result = run([
+        AnalysisTask("categories", delayed({"Dining": 10.0}, 0.2)),
+        AnalysisTask("summary", delayed("ok", 0.2)),
+        AnalysisTask(
+            "advice",
+            delayed(lambda categories: f"spend less on {list(categories)[0]}", 0.1),
+            depends_on=["categories"]
+        ),
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert result.results == {"categories": {"Dining": 10.0}, "summary": "ok", "advice": "spend less on Dining"}
+    assert result.errors == {}
+    # Longest chain (0.2 + 0.1), not the sum of every call (0.5)
+    assert elapsed < 0.45
+    assert set(result.timings) == {"categories", "summary", "advice"}
+
+
+def test_failures_and_timeouts_fall_back_to_defaults():
+    async def broken():
+        raise ValueError("bad JSON")
+
+    result = run([
+        AnalysisTask("categories", broken, default={}),
+        AnalysisTask("slow", delayed("late", 1), timeout=0.05, default="fallback"),
+        AnalysisTask("advice", delayed(lambda categories: len(categories)), depends_on=["categories"]),
+    ])
+
+    assert result.get("categories") == {}
+    assert result.get("slow") == "fallback"
+    assert result.get("advice") == 0
+    assert result.errors == {"categories": "bad JSON", "slow": "timed out after 0.05s"}
+
+
+def test_dependents_of_a_failed_task_without_default_fail_too():
+    async def broken():
+        raise RuntimeError("provider down")
+
+    result = run([
+        AnalysisTask("categories", broken),
+        AnalysisTask("advice", delayed("never"), depends_on=["categories"]),
+        AnalysisTask("advice_or_default", delayed("never"), depends_on=["categories"], default="generic advice"),
+    ])
+
+    assert result.errors["categories"] == "provider down"
+    assert result.errors["advice"] == "dependency 'categories' failed: provider down"
+    assert result.get("advice") is None
+    assert result.get("advice_or_default") == "generic advice"
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown task"):
+        run([AnalysisTask("advice", delayed("x"), depends_on=["missing"])])
+    with pytest.raises(ValueError, match="cycle"):
+        run([
+            AnalysisTask("a", delayed("x"), depends_on=["b"]),
+            AnalysisTask("b", delayed("y"), depends_on=["a"]),
+        ])
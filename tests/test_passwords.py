@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import pytest
+from src.services.passwords import LatencyHistogram, PasswordHasher, PasswordHasherBusy
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = LatencyHistogram(buckets=(10, 100))
+    for ms in (5, 10, 50, 500):
+        histogram.observe(ms)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets_ms"] == {"10": 2, "100": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["avg_ms"] == 141.25
+
+
+def test_hash_and_verify_off_the_loop():
+    hasher = PasswordHasher(max_workers=2, max_queue=4)
+
+    async def run():
+        hashed = await hasher.hash("correct horse")
+        return hashed, await hasher.verify("correct horse", hashed), await hasher.verify("wrong", hashed)
+
+    try:
+        hashed, good, bad = asyncio.run(run())
+    except Exception as e:
+        pytest.skip(f"bcrypt backend unavailable: {e}")
+    finally:
+        hasher.shutdown()
+    assert hashed.startswith("$2")
+    assert (good, bad) == (True, False)
+    stats = hasher.stats()
+    assert stats["hash"]["count"] == 1
+    assert stats["verify"]["count"] == 2
+
+
+def test_calls_beyond_the_queue_are_rejected():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.create_task(hasher._run("verify", release.wait))
+        queued = asyncio.create_task(hasher._run("verify", release.wait))
+        while hasher._queued < 1:
+            await asyncio.sleep(0.001)
+        with pytest.raises(PasswordHasherBusy) as busy:
+            await hasher._run("verify", release.wait)
+        stats = hasher.stats()
+        release.set()
+        await asyncio.gather(running, queued)
+        return busy.value, stats
+
+    try:
+        busy, stats = asyncio.run(run())
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert busy.retry_after == 1
+    assert stats["running"] == 1
+    assert stats["queue_depth"] == 1
+    assert stats["rejected"] == 1
+    assert hasher.stats()["queue_wait"]["count"] == 2
+
+
+def test_loop_keeps_running_while_hashing():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        hashing = asyncio.create_task(hasher._run("hash", release.wait))
+        # The loop is free while the thread blocks
+        await asyncio.sleep(0.01)
+        ticked = not hashing.done()
+        release.set()
+        await hashing
+        return ticked
+
+    try:
+        assert asyncio.run(run()) is True
+    finally:
+        release.set()
+        hasher.shutdown()
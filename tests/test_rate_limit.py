@@ -0,0 +1,154 @@
+import asyncio
+import fakeredis.aioredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from src.core.config import settings
+from src.middleware import security
+from src.middleware.security import SecurityMiddleware
+from src.services.rate_limit import GCRA_SCRIPT, LocalGCRA, RateLimiter
+
+CLASSES = {"auth": {"requests": 2, "period": 60}}
+ROUTES = {"/api/users/login": "auth"}
+
+
+def test_local_gcra_spaces_requests(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.rate_limit.time.monotonic", lambda: now[0])
+    gcra = LocalGCRA()
+    assert gcra.check("k", 2, 60) == (True, 1, 0.0)
+    assert gcra.check("k", 2, 60) == (True, 0, 0.0)
+    allowed, _, retry_after = gcra.check("k", 2, 60)
+    assert not allowed and retry_after == 30
+    # One emission interval later exactly one more request fits; no fixed-window reset burst
+    now[0] += 30
+    assert gcra.check("k", 2, 60)[0]
+    assert not gcra.check("k", 2, 60)[0]
+
+
+def test_requests_are_classed_by_longest_prefix():
+    limiter = RateLimiter(classes=CLASSES, routes={"/api/users/": "auth", "/api/users/me": "default"}, redis_url="")
+    assert limiter.limit_class("/api/users/login") == "auth"
+    assert limiter.limit_class("/api/users/me") == "default"
+    assert limiter.limit_class("/health") == "default"
+
+
+def test_clients_are_keyed_by_token_subject_else_ip():
+    limiter = RateLimiter(classes=CLASSES, routes=ROUTES, redis_url="")
+    token = jwt.encode({"sub": "a@example.com"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    assert limiter.client_key(f"Bearer {token}", "1.2.3.4") == "user:a@example.com"
+    assert limiter.client_key("Bearer forged", "1.2.3.4") == "ip:1.2.3.4"
+    assert limiter.client_key(None, None) == "ip:unknown"
+
+
+def test_redis_gcra_is_shared_by_workers():
+    redis = fakeredis.aioredis.FakeRedis()
+    workers = [RateLimiter(classes=CLASSES, routes=ROUTES, redis_url="redis://test") for _ in range(2)]
+    for limiter in workers:
+        limiter._redis = redis
+        limiter._script = redis.register_script(GCRA_SCRIPT)
+
+    async def run():
+        return [await limiter.check("/api/users/login", None, "1.2.3.4") for limiter in (*workers, workers[0])]
+
+    first, second, third = asyncio.run(run())
+    assert (first.allowed, first.remaining) == (True, 1)
+    assert (second.allowed, second.remaining) == (True, 0)
+    assert not third.allowed
+    assert 29 < third.retry_after <= 30
+    assert workers[0].stats()["local_checks"] == 0
+
+
+def test_redis_errors_fall_back_to_local_limits():
+    limiter = RateLimiter(classes=CLASSES, routes=ROUTES, redis_url="redis://test")
+
+    async def broken(keys, args):
+        raise ConnectionError("redis down")
+
+    limiter._script = broken
+    results = asyncio.run(limiter.check("/api/users/login", None, "1.2.3.4"))
+    assert results.allowed
+    stats = limiter.stats()
+    assert stats["redis_errors"] == 1 and stats["local_checks"] == 1
+    assert stats["shared"] is False
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(security, "rate_limiter", RateLimiter(classes=CLASSES, routes=ROUTES, redis_url=""))
+    logged = []
+    monkeypatch.setattr(security.security_service, "log_data_access", lambda **kw: logged.append(kw))
+    app = FastAPI()
+
+    @app.get("/api/users/me")
+    async def me():
+        return {"ok": True}
+
+    @app.post("/api/users/login")
+    async def login():
+        return {"ok": True}
+
+    app.add_middleware(SecurityMiddleware)
+    client = TestClient(app)
+    client.logged = logged
+    return client
+
+
+def test_middleware_adds_security_and_limit_headers(client):
+    response = client.get("/api/users/me")
+    assert response.status_code == 200
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["x-ratelimit-limit"] == str(settings.RATE_LIMIT_REQUESTS)
+
+
+def test_middleware_rejects_over_the_limit(client):
+    statuses = [client.post("/api/users/login").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    response = client.post("/api/users/login")
+    assert response.headers["retry-after"] == "30"
+    assert response.headers["x-ratelimit-remaining"] == "0"
+    # Only requests that reached the app are audited
+    assert [entry["action"] for entry in client.logged] == ["POST", "POST"]
+
+
+def test_app_mounts_the_security_middleware():
+    from src.main import app
+
+    assert SecurityMiddleware in [m.cls for m in app.user_middleware]
+
+
+def test_access_log_records_the_authenticated_user(monkeypatch):
+    from fastapi import Depends
+    from src.models.schemas import User
+    from src.services.auth import auth_service
+
+    monkeypatch.setattr(security, "rate_limiter", RateLimiter(redis_url=""))
+    logged = []
+    monkeypatch.setattr(security.security_service, "log_data_access", lambda **kw: logged.append(kw))
+    user = User(id="u1", email="a@example.com", credits=1, created_at="2025-01-01T00:00:00")
+
+    async def authenticated(email):
+        return user if email == user.email else None
+
+    monkeypatch.setattr(auth_service.user_service, "get_authenticated_user", authenticated)
+    app = FastAPI()
+
+    @app.post("/api/statements/upload")
+    async def upload(current_user: User = Depends(auth_service.get_current_user)):
+        return {"ok": True}
+
+    @app.post("/api/users/signup")
+    async def signup():
+        return {"ok": True}
+
+    app.add_middleware(SecurityMiddleware)
+    client = TestClient(app)
+    token = jwt.encode({"sub": user.email}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    assert client.post("/api/statements/upload", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert client.post("/api/users/signup").status_code == 200
+    assert [(entry["user_id"], entry["data_type"]) for entry in logged] == [
+        ("u1", "/api/statements/upload"),
+        (None, "/api/users/signup"),
+    ]
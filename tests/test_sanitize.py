@@ -0,0 +1,69 @@
+from typing import Optional
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from src.core.sanitize import SanitizedStr, sanitize_fields, sanitize_text
+from src.middleware.sanitize import SanitizationMiddleware
+
+
+def test_markup_free_text_is_returned_as_is():
+    text = "Salary January 2025"
+    assert sanitize_text(text) is text
+
+
+def test_markup_is_escaped():
+    assert sanitize_text("<script>alert(1)</script>") == "&lt;script&gt;alert(1)&lt;/script&gt;"
+    assert sanitize_text("<b>bold</b>") == "<b>bold</b>"
+
+
+def test_sanitize_fields_only_touches_named_strings():
+    data = {"name": "<script>x</script>", "note": "<script>y</script>", "count": 3}
+    sanitize_fields(data, ["name", "count", "missing"])
+    assert data["name"] == "&lt;script&gt;x&lt;/script&gt;"
+    assert data["note"] == "<script>y</script>"
+    assert data["count"] == 3
+
+
+def make_client():
+    app = FastAPI()
+
+    class Body(BaseModel):
+        title: SanitizedStr
+        raw: str
+
+    @app.get("/search")
+    async def search(q: str = "", other: Optional[str] = None):
+        return {"q": q, "other": other}
+
+    @app.post("/items")
+    async def items(body: Body):
+        return body.model_dump()
+
+    app.add_middleware(SanitizationMiddleware, fields={"/search": ["q"]})
+    return TestClient(app)
+
+
+def test_middleware_cleans_opted_in_query_parameters():
+    client = make_client()
+    response = client.get("/search", params={"q": "<script>x</script>", "other": "<i>y</i>"})
+    assert response.json() == {"q": "&lt;script&gt;x&lt;/script&gt;", "other": "<i>y</i>"}
+
+
+def test_query_without_markup_is_passed_through():
+    client = make_client()
+    assert client.get("/search?q=a%20b&other=c").json() == {"q": "a b", "other": "c"}
+
+
+def test_sanitized_body_fields_are_cleaned_during_validation():
+    client = make_client()
+    response = client.post("/items", json={"title": "<script>x</script>", "raw": "<script>y</script>"})
+    assert response.json() == {"title": "&lt;script&gt;x&lt;/script&gt;", "raw": "<script>y</script>"}
+
+
+def test_app_mounts_the_sanitization_middleware():
+    from src.main import app
+
+    assert SanitizationMiddleware in [m.cls for m in app.user_middleware]
+    # The AI routes take the model name as a query parameter
+    middleware = SanitizationMiddleware(app)
+    assert "model_name" in middleware._fields_for("/api/ai/analyze")
@@ -0,0 +1,61 @@
+import pytest
+from analytics.savings import SavingsCalculator, classify_category
+from analytics.table import TransactionTable
+
+
+@pytest.mark.parametrize("category, expected", [
+    ("Rent", "essential"),
+    ("Utilities", "essential"),
+    ("Groceries", "essential"),
+    ("Gas & Fuel", "essential"),
+    ("Taxes", "essential"),
+    ("Loans", "essential"),
+    ("Food & Dining", "discretionary"),
+    ("Restaurants", "discretionary"),
+    ("Airtime/Data", "discretionary"),
+    ("Salary", None),
+    ("Savings", None),
+    ("M-Pesa Transfers", None),
+    ("Miscellaneous", "other"),
+    # Substrings of longer words don't count
+    ("Taxi", "other"),
+    ("Las Vegas Trip", "other"),
+    ("Parenting", "other"),
+    ("Datacenter Fees", "other"),
+    ("Giftcards", "other"),
+])
+def test_classify_category_matches_whole_words(category, expected):
+    assert classify_category(category) == expected
+
+
+def test_matrix_uses_class_rates():
+    calculator = SavingsCalculator(annual_returns=(0.0, 0.0, 0.0), horizon_years=1)
+    matrix = calculator.calculate({"Rent": 1000.0, "Restaurants": 200.0, "Taxi": 100.0, "Salary": 5000.0})
+
+    # Rent at 2/5/10%, restaurants at 10/20/35%, taxi ("other") at 5/10/20%; salary is skipped
+    assert matrix["conservative"]["monthly_savings"] == 45.0
+    assert matrix["moderate"]["monthly_savings"] == 100.0
+    assert matrix["aggressive"]["monthly_savings"] == 190.0
+    assert matrix["moderate"]["annual_savings"] == 1200.0
+    assert matrix["moderate"]["projected_value"] == 1200.0
+
+
+def test_projection_compounds_monthly():
+    calculator = SavingsCalculator(
+        reduction_rates={"other": (1.0, 1.0, 1.0)}, annual_returns=(12.0, 0.0, 0.0), horizon_years=1
+    )
+    matrix = calculator.calculate({"Misc": 100.0})
+    assert matrix["conservative"]["projected_value"] == round(100 * ((1.01 ** 12 - 1) / 0.01), 2)
+
+
+def test_from_transactions_averages_over_the_period():
+    transactions = [
+        {"date": "2025-01-01", "amount": 600, "type": "debit", "category": "Rent"},
+        {"date": "2025-03-02", "amount": 600, "type": "debit", "category": "Rent"},
+        {"date": "2025-02-01", "amount": 900, "type": "credit", "category": "Salary"},
+    ]
+    calculator = SavingsCalculator(annual_returns=(0.0, 0.0, 0.0))
+    spend = calculator.monthly_spend(TransactionTable.from_records(transactions))
+    assert list(spend) == ["Rent"]
+    assert spend["Rent"] == pytest.approx(1200 / (60 / (365.25 / 12)))
+    assert calculator.from_transactions(transactions)["moderate"]["monthly_savings"] == round(spend["Rent"] * 0.05, 2)
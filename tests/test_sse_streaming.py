@@ -0,0 +1,165 @@
+import asyncio
+import json
+import httpx
+import pytest
+from ai.openrouter_client import OpenRouterClient
+from ai.response_cache import CompletionCache
+from ai.streaming import SSEDecoder, format_sse
+from src.api.routes import ai as ai_routes
+from src.models.schemas import User
+from src.services import ai as ai_service_module
+
+MESSAGES = [{"role": "user", "content": "Advise me"}]
+
+
+def completion_chunks(*deltas, error=None):
+    events = [{"choices": [{"delta": {"content": delta}}]} for delta in deltas]
+    if error:
+        events.append({"error": {"message": error}})
+    return b"".join(f"data: {json.dumps(e)}\n\n".encode() for e in events) + b"data: [DONE]\n\n"
+
+
+def streamed(body, split=7):
+    async def chunks():
+        # Arbitrary network-sized pieces that cut events in half
+        for start in range(0, len(body), split):
+            yield body[start:start + split]
+    return httpx.Response(200, content=chunks())
+
+
+@pytest.fixture
+def client():
+    client = OpenRouterClient()
+    client.cache = CompletionCache(ttl=60, redis_url="")
+    return client
+
+
+def collect(iterator):
+    async def run():
+        return [delta async for delta in iterator]
+    return asyncio.run(run())
+
+
+def test_decoder_yields_events_split_across_chunks():
+    async def chunks():
+        for piece in (b"event: tok", b"en\ndata: {\"a\"", b": 1}\n", b"\n: comment\n\ndata: x\r\n\r\n"):
+            yield piece
+
+    async def run():
+        return [(e.event, e.data) async for e in SSEDecoder().aiter_bytes(chunks())]
+
+    assert asyncio.run(run()) == [("token", '{"a": 1}'), (None, "x")]
+
+
+def test_format_sse():
+    assert format_sse({"text": "hi"}, event="token") == 'event: token\ndata: {"text": "hi"}\n\n'
+    assert format_sse("a\nb") == "data: a\ndata: b\n\n"
+
+
+def test_stream_yields_deltas_and_caches_the_completion(mock_http, client):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        assert json.loads(request.content)["stream"] is True
+        return streamed(completion_chunks("Save ", "more."))
+
+    mock_http(handler)
+    first = collect(client.stream_chat_completion(MESSAGES, model="llama3.1-8b"))
+    second = collect(client.stream_chat_completion(MESSAGES, model="llama3.1-8b"))
+    assert first == ["Save ", "more."]
+    # A repeated prompt is served from the cache in one piece
+    assert second == ["Save more."]
+    assert len(calls) == 1
+
+
+def test_stream_falls_back_before_the_first_token(mock_http, client):
+    def handler(request):
+        if request.url.host == "openrouter.ai":
+            return httpx.Response(503, text="overloaded")
+        return streamed(completion_chunks("From ", "Cerebras"))
+
+    mock_http(handler)
+    assert collect(client.stream_chat_completion(MESSAGES, model="llama3.1-8b")) == ["From ", "Cerebras"]
+
+
+def test_stream_does_not_restart_after_text_was_sent(mock_http, client):
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        return streamed(completion_chunks("Partial", error="connection reset"))
+
+    mock_http(handler)
+    received = []
+
+    async def run():
+        async for delta in client.stream_chat_completion(MESSAGES, model="llama3.1-8b"):
+            received.append(delta)
+
+    with pytest.raises(Exception, match="connection reset"):
+        asyncio.run(run())
+    assert received == ["Partial"]
+    assert hosts == ["openrouter.ai"]
+
+
+def test_service_streams_advice_through_the_shared_client(mock_http, client, monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return streamed(completion_chunks("Cut ", "dining."))
+
+    mock_http(handler)
+    monkeypatch.setattr(ai_service_module, "openrouter_client", client)
+    service = ai_service_module.AIService()
+    matrix = {"moderate": {"monthly_savings": 10.0}}
+
+    first = collect(service.stream_advice({"Dining": 50.0}, matrix, "llama3.1-8b"))
+    second = collect(service.stream_advice({"Dining": 50.0}, matrix, "llama3.1-8b"))
+    assert first == ["Cut ", "dining."]
+    assert second == ["Cut dining."]
+    assert len(calls) == 1
+    assert client.cache.stats()["local_hits"] == 1
+
+
+def read_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+USER = User(id="u1", email="a@example.com", credits=1, created_at="2025-01-01T00:00:00")
+TRANSACTIONS = [{"date": "2025-01-05", "description": "Cafe", "amount": 50, "type": "debit", "category": "Dining"}]
+
+
+def stream_route(monkeypatch, client):
+    monkeypatch.setattr(ai_service_module, "openrouter_client", client)
+
+    async def run():
+        response = await ai_routes.stream_analysis(
+            TRANSACTIONS, {"Dining": 50.0}, "llama3.1-8b", current_user=USER
+        )
+        body = "".join([chunk async for chunk in response.body_iterator])
+        return response, body
+    return asyncio.run(run())
+
+
+def test_analysis_stream_sends_matrix_then_tokens(mock_http, client, monkeypatch):
+    mock_http(lambda request: streamed(completion_chunks("Cut ", "dining.")))
+    response, body = stream_route(monkeypatch, client)
+    assert response.media_type == "text/event-stream"
+    events = read_events(body)
+    assert [name for name, _ in events] == ["savings_matrix", "token", "token", "done"]
+    assert "moderate" in events[0][1]["savings_matrix"]
+    assert "".join(data["text"] for name, data in events if name == "token") == "Cut dining."
+
+
+def test_analysis_stream_reports_provider_failure(mock_http, client, monkeypatch):
+    mock_http(lambda request: httpx.Response(500, text="down"))
+    response, body = stream_route(monkeypatch, client)
+    events = read_events(body)
+    assert [name for name, _ in events] == ["savings_matrix", "error"]
+    assert events[1][1]["fallback"] == ai_routes.DEFAULT_ADVICE
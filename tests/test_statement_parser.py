@@ -0,0 +1,150 @@
+import os
+import pytest
+from extraction.parser import template_index
+from extraction.templates import GENERIC_TEMPLATE, group_lines, parse_amount, parse_date
+
+PAGE_WIDTH = 600.0
+SAMPLE_STATEMENT = os.path.join(os.path.dirname(__file__), "..", "backend", "DOC-20250211-WA000.pdf")
+
+
+def words(*cells, top=100.0):
+    """pdfplumber-style words for one line, given (x0, text) pairs"""
+    return [
+        {"text": text, "x0": x0, "x1": x0 + 6 * len(text), "top": top + (i % 2) * 0.5}
+        for i, (x0, text) in enumerate(cells)
+    ]
+
+
+def test_amounts_and_dates():
+    assert parse_amount("1,234.50") == 1234.5
+    assert parse_amount("(80.00)") == -80.0
+    assert parse_amount("-80.00") == -80.0
+    assert parse_amount("n/a") is None
+    assert parse_date("03/02/2024", ("%Y-%m-%d", "%d/%m/%Y")) == "2024-02-03"
+    assert parse_date("yesterday", ("%Y-%m-%d",)) is None
+
+
+def test_detects_bank_from_header_markers():
+    assert template_index.detect("Safaricom M-PESA STATEMENT Customer Name") == "mpesa"
+    assert template_index.detect("mpesa full statement") == "mpesa"
+    assert template_index.detect("First National Bank cheque account") == GENERIC_TEMPLATE
+    assert template_index.get("unknown").name == GENERIC_TEMPLATE
+
+
+def test_group_lines_orders_words_left_to_right():
+    line = [{"text": "b", "x0": 50, "x1": 56, "top": 10.4}, {"text": "a", "x0": 10, "x1": 16, "top": 10}]
+    other = [{"text": "c", "x0": 10, "x1": 16, "top": 30}]
+    assert [[w["text"] for w in l] for l in group_lines(other + line)] == [["a", "b"], ["c"]]
+
+
+def test_generic_lines_with_credit_markers_and_balances():
+    template = template_index.get(GENERIC_TEMPLATE)
+    lines = [
+        words((10, "Opening"), (60, "balance"), (200, "100.00"), top=10),
+        words((10, "2024-01-05"), (80, "Coffee"), (130, "Shop"), (300, "4.50"), (400, "95.50"), top=30),
+        words((10, "06/01/2024"), (80, "Salary"), (300, "1,000.00"), (360, "CR"), top=50),
+    ]
+    assert template.parse_lines(lines, PAGE_WIDTH) == [
+        {"date": "2024-01-05", "description": "Coffee Shop", "amount": 4.5, "type": "debit"},
+        {"date": "2024-01-06", "description": "Salary", "amount": 1000.0, "type": "credit"},
+    ]
+
+
+def test_mpesa_table_with_wrapped_details_and_failed_rows():
+    template = template_index.get("mpesa")
+    header = words(
+        (0, "Receipt"), (46, "No."), (80, "Completion"), (144, "Time"), (200, "Details"),
+        (330, "Transaction"), (400, "Status"), (450, "Paid"), (478, "In"), (500, "Withdrawn"), (560, "Balance"),
+        top=10
+    )
+    lines = [
+        header,
+        words((0, "TH12ABC3DE"), (80, "2024-02-01"), (142, "08:15:00"), (200, "Pay"), (222, "Bill"),
+              (330, "Completed"), (500, "1,200.00"), (565, "3,800.00"), top=30),
+        words((200, "to"), (215, "KPLC"), (245, "Prepaid"), top=42),
+        words((0, "TH12ABC3DF"), (80, "2024-02-02"), (142, "09:00:00"), (200, "Funds"), (236, "received"),
+              (330, "Completed"), (450, "5,000.00"), (565, "8,800.00"), top=60),
+        words((0, "TH12ABC3DG"), (80, "2024-02-03"), (142, "10:00:00"), (200, "Airtime"),
+              (330, "Failed"), (500, "50.00"), (565, "8,800.00"), top=80),
+        words((0, "Page"), (30, "1"), (40, "of"), (55, "3"), top=100),
+    ]
+    assert template.parse_lines(lines, PAGE_WIDTH) == [
+        {"date": "2024-02-01", "description": "Pay Bill to KPLC Prepaid", "amount": 1200.0, "type": "debit"},
+        {"date": "2024-02-02", "description": "Funds received", "amount": 5000.0, "type": "credit"},
+    ]
+
+
+def test_mpesa_header_with_wrapped_label_and_stray_continuation_words():
+    template = template_index.get("mpesa")
+    lines = [
+        words((0, "Receipt"), (46, "No"), (80, "Completion"), (144, "Time"), (200, "Details"),
+              (360, "Transaction"), (420, "Status"), (450, "Paid"), (478, "in"), (500, "Withdraw"),
+              (560, "Balance"), top=10),
+        words((500, "n"), top=18),
+        words((0, "TH12ABC3DE"), (80, "2024-02-01"), (142, "08:15:00"), (200, "Salary"), (240, "Payment"),
+              (300, "from"), (330, "NCBA"), (360, "COMPLETED"), (450, "2,000.00"), (500, "0.00"),
+              (560, "5,000.00"), top=30),
+        # Wrapped text under the status column is dropped instead of failing the row
+        words((200, "via"), (230, "API."), (290, "conversation"), (380, "ID"), (395, "is"), top=42),
+        words((0, "Disclaimer:"), (80, "This"), (200, "record"), (360, "is"), (450, "produced"), top=60),
+        words((0, "please"), (200, "contact"), (450, "Customer"), top=72),
+    ]
+    assert template.parse_lines(lines, PAGE_WIDTH) == [
+        {"date": "2024-02-01", "description": "Salary Payment from NCBA via API. conversation",
+         "amount": 2000.0, "type": "credit"},
+    ]
+
+
+def test_sample_mpesa_statement_matches_its_own_summary():
+    import pdfplumber
+    from extraction.parser import detect_template, parse_page
+
+    with pdfplumber.open(SAMPLE_STATEMENT) as pdf:
+        name = detect_template(pdf)
+        transactions = [t for page in pdf.pages for t in parse_page(name, page)]
+    assert name == "mpesa"
+    # Every COMPLETED row, adding up to the statement's TOTAL line
+    assert len(transactions) == 308
+    assert round(sum(t["amount"] for t in transactions if t["type"] == "credit"), 2) == 199121.74
+    assert round(sum(t["amount"] for t in transactions if t["type"] == "debit"), 2) == 199716.41
+    salaries = [t for t in transactions if t["description"].startswith("Salary Payment")]
+    assert len(salaries) == 23 and all(t["type"] == "credit" for t in salaries)
+    assert transactions[1] == {
+        "date": "2025-02-11",
+        "description": "Salary Payment from 504900 - NCBA BANK via API. Original conversation ID is FTC250211WGYA.",
+        "amount": 2000.0,
+        "type": "credit",
+    }
+
+
+def test_generic_pdf_end_to_end(make_pdf):
+    import pdfplumber
+    from extraction.parser import detect_template, parse_page
+
+    path = make_pdf([["Statement of account", "2024-04-01 Groceries 23.10", "2024-04-02 Refund 5.00 CR"]])
+    with pdfplumber.open(path) as pdf:
+        name = detect_template(pdf)
+        transactions = parse_page(name, pdf.pages[0])
+    assert name == GENERIC_TEMPLATE
+    assert [(t["description"], t["type"]) for t in transactions] == [("Groceries", "debit"), ("Refund", "credit")]
+
+
+def test_incomplete_templates_are_rejected_when_registered():
+    from extraction.templates import BankTemplate, register_template
+
+    class NoBuilder(BankTemplate):
+        name = "no_builder"
+        columns = (("date", "Date", 0.0),)
+
+    class NoColumns(BankTemplate):
+        name = "no_columns"
+
+        def build_transaction(self, cells):
+            return None
+
+    for template_class in (NoBuilder, NoColumns):
+        with pytest.raises(TypeError):
+            register_template(template_class)
+        with pytest.raises(TypeError):
+            template_class()
+    assert "no_builder" not in template_index.names()
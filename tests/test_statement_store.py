@@ -0,0 +1,92 @@
+import os
+import time
+import asyncio
+from extraction.store import ParsedStatementStore, from_columns, hash_file, to_columns
+
+TRANSACTIONS = [
+    {"date": "2024-01-0%d" % (i % 9 + 1), "description": f"Shop {i}", "amount": float(i), "type": "debit"}
+    for i in range(8)
+]
+
+
+def test_columns_round_trip_with_dictionary_encoding():
+    packed = to_columns(TRANSACTIONS)
+    assert packed["dictionaries"]["type"] == ["debit"]
+    assert packed["columns"]["type"] == [0] * 8
+    assert from_columns(packed) == TRANSACTIONS
+
+
+def test_put_get_and_miss(tmp_path):
+    store = ParsedStatementStore(root_dir=str(tmp_path))
+    assert store.get("missing") is None
+    store.put("abc", TRANSACTIONS)
+    assert store.get("abc") == TRANSACTIONS
+    store.delete("abc")
+    assert store.get("abc") is None
+
+
+def test_get_or_extract_parses_each_file_once(tmp_path):
+    store = ParsedStatementStore(root_dir=str(tmp_path / "store"))
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4 statement")
+    calls = []
+
+    async def extract(path):
+        calls.append(path)
+        return TRANSACTIONS
+
+    for _ in range(3):
+        assert asyncio.run(store.get_or_extract(str(pdf), extract)) == TRANSACTIONS
+    assert calls == [str(pdf)]
+    assert store.get(hash_file(str(pdf))) == TRANSACTIONS
+
+
+def test_stream_is_stored_only_when_complete(tmp_path):
+    store = ParsedStatementStore(root_dir=str(tmp_path / "store"))
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.4 statement")
+    digest = hash_file(str(pdf))
+
+    async def stream(path):
+        for transaction in TRANSACTIONS:
+            yield transaction
+
+    async def take_first():
+        async for transaction in store.stream_or_extract(str(pdf), stream):
+            return transaction
+
+    asyncio.run(take_first())
+    assert store.get(digest) is None
+
+    async def take_all():
+        return [t async for t in store.stream_or_extract(str(pdf), stream)]
+
+    assert asyncio.run(take_all()) == TRANSACTIONS
+    assert store.get(digest) == TRANSACTIONS
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = ParsedStatementStore(root_dir=str(tmp_path), max_entries=2)
+    store.put("a", TRANSACTIONS)
+    store.put("b", TRANSACTIONS)
+    past = time.time() - 60
+    os.utime(store._entry_path("a"), (past, past))
+    os.utime(store._entry_path("b"), (past - 60, past - 60))
+
+    store.put("c", TRANSACTIONS)
+    assert store.get("b") is None
+    assert store.get("a") == TRANSACTIONS
+    assert store.get("c") == TRANSACTIONS
+
+
+def test_entries_are_keyed_by_parser_version(tmp_path):
+    old = ParsedStatementStore(root_dir=str(tmp_path), version=1)
+    new = ParsedStatementStore(root_dir=str(tmp_path), version=2)
+    old.put("abc", TRANSACTIONS)
+    # Parses from an older parser are re-extracted, not served
+    assert new.get("abc") is None
+    new.put("abc", TRANSACTIONS[:1])
+    assert old.get("abc") == TRANSACTIONS
+
+    new.delete("abc")
+    assert old.get("abc") is None
@@ -0,0 +1,52 @@
+import asyncio
+from extraction.engine import ExtractionEngine, iter_transactions
+
+PAGES = [
+    [f"2024-03-{page + 1:02d} Store {page}-{row} {row + 1}.50" for row in range(2)]
+    for page in range(6)
+]
+EXPECTED = [f"Store {page}-{row}" for page in range(6) for row in range(2)]
+
+
+def test_iter_transactions_yields_page_by_page(make_pdf):
+    path = make_pdf(PAGES)
+    transactions = iter_transactions(path)
+    assert next(transactions)["description"] == "Store 0-0"
+    assert [t["description"] for t in transactions] == EXPECTED[1:]
+
+
+def test_stream_yields_in_page_order(make_pdf):
+    path = make_pdf(PAGES)
+    engine = ExtractionEngine(max_workers=2, pages_per_task=1)
+
+    async def collect():
+        return [t["description"] async for t in engine.stream(path)]
+
+    try:
+        assert asyncio.run(collect()) == EXPECTED
+    finally:
+        engine.shutdown()
+    assert engine.stats()["pages_parsed"] == 6
+
+
+def test_closing_the_stream_early_drops_queued_pages(make_pdf):
+    path = make_pdf(PAGES)
+    engine = ExtractionEngine(max_workers=1, pages_per_task=1)
+
+    async def first_page():
+        pages = engine.iter_pages(path)
+        number, transactions, _ = await pages.__anext__()
+        await pages.aclose()
+        await asyncio.sleep(0.2)
+        return number, transactions
+
+    try:
+        number, transactions = asyncio.run(first_page())
+    finally:
+        engine.shutdown()
+    assert number == 0
+    assert [t["description"] for t in transactions] == EXPECTED[:2]
+    # Ranges parsed ahead of the consumer were cancelled, not left queued
+    stats = engine.stats()
+    assert stats["pages_parsed"] == 1
+    assert stats["queue_depth"] == 0 and stats["running_tasks"] == 0
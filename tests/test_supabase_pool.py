@@ -0,0 +1,75 @@
+import asyncio
+import json
+import httpx
+from src.services.supabase import SupabasePool
+
+
+def pool_with(handler, **kwargs):
+    pool = SupabasePool(url="http://supabase.test/", key="service-key", **kwargs)
+    pool.db.session._transport = httpx.MockTransport(handler)
+    return pool
+
+
+def test_clients_share_one_bounded_pool():
+    pool = SupabasePool(url="http://supabase.test/", key="service-key", max_connections=3)
+    db = pool.db
+    assert pool.db is db
+    assert str(db.session.base_url) == "http://supabase.test/rest/v1/"
+    assert db.session._transport._pool._max_connections == 3
+    assert pool.auth._http_client._transport._pool._max_connections == 3
+    assert pool.auth is pool.auth
+
+
+def test_requests_carry_the_service_key():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path.endswith("/rpc/apply_credit_change"):
+            return httpx.Response(200, json=[{"status": "applied", "balance": 2}])
+        return httpx.Response(200, json=[{"id": "u1", "credits": 1}])
+
+    pool = pool_with(handler)
+
+    async def run():
+        users = await pool.table("users").select("credits").eq("id", "u1").execute()
+        change = await pool.rpc("apply_credit_change", {"p_user_id": "u1", "p_credits": 1}).execute()
+        await pool.aclose()
+        return users.data, change.data
+
+    users, change = asyncio.run(run())
+    assert users == [{"id": "u1", "credits": 1}]
+    assert change == [{"status": "applied", "balance": 2}]
+    assert [r.headers["apikey"] for r in requests] == ["service-key", "service-key"]
+    assert requests[0].headers["authorization"] == "Bearer service-key"
+    assert requests[0].url.params["id"] == "eq.u1"
+    assert json.loads(requests[1].content) == {"p_user_id": "u1", "p_credits": 1}
+
+
+def test_health_reports_failures():
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    pool = pool_with(handler)
+    health = asyncio.run(pool.health())
+    assert health["healthy"] is False
+    assert health["latency_ms"] >= 0
+
+
+def test_closed_pool_reopens_on_next_use():
+    pool = SupabasePool(url="http://supabase.test/", key="service-key")
+    first = pool.db
+    asyncio.run(pool.aclose())
+    assert pool.db is not first
+
+
+def test_session_keeps_the_pool_limits_and_forwards_verify():
+    import ssl
+    from src.services.supabase import PooledPostgrestClient
+
+    client = PooledPostgrestClient("http://supabase.test/rest/v1", limits=httpx.Limits(max_connections=2))
+    # Newer postgrest releases call create_session with verify, older ones without it
+    insecure = client.create_session("http://supabase.test", {}, 5, verify=False)
+    for session in (client.session, insecure):
+        assert session._transport._pool._max_connections == 2
+    assert insecure._transport._pool._ssl_context.verify_mode == ssl.CERT_NONE
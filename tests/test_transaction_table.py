@@ -0,0 +1,58 @@
+import numpy as np
+from analytics.table import TransactionTable, summarize_transactions, to_cents, to_dates
+
+TRANSACTIONS = [
+    {"date": "2025-01-03", "description": "Salary", "amount": 1000.00, "type": "credit", "category": "Income"},
+    {"date": "2025-01-05", "description": "Grocery", "amount": "85.10", "type": "debit", "category": "Groceries"},
+    {"date": "2025-01-20", "description": "Grocery", "amount": 0.20, "type": "debit", "category": "Groceries"},
+    {"date": "2025-02-02", "description": "Rent", "amount": 500, "type": "debit", "category": "Housing"},
+    {"date": "bad date", "description": "Fee", "amount": 1.01, "type": "debit"},
+]
+
+
+def test_amounts_are_exact_cents():
+    assert to_cents([0.1, 0.2, 0.125, -0.125, None, "3"]).tolist() == [10, 20, 13, -13, 0, 300]
+    # Halves that binary floats store just below .5 of a cent still round up
+    assert to_cents([1.005, 2.675, -1.005, "0.015", 1e-3]).tolist() == [101, 268, -101, 2, 0]
+    # Float addition would give 0.30000000000000004
+    table = TransactionTable.from_records([{"amount": 0.1}, {"amount": 0.2}])
+    assert table.totals()["debit"]["total_amount"] == 0.3
+
+
+def test_unparseable_dates_become_nat():
+    dates = to_dates(["2025-01-03T10:00:00", None, "garbage"])
+    assert str(dates[0]) == "2025-01-03"
+    assert np.isnat(dates[1:]).all()
+
+
+def test_summary():
+    summary = summarize_transactions(TRANSACTIONS)
+    assert summary["total_transactions"] == 5
+    assert summary["credits"] == {"count": 1, "total_amount": 1000.0}
+    assert summary["debits"] == {"count": 4, "total_amount": 586.31}
+    assert summary["net"] == 413.69
+    assert summary["period"] == {"start": "2025-01-03", "end": "2025-02-02"}
+    assert summary["by_category"] == {"Groceries": 85.3, "Housing": 500.0, "Uncategorized": 1.01}
+
+
+def test_monthly_rollup_carries_the_balance():
+    months = TransactionTable.from_records(TRANSACTIONS).monthly(opening_balance=100)
+    assert months == [
+        {"month": "2025-01", "count": 3, "debits": 85.3, "credits": 1000.0, "net": 914.7, "closing_balance": 1014.7},
+        {"month": "2025-02", "count": 1, "debits": 500.0, "credits": 0.0, "net": -500.0, "closing_balance": 514.7},
+    ]
+
+
+def test_running_balance_is_chronological():
+    records = [TRANSACTIONS[3], TRANSACTIONS[0], TRANSACTIONS[1]]
+    dates, balances = TransactionTable.from_records(records).running_balance()
+    assert [str(d) for d in dates] == ["2025-01-03", "2025-01-05", "2025-02-02"]
+    assert balances.tolist() == [100000, 91490, 41490]
+
+
+def test_empty_table():
+    summary = summarize_transactions([])
+    assert summary["total_transactions"] == 0
+    assert summary["debits"] == {"count": 0, "total_amount": 0.0}
+    assert summary["period"] == {"start": None, "end": None}
+    assert summary["monthly"] == []
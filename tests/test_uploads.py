@@ -0,0 +1,59 @@
+import io
+import asyncio
+import hashlib
+import os
+import pytest
+from fastapi import UploadFile
+from storage.uploads import UploadTooLarge, save_upload_stream
+
+
+class CountingFile(io.BytesIO):
+    """Records the size of every read, to check the upload is copied in chunks"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+def upload(data, filename="statement.pdf", size=None):
+    return UploadFile(CountingFile(data), filename=filename, size=size)
+
+
+def test_upload_is_copied_in_chunks_and_hashed(tmp_path):
+    data = os.urandom(10_000)
+    file = upload(data)
+    saved = asyncio.run(save_upload_stream(file, str(tmp_path), chunk_size=4096))
+
+    assert saved.size == len(data)
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert saved.path == str(tmp_path / f"{saved.sha256}.pdf")
+    with open(saved.path, "rb") as f:
+        assert f.read() == data
+    assert set(file.file.reads) == {4096}
+    assert os.listdir(tmp_path) == [os.path.basename(saved.path)]
+
+
+def test_explicit_filename(tmp_path):
+    saved = asyncio.run(save_upload_stream(upload(b"%PDF-1.4"), str(tmp_path), filename="u1_1.pdf"))
+    assert saved.path == str(tmp_path / "u1_1.pdf")
+
+
+def test_declared_size_over_the_limit_is_rejected_before_reading(tmp_path):
+    file = upload(b"x" * 100, size=100)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload_stream(file, str(tmp_path), max_size=50))
+    assert file.file.reads == []
+
+
+def test_oversized_stream_is_rejected_and_cleaned_up(tmp_path):
+    file = upload(b"x" * 100)
+    with pytest.raises(UploadTooLarge) as e:
+        asyncio.run(save_upload_stream(file, str(tmp_path), max_size=50, chunk_size=32))
+    assert e.value.max_size == 50
+    # Reading stops at the chunk that crosses the limit, and no partial file is left
+    assert len(file.file.reads) == 2
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,126 @@
+import asyncio
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from src.models.schemas import User
+from src.services.user import UserService
+from src.services.user_cache import INVALIDATION_CHANNEL, UserCache
+
+
+def user(user_id="u1", credits=1, email="a@example.com"):
+    return User(id=user_id, email=email, credits=credits, created_at="2025-01-01T00:00:00")
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.services.user_cache.time.monotonic", lambda: now[0])
+    cache = UserCache(ttl=30, redis_url="")
+    cache.set("a@example.com", user())
+    assert cache.get_by_id("u1").credits == 1
+    now[0] += 31
+    assert cache.get("a@example.com") is None
+    assert cache.get_by_id("u1") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = UserCache(ttl=30, max_entries=2, redis_url="")
+    cache.set("a", user("u1", email="a@example.com"))
+    cache.set("b", user("u2", email="b@example.com"))
+    cache.get("a")
+    cache.set("c", user("u3", email="c@example.com"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_concurrent_misses_share_one_load():
+    cache = UserCache(ttl=30, redis_url="")
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return user()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("a@example.com", load) for _ in range(5)))
+
+    users = asyncio.run(run())
+    assert len(loads) == 1
+    assert all(u.id == "u1" for u in users)
+
+
+def test_failed_load_is_not_cached():
+    cache = UserCache(ttl=30, redis_url="")
+
+    async def load():
+        raise ConnectionError("database down")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.get_or_load("a@example.com", load))
+    assert cache._pending == {}
+
+
+def test_credit_write_through_keeps_the_ttl():
+    cache = UserCache(ttl=30, redis_url="")
+    cache.set("a@example.com", user())
+    expires_at = cache._users["a@example.com"][0]
+    cache.update_credits("u1", 9)
+    assert cache.get("a@example.com").credits == 9
+    assert cache._users["a@example.com"][0] == expires_at
+
+
+def test_invalidations_reach_other_workers():
+    server = fakeredis.FakeServer()
+    caches = [UserCache(ttl=30, redis_url="redis://test") for _ in range(2)]
+
+    async def run():
+        for cache in caches:
+            cache._redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+            cache.set("a@example.com", user())
+            await cache.start()
+        redis = caches[0]._redis
+        while (await redis.pubsub_numsub(INVALIDATION_CHANNEL))[0][1] < 2:
+            await asyncio.sleep(0.01)
+
+        await caches[0].publish_invalidation("u1")
+        for _ in range(100):
+            if caches[1].get_by_id("u1") is None:
+                break
+            await asyncio.sleep(0.01)
+        state = [cache.get_by_id("u1") for cache in caches]
+        for cache in caches:
+            await cache.aclose()
+        return state
+
+    sender, receiver = asyncio.run(run())
+    # The publishing worker has already updated its own copy
+    assert sender is not None
+    assert receiver is None
+
+
+def test_credit_change_evicts_the_user_elsewhere(fake_db, monkeypatch):
+    fake_db.functions["apply_credit_change"] = lambda **params: [{"status": "applied", "balance": 6}]
+    cache = UserCache(ttl=30, redis_url="redis://test")
+    published = []
+
+    async def publish(user_id):
+        published.append(user_id)
+
+    monkeypatch.setattr(cache, "publish_invalidation", publish)
+    service = UserService(db=fake_db, cache=cache)
+    cache.set("a@example.com", user())
+
+    asyncio.run(service.add_credits("u1", 5, payment_id="pi_1"))
+    assert cache.get_by_id("u1").credits == 6
+    assert published == ["u1"]
+
+
+def test_failed_credit_change_invalidates_the_user(fake_db, monkeypatch):
+    cache = UserCache(ttl=30, redis_url="")
+    service = UserService(db=fake_db, cache=cache)
+    cache.set("a@example.com", user())
+    fake_db.fail = TimeoutError("no response")
+
+    assert asyncio.run(service.add_credits("u1", 5, payment_id="pi_1")) is False
+    # The RPC may have been applied, so the cached balance can't be trusted
+    assert cache.get_by_id("u1") is None